@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+[LLM 응답 캐시 모듈]
+- HCX / GPT 요청을 (endpoint, 모델/task ID, 요청 body(샘플링 파라미터 + messages))의 해시로 식별
+- 응답을 SQLite 파일에 저장하여 파이프라인 재실행 시 동일 요청은 API를 호출하지 않음
+- 저장 용량이 max_size_mb를 넘으면 가장 오래 사용하지 않은 응답부터 삭제
+- 동시에 들어온 동일 요청은 하나의 API 호출로 합침 (in-flight 요청 공유)
+- stage(파이프라인 단계)별 hit / miss 통계 리포트
+
+models 아래 모든 모델 프로젝트(review, product_summarization, nutrition_ingredients_information, thumbnail_description)가
+이 파일 하나를 공유하며, 각 프로젝트의 utils/llm_cache.py는 이 모듈을 불러오는 얇은 wrapper이다.
+기본 캐시 파일은 ~/.cache/foodly/llm_cache.sqlite3 이며 모든 파이프라인이 공유한다.
+환경 변수 LLM_CACHE_PATH, LLM_CACHE_MAX_MB로 경로와 최대 용량을 변경할 수 있고,
+LLM_CACHE_DISABLE=1 이면 캐시를 사용하지 않는다.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from functools import lru_cache
+from collections import defaultdict
+
+__all__ = ["LLMCache", "get_llm_cache", "DEFAULT_CACHE_PATH", "DEFAULT_MAX_SIZE_MB"]
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "foodly", "llm_cache.sqlite3")
+DEFAULT_MAX_SIZE_MB = 1024
+EVICTION_CHECK_INTERVAL = 100  # 쓰기 N회마다 용량 확인
+
+
+class LLMCache:
+    def __init__(self, db_path=DEFAULT_CACHE_PATH, max_size_mb=DEFAULT_MAX_SIZE_MB, enabled=True):
+        self.db_path = db_path
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> {"event": threading.Event, "result": ..., "error": 호출 중 발생한 예외}
+        self._writes = 0
+        self.stats = defaultdict(lambda: {"hit": 0, "miss": 0, "collapsed": 0})
+        self._conn = None
+        if self.enabled:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed)")
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(endpoint, model, payload):
+        """
+        endpoint, 모델(또는 튜닝 task ID), 요청 body(dict)로 캐시 키(sha256)를 만든다.
+        body는 키 정렬된 JSON으로 직렬화되므로 dict 순서와 무관하다.
+        """
+        raw = json.dumps({"endpoint": endpoint, "model": model, "payload": payload},
+                         ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def set(self, key, response):
+        if not self.enabled:
+            return
+        value = json.dumps(response, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode("utf-8")), now, now)
+            )
+            self._conn.commit()
+            self._writes += 1
+            if self._writes % EVICTION_CHECK_INTERVAL == 0:
+                self._evict()
+
+    def _evict(self):
+        """전체 용량이 max_size_bytes를 넘으면 최근 사용 시각이 오래된 응답부터 90% 수준까지 삭제한다."""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_size_bytes:
+            return
+        target = int(self.max_size_bytes * 0.9)
+        removed = 0
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed ASC").fetchall():
+            if total - removed <= target:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            removed += size
+        self._conn.commit()
+        print(f"LLM 캐시 정리: {removed / 1024 / 1024:.1f}MB 삭제")
+
+    def get_or_call(self, stage, endpoint, model, payload, call_fn, is_valid=None, on_hit=None):
+        """
+        캐시에 응답이 있으면 반환하고, 없으면 call_fn()을 호출하여 결과를 저장 후 반환한다.
+        동일 키의 요청이 이미 진행 중이면 새로 호출하지 않고 그 결과를 기다린다 (call_fn이 예외를 발생시키면 같은 예외 발생).
+        is_valid(result)가 False인 결과(API 에러 등)는 저장하지 않는다.
+        on_hit이 주어지면 이번 요청에서 API를 호출하지 않은 결과(캐시 hit, in-flight 공유)에 on_hit(result)를 적용하여 반환한다.
+        (예: 응답과 latency를 함께 저장하는 경우 hit의 latency를 0으로 보고)
+        """
+        if is_valid is None:
+            is_valid = lambda result: result is not None
+        if on_hit is None:
+            on_hit = lambda result: result
+        if not self.enabled:
+            self._count(stage, "miss")
+            return call_fn()
+
+        key = self.make_key(endpoint, model, payload)
+        cached = self.get(key)
+        if cached is not None:
+            self._count(stage, "hit")
+            return on_hit(cached)
+
+        with self._lock:
+            inflight = self._inflight.get(key)
+            is_leader = inflight is None
+            if is_leader:
+                inflight = {"event": threading.Event(), "result": None, "error": None}
+                self._inflight[key] = inflight
+
+        if not is_leader:
+            inflight["event"].wait()
+            self._count(stage, "collapsed")
+            if inflight["error"] is not None:
+                raise inflight["error"]
+            return on_hit(inflight["result"])
+
+        try:
+            # 대기 중 다른 요청이 먼저 저장했을 수 있으므로 한 번 더 확인
+            cached = self.get(key)
+            if cached is not None:
+                self._count(stage, "hit")
+                inflight["result"] = cached
+                return on_hit(cached)
+            self._count(stage, "miss")
+            try:
+                result = call_fn()
+            except BaseException as e:
+                inflight["error"] = e
+                raise
+            inflight["result"] = result
+            if is_valid(result):
+                self.set(key, result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            inflight["event"].set()
+
+    def _count(self, stage, kind):
+        with self._lock:
+            self.stats[stage][kind] += 1
+
+    def report(self, stage=None):
+        """stage별 hit / miss / collapsed(동시 동일 요청 합침) 통계를 출력하고 반환한다."""
+        stages = [stage] if stage is not None else sorted(self.stats)
+        report = {}
+        for name in stages:
+            counts = dict(self.stats[name])
+            total = sum(counts.values())
+            counts["hit_rate"] = (counts["hit"] + counts["collapsed"]) / total if total else 0.0
+            report[name] = counts
+            print(f"[LLM 캐시] {name}: hit {counts['hit']}, miss {counts['miss']}, "
+                  f"collapsed {counts['collapsed']} (hit rate {counts['hit_rate']:.1%})")
+        return report
+
+
+@lru_cache(maxsize=1)
+def get_llm_cache():
+    """환경 변수 설정을 반영한 프로세스 전역 LLMCache를 반환한다."""
+    return LLMCache(
+        db_path=os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH),
+        max_size_mb=float(os.getenv("LLM_CACHE_MAX_MB", DEFAULT_MAX_SIZE_MB)),
+        enabled=os.getenv("LLM_CACHE_DISABLE", "0") != "1",
+    )
@@ -1,8 +1,16 @@
+import os
+import sys
 import requests
 import pandas as pd
 
 import time
 
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils.llm_cache import get_llm_cache
+
 class TuningModelInference:
     def __init__(self, host, api_key, request_id, taskId):
         self.host = host
@@ -31,6 +39,17 @@ class TuningModelInference:
             "stopBefore": []
         }
 
+        # 동일 요청은 LLM 캐시에서 재사용 (API를 호출하지 않은 hit / 동시 요청 공유는 latency 0.0 반환)
+        response_text, elapsed_time = get_llm_cache().get_or_call(
+            stage="nutrition_hcx_inference", endpoint=self.host + f'/testapp/v2/tasks/{self.taskId}/chat-completions',
+            model=self.taskId, payload=data,
+            call_fn=lambda: self._request(headers, data),
+            is_valid=lambda result: result[0] is not None,
+            on_hit=lambda result: (result[0], 0.0)
+        )
+        return response_text, elapsed_time
+
+    def _request(self, headers, data):
         for attempt in range(20):
             try:
                 start_time = time.time()
@@ -97,6 +116,8 @@ if __name__ == '__main__':
         # 진행 상황 출력
         print(f"[{idx+1}/{len(ocr_data_list)}] 요청 완료 - img-ID: {img_id}")
 
+    get_llm_cache().report("nutrition_hcx_inference")
+
     # 결과 저장
     result_df = pd.DataFrame(results)
     result_df.to_csv("data/HCX/inference/HCX_inference_v2.csv", index=False, encoding="utf-8-sig")
@@ -2,6 +2,7 @@ import os
 import logging
 import pandas as pd
 from utils.hcx import CompletionExecutor
+from utils.llm_cache import get_llm_cache
 from utils.data_processing import product_introduction_processing
 
 logger = logging.getLogger(__name__)
@@ -26,7 +27,8 @@ def run_fewshot_inference(config):
     completion_executor = CompletionExecutor(
         host=host,
         api_key=api_key,
-        request_id=request_id
+        request_id=request_id,
+        stage="fewshot_inference"
     )
 
     # 데이터 불러오기
@@ -77,6 +79,8 @@ def run_fewshot_inference(config):
         data.loc[idx, "latency"] = elapsed_time
         logger.info(f"[Fewshot Inference] idx={idx}, latency={round(elapsed_time,2)} sec, output={model_output}")
 
+    get_llm_cache().report("fewshot_inference")
+
     # 결과 저장
     output_path = os.path.join(data_dir, output_fewshot_csv)
     data.to_csv(output_path, index=False)
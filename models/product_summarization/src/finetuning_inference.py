@@ -2,6 +2,7 @@ import os
 import logging
 import pandas as pd
 from utils.hcx import FinetunedCompletionExecutor
+from utils.llm_cache import get_llm_cache
 from utils.data_processing import product_introduction_processing
 
 logger = logging.getLogger(__name__)
@@ -39,7 +40,8 @@ def run_finetuning_inference(config):
         host=host,
         api_key=api_key,
         request_id=request_id,
-        taskId=task_id
+        taskId=task_id,
+        stage="finetuning_inference"
     )
 
     # 인퍼런스
@@ -67,6 +69,8 @@ def run_finetuning_inference(config):
         data.loc[idx, "latency"] = elapsed_time
         logger.info(f"[Finetuning Inference] idx={idx}, latency={round(elapsed_time,2)} sec, output={model_output}")
 
+    get_llm_cache().report("finetuning_inference")
+
     # 결과 저장
     output_path = os.path.join(data_dir, output_finetuning_csv)
     data.to_csv(output_path, index=False)
@@ -1,14 +1,27 @@
 import time
 import requests
+from utils.llm_cache import get_llm_cache
 
 # HCX-003 기본 모델
 class CompletionExecutor:
-    def __init__(self, host, api_key, request_id):
+    def __init__(self, host, api_key, request_id, stage="product_summarization"):
         self._host = host
         self._api_key = api_key
         self._request_id = request_id
+        self._stage = stage
 
     def execute(self, completion_request, max_retries=5, retry_delay=20):
+        # 동일 요청은 LLM 캐시에서 재사용 (API를 호출하지 않은 hit / 동시 요청 공유는 latency 0.0 반환)
+        model_output, elapsed_time = get_llm_cache().get_or_call(
+            stage=self._stage, endpoint=self._host + '/testapp/v1/chat-completions/HCX-003', model="HCX-003",
+            payload=completion_request,
+            call_fn=lambda: self._execute(completion_request, max_retries, retry_delay),
+            is_valid=lambda result: result[0] is not None,
+            on_hit=lambda result: (result[0], 0.0)
+        )
+        return model_output, elapsed_time
+
+    def _execute(self, completion_request, max_retries=5, retry_delay=20):
         headers = {
             'Authorization': self._api_key,
             'X-NCP-CLOVASTUDIO-REQUEST-ID': self._request_id,
@@ -66,13 +79,25 @@ class CreateTaskExecutor:
 
 # 튜닝된 HCX-003 모델
 class FinetunedCompletionExecutor:
-    def __init__(self, host, api_key, request_id, taskId):
+    def __init__(self, host, api_key, request_id, taskId, stage="product_summarization"):
         self._host = host
         self._api_key = api_key
         self._request_id = request_id
         self._taskID = taskId
+        self._stage = stage
 
     def execute(self, completion_request, max_retries=5, retry_delay=20):
+        # 동일 요청은 LLM 캐시에서 재사용 (API를 호출하지 않은 hit / 동시 요청 공유는 latency 0.0 반환)
+        model_output, elapsed_time = get_llm_cache().get_or_call(
+            stage=self._stage, endpoint=self._host + f'/testapp/v2/tasks/{self._taskID}/chat-completions',
+            model=self._taskID, payload=completion_request,
+            call_fn=lambda: self._execute(completion_request, max_retries, retry_delay),
+            is_valid=lambda result: result[0] is not None,
+            on_hit=lambda result: (result[0], 0.0)
+        )
+        return model_output, elapsed_time
+
+    def _execute(self, completion_request, max_retries=5, retry_delay=20):
         headers = {
             'Authorization': self._api_key,
             'X-NCP-CLOVASTUDIO-REQUEST-ID': self._request_id,
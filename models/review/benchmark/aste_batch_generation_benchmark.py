@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+[ASTE 배치 생성 엔진 벤치마크]
+- 작은 causal LM(기본: hf-internal-testing/tiny-random-LlamaForCausalLM)으로 CPU에서 실행 가능
+- 길이가 다양한 합성 리뷰에 대해 batch_size=1(기존 방식)과 길이 bucket 배치 생성의 처리량을 비교한다.
+- greedy decoding으로 두 방식의 생성 결과가 같은지 확인한다.
+- --fail_every N 을 주면 N번째 항목마다 첫 시도를 파싱 실패로 처리하여 재시도 경로를 확인한다.
+- --prefix_cache 를 주면 프롬프트 고정 prefix의 KV 캐시 재사용 시 처리량과 결과 일치 여부를 확인한다.
+- --constrained 를 주면 ASTE 스키마 검증 파서로 제약 없는 생성과 스키마 제약 디코딩의 재시도율을 비교한다.
+
+실행 예시 (models/review 폴더에서):
+    python benchmark/aste_batch_generation_benchmark.py --num_reviews 64 --batch_size 16
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+import numpy as np
+import torch
+from transformers import AutoTokenizer, AutoModelForCausalLM
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils.batch_generation import run_batched_generation
+from utils.constrained_decoding import AsteJsonGrammar, make_aste_logits_processor_factory, SENTIMENTS
+from utils.prefix_cache import template_prefix
+
+PROMPT = "다음 식품 리뷰에서 속성, 평가, 감정을 JSON으로 추출하세요.\n### 입력:\n{review}\n<think>\n"
+PHRASES = ["배송 빠르고 좋습니다", "맛있어요", "포장이 꼼꼼해요", "가격 대비 양이 많아요",
+           "조금 짜요", "신선하지 않아서 아쉬워요", "재구매 의사 있어요"]
+
+
+def make_reviews(num_reviews, seed=42):
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(1, 12, size=num_reviews)
+    return [" ".join(rng.choice(PHRASES, size=n)) for n in lengths]
+
+
+def make_parse_fn(fail_every):
+    """fail_every번째 항목의 첫 응답만 실패로 처리하는 파서 (재시도 경로 확인용)"""
+    seen = set()
+
+    def parse_fn(response):
+        if fail_every and response not in seen and len(seen) % fail_every == 0:
+            seen.add(response)
+            return None
+        seen.add(response)
+        return response
+    return parse_fn
+
+
+def parse_aste_answer(response):
+    """</think> 이후 JSON 코드 블록이 ASTE triplet 스키마를 만족하면 리스트를, 아니면 None을 반환"""
+    answer = response.split("</think>")[-1]
+    match = re.search(r"```json\s*(.*?)\s*```", answer, re.DOTALL)
+    try:
+        triplets = json.loads(match.group(1) if match else answer)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(triplets, list):
+        return None
+    for triplet in triplets:
+        if not (isinstance(triplet, dict) and set(triplet) == {"속성", "평가", "감정"}
+                and triplet["감정"] in SENTIMENTS):
+            return None
+    return triplets
+
+
+def compare_retry_rate(prompts, model, tokenizer, args):
+    """스키마 검증 파서 기준으로 제약 없는 생성과 제약 디코딩의 재시도율을 비교한다."""
+    max_new_tokens = args.constrained_max_new_tokens
+    grammar = AsteJsonGrammar(tokenizer)
+    factory = make_aste_logits_processor_factory(grammar, tokenizer, max_new_tokens=max_new_tokens,
+                                                 answer_reserve=max_new_tokens // 2)
+    retry_rates = {}
+    for name, processor_factory in [("제약 없음", None), ("스키마 제약", factory)]:
+        print(f"\n=== {name} (max_attempts={args.max_attempts}) ===")
+        results, failure_counts, _ = run_batched_generation(
+            prompts, model, tokenizer, parse_fn=parse_aste_answer, batch_size=args.batch_size,
+            max_new_tokens=max_new_tokens, max_attempts=args.max_attempts,
+            logits_processor_factory=processor_factory, do_sample=True, temperature=0.6, top_p=0.95
+        )
+        retry_rates[name] = (sum(failure_counts) / len(prompts), sum(result is None for result in results))
+    for name, (retry_rate, num_failed) in retry_rates.items():
+        print(f"[{name}] 리뷰당 재시도 {retry_rate:.2f}회, 최종 파싱 실패 {num_failed}건")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ASTE 배치 생성 엔진 벤치마크")
+    parser.add_argument("--model_name", type=str, default="hf-internal-testing/tiny-random-LlamaForCausalLM")
+    parser.add_argument("--num_reviews", type=int, default=64)
+    parser.add_argument("--batch_size", type=int, default=16)
+    parser.add_argument("--max_new_tokens", type=int, default=32)
+    parser.add_argument("--device", type=str, default="cpu")
+    parser.add_argument("--fail_every", type=int, default=0)
+    parser.add_argument("--prefix_cache", action="store_true", help="prefix KV 캐시 재사용 비교")
+    parser.add_argument("--constrained", action="store_true", help="스키마 제약 디코딩 재시도율 비교")
+    parser.add_argument("--constrained_max_new_tokens", type=int, default=192)
+    parser.add_argument("--max_attempts", type=int, default=3)
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    tokenizer = AutoTokenizer.from_pretrained(args.model_name)
+    model = AutoModelForCausalLM.from_pretrained(args.model_name).to(args.device).eval()
+    prompts = [PROMPT.format(review=review) for review in make_reviews(args.num_reviews)]
+
+    print("\n=== batch_size=1 (기존 방식) ===")
+    sequential, _, _ = run_batched_generation(prompts, model, tokenizer, parse_fn=lambda response: response,
+                                              batch_size=1, max_new_tokens=args.max_new_tokens, do_sample=False)
+    print(f"\n=== batch_size={args.batch_size} (길이 bucket) ===")
+    batched, failure_counts, _ = run_batched_generation(prompts, model, tokenizer,
+                                                        parse_fn=make_parse_fn(args.fail_every),
+                                                        batch_size=args.batch_size,
+                                                        max_new_tokens=args.max_new_tokens, do_sample=False)
+
+    num_same = sum(a == b for a, b in zip(sequential, batched))
+    print(f"\n생성 결과 일치: {num_same}/{len(prompts)}, 재시도 항목 수: {sum(count > 0 for count in failure_counts)}")
+
+    if args.prefix_cache:
+        print(f"\n=== batch_size={args.batch_size} + prefix KV 캐시 ===")
+        prefix_text = template_prefix(lambda review: PROMPT.format(review=review))
+        cached, _, _ = run_batched_generation(prompts, model, tokenizer, parse_fn=lambda response: response,
+                                              batch_size=args.batch_size, max_new_tokens=args.max_new_tokens,
+                                              do_sample=False, prefix_text=prefix_text)
+        print(f"\nprefix 캐시 생성 결과 일치: {sum(a == b for a, b in zip(sequential, cached))}/{len(prompts)}")
+
+    if args.constrained:
+        compare_retry_rate(prompts, model, tokenizer, args)
+
+
+if __name__ == "__main__":
+    main()
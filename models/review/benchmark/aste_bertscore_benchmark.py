@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+[ASTE 평가 BERTScore 배치 계산 벤치마크]
+- Golden Label 데이터(기본 100개 리뷰)에 대해 aggregate_evaluation의 BERTScore 계산 방식을 비교한다.
+    - 기존: (GL, 예측) 쌍마다 bert_score.score([text1], [text2])를 호출 (호출마다 모델 설정, 매칭 2회)
+    - 배치: 전체 행의 쌍을 중복 제거 후 재사용 scorer로 한 번에 계산하고, Hungarian 매칭은 계산된 행렬로 수행
+    - 배치 + 유사도 캐시: 같은 쌍을 다시 평가할 때 (빈 임시 캐시로 시작하여 두 번째 실행 시간 측정)
+- 두 방식의 평가 결과(TP/FN/FP) 동일성과 소요 시간, 속도 향상 배율을 출력한다.
+
+실행 예시 (models/review 폴더에서):
+    python benchmark/aste_bertscore_benchmark.py \
+        --input_csv ./data/aste/eval/aste_annotation_100_golden_label.csv --prediction_col aste_hcx --device cpu
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use("Agg")
+from bert_score import score
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils.evaluate import extract_triplets, match_triplets, evaluate_instance, aggregate_evaluation, resolve_device
+
+
+def legacy_similarity_matrix(gl_triplets, hcx_triplets, device):
+    """비교용 기존 방식: 쌍마다 bert_score.score 호출"""
+    sim_matrix = np.zeros((len(gl_triplets), len(hcx_triplets)))
+    for i, gl in enumerate(gl_triplets):
+        for j, hcx in enumerate(hcx_triplets):
+            P, R, F1 = score([gl["평가"]], [hcx["평가"]], lang="ko", verbose=False, device=device)
+            sim_matrix[i, j] = F1.item()
+    return sim_matrix
+
+
+def legacy_aggregate_counts(df, golden_label_col, model_prediction_col, eval_threshold, device):
+    """기존 aggregate_evaluation과 같은 호출 횟수(행마다 매칭 2회)로 TP/FN/FP를 집계"""
+    total_counts = {field: {"TP": 0, "FN": 0, "FP": 0} for field in ["속성", "평가", "감정"]}
+    num_calls = 0
+    for gl_value, pred_value in zip(df[golden_label_col], df[model_prediction_col]):
+        gl_triplets, hcx_triplets = extract_triplets(gl_value), extract_triplets(pred_value)
+        if gl_triplets and hcx_triplets:
+            # aggregate_evaluation의 match_triplets 호출
+            match_triplets(gl_triplets, hcx_triplets, eval_threshold,
+                           legacy_similarity_matrix(gl_triplets, hcx_triplets, device))
+            num_calls += len(gl_triplets) * len(hcx_triplets)
+        # evaluate_instance 내부의 match_triplets 호출
+        sim_matrix = legacy_similarity_matrix(gl_triplets, hcx_triplets, device) if gl_triplets and hcx_triplets else None
+        num_calls += len(gl_triplets) * len(hcx_triplets)
+        counts = evaluate_instance(gl_triplets, hcx_triplets, eval_threshold, sim_matrix)
+        for field in total_counts:
+            for key in total_counts[field]:
+                total_counts[field][key] += counts[field][key]
+    return total_counts, num_calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ASTE 평가 BERTScore 배치 계산 벤치마크")
+    parser.add_argument("--input_csv", type=str, default="./data/aste/eval/aste_annotation_100_golden_label.csv")
+    parser.add_argument("--golden_label_col", type=str, default="aste_golden_label")
+    parser.add_argument("--prediction_col", type=str, default="aste_hcx")
+    parser.add_argument("--eval_threshold", type=float, default=0.85)
+    parser.add_argument("--device", type=str, default=None, help="기본: GPU가 있으면 cuda, 없으면 cpu")
+    parser.add_argument("--num_samples", type=int, default=100)
+    args = parser.parse_args()
+
+    device = resolve_device(args.device)
+    # 기존 캐시의 영향을 받지 않도록 빈 임시 유사도 캐시 사용
+    os.environ["SIMILARITY_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="aste_bertscore_benchmark_"),
+                                                       "similarity_cache.sqlite3")
+    df = pd.read_csv(args.input_csv).head(args.num_samples)
+    print(f"데이터: {args.input_csv} ({len(df)}개 리뷰), device: {device}")
+
+    start_time = time.time()
+    metrics, _, _ = aggregate_evaluation(df, args.golden_label_col, args.prediction_col, args.eval_threshold, device=device)
+    batched_seconds = time.time() - start_time
+
+    start_time = time.time()
+    aggregate_evaluation(df, args.golden_label_col, args.prediction_col, args.eval_threshold, device=device)
+    cached_seconds = time.time() - start_time
+
+    start_time = time.time()
+    legacy_counts, num_calls = legacy_aggregate_counts(df, args.golden_label_col, args.prediction_col,
+                                                       args.eval_threshold, device)
+    legacy_seconds = time.time() - start_time
+
+    same = all(metrics[field][key] == legacy_counts[field][key] for field in legacy_counts for key in ["TP", "FN", "FP"])
+    print("\n=== BERTScore 계산 방식 비교 ===")
+    print(f"기존 (쌍마다 score 호출 {num_calls}회): {legacy_seconds:.2f}초")
+    print(f"배치 (scorer 재사용, 1회 배치 호출): {batched_seconds:.2f}초")
+    print(f"배치 + 유사도 캐시 (재평가): {cached_seconds:.2f}초")
+    print(f"속도 향상: x{legacy_seconds / max(batched_seconds, 1e-9):.1f}, TP/FN/FP 동일: {same}")
+
+
+if __name__ == "__main__":
+    main()
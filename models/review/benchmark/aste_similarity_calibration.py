@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+[ASTE 평가 코사인 유사도 임계값 보정 및 비교]
+- Golden Label 데이터에서 BERTScore 매칭 결정(F1 >= --bertscore_threshold)과 가장 많이 일치하는
+  BGE-m3-ko 임베딩 코사인 유사도 임계값을 calibrate_cosine_threshold로 구한다.
+- 보정된 임계값으로 similarity="cosine" 평가를 실행하여 BERTScore 평가와 F1 / 소요 시간을 비교한다.
+- 출력된 임계값을 evaluate_aste(..., similarity="cosine", eval_threshold=...)에 사용한다.
+
+실행 예시 (models/review 폴더에서):
+    python benchmark/aste_similarity_calibration.py \
+        --input_csv ./data/aste/eval/aste_annotation_100_golden_label.csv --prediction_cols aste_hcx aste_gpt --device cpu
+"""
+
+import os
+import sys
+import time
+import argparse
+import pandas as pd
+import matplotlib
+matplotlib.use("Agg")
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils.evaluate import calibrate_cosine_threshold, run_evaluation_engine, resolve_device
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ASTE 평가 코사인 유사도 임계값 보정")
+    parser.add_argument("--input_csv", type=str, default="./data/aste/eval/aste_annotation_100_golden_label.csv")
+    parser.add_argument("--golden_label_col", type=str, default="aste_golden_label")
+    parser.add_argument("--prediction_cols", type=str, nargs="+", default=["aste_hcx"],
+                        help="보정에 사용할 예측 칼럼 (여러 개면 모든 칼럼의 쌍을 함께 사용)")
+    parser.add_argument("--bertscore_threshold", type=float, default=0.85)
+    parser.add_argument("--embedding_model", type=str, default="dragonkue/BGE-m3-ko")
+    parser.add_argument("--device", type=str, default=None, help="기본: GPU가 있으면 cuda, 없으면 cpu")
+    args = parser.parse_args()
+
+    device = resolve_device(args.device)
+    df = pd.read_csv(args.input_csv)
+    # 여러 예측 칼럼은 (골든 라벨, 예측) 행을 이어 붙여 한 번에 보정
+    stacked = pd.concat([df[[args.golden_label_col, col]].rename(columns={col: "prediction"})
+                         for col in args.prediction_cols], ignore_index=True)
+    calibration = calibrate_cosine_threshold(stacked, args.golden_label_col, "prediction", args.bertscore_threshold,
+                                             device=device, embedding_model=args.embedding_model)
+
+    rows = []
+    for col in args.prediction_cols:
+        for similarity, threshold in [("bertscore", args.bertscore_threshold), ("cosine", calibration["threshold"])]:
+            start_time = time.time()
+            result = run_evaluation_engine(df, args.golden_label_col, col, threshold, device=device,
+                                           similarity=similarity, embedding_model=args.embedding_model)
+            seconds = time.time() - start_time
+            rows.append({"prediction_col": col, "similarity": similarity, "threshold": threshold, "seconds": seconds,
+                         **{f"{field}_F1": result["metrics"][field]["F1"] for field in ["속성", "평가", "감정"]}})
+
+    print(f"\n=== 보정 결과: cosine 임계값 {calibration['threshold']:.4f}, "
+          f"BERTScore 결정 일치율 {calibration['agreement']:.1%} ({calibration['num_pairs']}쌍) ===")
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda value: f"{value:.4f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+[ASTE 추론 토큰 예산 / 조기 종료 벤치마크]
+- Golden Label 데이터에 대해 추론 토큰 예산(thinking_budget)별로 생성 지연 시간과 evaluate_aste F1을 비교한다.
+- 기준(예산 없음, 조기 종료 없음) 다음에 --budgets의 각 값을 조기 종료와 함께 실행한다 (0은 예산 없음 + 조기 종료).
+- --model_variant 14b는 14B 스크립트의 PROMPT / parse_aste_output을, 32b는 32B 스크립트의 build_prompt(채팅 템플릿) /
+  parse_response를 그대로 사용하며, 비교를 위해 기본값은 greedy decoding.
+
+실행 예시 (models/review 폴더에서):
+    python benchmark/aste_thinking_budget_benchmark.py --model_name deepseek_14b_custom_eval \
+        --input_csv ./data/aste/eval/aste_annotation_100_golden_label.csv --budgets 0 64 128 256
+    python benchmark/aste_thinking_budget_benchmark.py --model_variant 32b --model_name ./output_zeroshot/checkpoint-336 \
+        --input_csv ./data/aste/eval/aste_annotation_100_golden_label.csv --budgets 0 64 128 256
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import torch
+import matplotlib
+matplotlib.use("Agg")  # evaluate_aste의 그래프는 저장/표시하지 않음
+from transformers import AutoTokenizer, AutoModelForCausalLM
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils.evaluate import evaluate_aste
+from utils.batch_generation import run_batched_generation
+from utils.generation_control import make_generation_controls
+from src.review_pipeline.qwen_deepseek_14b_inference import PROMPT, parse_aste_output
+
+
+def prepare_variant(model_variant, reviews, tokenizer):
+    """
+    모델 스크립트별 (프롬프트 목록, parse_fn, add_special_tokens, 파싱 결과 -> 예측 칼럼 문자열 변환 함수)를 반환한다.
+    14B: 원문 PROMPT + parse_aste_output (문자열), 32B: 채팅 템플릿 + parse_response (JSON 리스트를 json.dumps로 저장)
+    """
+    if model_variant == "32b":
+        # 32B 스크립트는 unsloth를 import하므로 32b 측정 시에만 불러온다
+        from src.review_pipeline.qwen_deepseek_32b_inference import build_prompt, parse_response
+        prompts = [build_prompt(review, tokenizer) for review in reviews]
+        return prompts, parse_response, False, lambda aste: json.dumps(aste, ensure_ascii=False)
+    prompts = [PROMPT.format(review=review) for review in reviews]
+    return prompts, parse_aste_output, True, lambda aste: aste
+
+
+def run_setting(prompts, model, tokenizer, args, thinking_budget, early_stop, parse_fn, add_special_tokens):
+    """한 가지 설정으로 전체 리뷰를 생성하고 (결과, 리뷰당 지연 시간, 리뷰당 생성 토큰 수)를 반환한다."""
+    logits_processor_factory, stopping_criteria_factory = make_generation_controls(
+        tokenizer, max_new_tokens=args.max_new_tokens, thinking_budget=thinking_budget,
+        early_stop=early_stop, constrained=args.constrained
+    )
+    start_time = time.time()
+    results, _, batch_stats = run_batched_generation(
+        prompts, model, tokenizer, parse_fn=parse_fn,
+        batch_size=args.batch_size, max_new_tokens=args.max_new_tokens, max_attempts=args.max_attempts,
+        add_special_tokens=add_special_tokens,
+        logits_processor_factory=logits_processor_factory,
+        stopping_criteria_factory=stopping_criteria_factory,
+        do_sample=False
+    )
+    elapsed = time.time() - start_time
+    generated_tokens = sum(stats["generated_tokens"] for stats in batch_stats)
+    return results, elapsed / len(prompts), generated_tokens / len(prompts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ASTE 추론 토큰 예산 / 조기 종료 벤치마크")
+    parser.add_argument("--model_variant", type=str, default="14b", choices=["14b", "32b"],
+                        help="프롬프트 / 파서를 사용할 모델 스크립트 (qwen_deepseek_14b_inference / qwen_deepseek_32b_inference)")
+    parser.add_argument("--model_name", type=str, default="deepseek_14b_custom_eval")
+    parser.add_argument("--input_csv", type=str, default="./data/aste/eval/aste_annotation_100_golden_label.csv")
+    parser.add_argument("--num_samples", type=int, default=None)
+    parser.add_argument("--budgets", type=int, nargs="+", default=[0, 64, 128, 256])
+    parser.add_argument("--batch_size", type=int, default=8)
+    parser.add_argument("--max_new_tokens", type=int, default=512)
+    parser.add_argument("--max_attempts", type=int, default=1, help="파싱 실패 재시도 포함 최대 시도 횟수")
+    parser.add_argument("--constrained", action="store_true", help="스키마 제약 디코딩과 함께 측정")
+    parser.add_argument("--device", type=str, default="cuda" if torch.cuda.is_available() else "cpu")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.input_csv)
+    if args.num_samples is not None:
+        df = df.head(args.num_samples)
+    df = df.reset_index(drop=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model_name)
+    prompts, parse_fn, add_special_tokens, to_prediction = prepare_variant(args.model_variant, df["processed"], tokenizer)
+    model = AutoModelForCausalLM.from_pretrained(args.model_name).to(args.device).eval()
+
+    settings = [("기준", None, False)]
+    settings += [(f"budget={budget or '없음'} + 조기 종료", budget or None, True) for budget in args.budgets]
+    rows = []
+    for name, thinking_budget, early_stop in settings:
+        print(f"\n=== {name} ===")
+        results, latency, tokens_per_review = run_setting(prompts, model, tokenizer, args, thinking_budget,
+                                                          early_stop, parse_fn, add_special_tokens)
+        col_name = f"prediction_{len(rows)}"
+        df[col_name] = [np.nan if aste is None else to_prediction(aste) for aste in results]
+        metrics, _, _ = evaluate_aste(df, golden_label_col="aste_golden_label", model_prediction_col=col_name)
+        rows.append({
+            "setting": name,
+            "latency_per_review": latency,
+            "tokens_per_review": tokens_per_review,
+            "parse_fail": sum(aste is None for aste in results),
+            **{f"{field}_F1": metrics[field]["F1"] for field in ("속성", "평가", "감정")},
+        })
+
+    report = pd.DataFrame(rows)
+    report["speedup"] = report["latency_per_review"].iloc[0] / report["latency_per_review"]
+    print("\n=== 지연 시간 vs F1 ===")
+    print(report.to_string(index=False, float_format=lambda value: f"{value:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
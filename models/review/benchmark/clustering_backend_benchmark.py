@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+[클러스터링 방식 벤치마크]
+- UMAP 축소 후와 같은 형태의 합성 opinion 임베딩(가우시안 blob)으로 데이터 수별 클러스터링 시간을 측정한다.
+- 전체 Ward(ward)는 O(n²) 메모리이므로 --max_ward_size 이하에서만 실행하고,
+  그 범위에서 minibatch_ward / knn_ward 라벨과의 ARI(adjusted rand index)를 비교한다.
+
+실행 예시 (models/review 폴더에서):
+    python benchmark/clustering_backend_benchmark.py --sizes 10000 100000 1000000 --dim 256
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_blobs
+from sklearn.metrics import adjusted_rand_score
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils.clustering import cluster_embeddings
+
+
+def make_opinion_embeddings(num_samples, dim, num_topics, seed=42):
+    """opinion 주제 수만큼의 blob으로 구성된 float32 임베딩"""
+    emb, _ = make_blobs(n_samples=num_samples, n_features=dim, centers=num_topics, cluster_std=1.0,
+                        center_box=(-10.0, 10.0), random_state=seed)
+    return emb.astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="클러스터링 방식 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--num_topics", type=int, default=300)
+    parser.add_argument("--distance_threshold", type=float, default=21.5)
+    parser.add_argument("--methods", type=str, nargs="+", default=["ward", "minibatch_ward", "knn_ward"])
+    parser.add_argument("--max_ward_size", type=int, default=20000, help="전체 Ward를 실행할 최대 데이터 수 (n²/2 float64 거리 메모리)")
+    parser.add_argument("--max_knn_size", type=int, default=200000, help="knn_ward를 실행할 최대 데이터 수")
+    parser.add_argument("--n_micro_clusters", type=int, default=2000)
+    args = parser.parse_args()
+
+    limits = {"ward": args.max_ward_size, "knn_ward": args.max_knn_size}
+    rows = []
+    for num_samples in args.sizes:
+        emb = make_opinion_embeddings(num_samples, args.dim, args.num_topics)
+        labels = {}
+        for method in args.methods:
+            if num_samples > limits.get(method, num_samples):
+                print(f"[{num_samples}건] {method}: 건너뜀 (최대 {limits[method]}건)")
+                continue
+            start_time = time.time()
+            labels[method] = cluster_embeddings(emb, method=method, distance_threshold=args.distance_threshold,
+                                                n_micro_clusters=args.n_micro_clusters)
+            rows.append({
+                "size": num_samples,
+                "method": method,
+                "seconds": time.time() - start_time,
+                "clusters": int(np.unique(labels[method]).shape[0]),
+                "ARI_vs_ward": adjusted_rand_score(labels["ward"], labels[method]) if "ward" in labels else np.nan,
+            })
+
+    print("\n=== 클러스터링 방식별 시간 / 클러스터 수 / 전체 Ward 대비 ARI ===")
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda value: f"{value:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+[expand_inference_data 벤치마크]
+- 합성 ASTE 인퍼런스 데이터(기본 1M 행)로 칼럼 단위 expand_inference_data의 처리 시간을 측정한다.
+- 기존 행 단위(row.copy()) 구현과 일부 행(--legacy_rows)에 대해 결과 동일성 및 속도를 비교한다.
+
+실행 예시 (models/review 폴더에서):
+    python benchmark/expand_inference_benchmark.py --num_rows 1000000 --legacy_rows 20000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils.utils import expand_inference_data
+
+ASPECTS = ["맛", "배송", "포장", "가격", "양", "신선도", "상품"]
+SENTIMENTS = ["긍정", "부정", "중립"]
+
+
+def legacy_expand_inference_data(df, json_column="unsloth_deepseek_32b"):
+    """비교용 기존 행 단위 구현"""
+    expanded = []
+    for idx, row in df.iterrows():
+        raw_value = row[json_column]
+        if isinstance(raw_value, str):
+            try:
+                parsed = json.loads(raw_value)
+            except json.JSONDecodeError:
+                continue
+        elif isinstance(raw_value, list):
+            parsed = raw_value
+        else:
+            continue
+        if isinstance(parsed, list):
+            for item in parsed:
+                new_row = row.copy()
+                new_row["aspect"] = item.get("속성", None)
+                new_row["opinion"] = item.get("평가", None)
+                new_row["sentiment"] = item.get("감정", None)
+                expanded.append(new_row)
+    expanded_df = pd.DataFrame(expanded)
+    expanded_df.reset_index(drop=True, inplace=True)
+    expanded_df.ffill(inplace=True)
+    return expanded_df
+
+
+def make_synthetic_data(num_rows, num_products=5000, max_triplets=4, seed=42):
+    """review-ID, name, category, processed, unsloth_deepseek_32b 칼럼을 갖는 합성 데이터 생성"""
+    rng = np.random.default_rng(seed)
+    product_idx = rng.integers(0, num_products, size=num_rows)
+    num_triplets = rng.integers(0, max_triplets + 1, size=num_rows)
+    aspect_idx = rng.integers(0, len(ASPECTS), size=num_triplets.sum())
+    sentiment_idx = rng.integers(0, len(SENTIMENTS), size=num_triplets.sum())
+
+    json_values = []
+    offset = 0
+    for n in num_triplets:
+        triplets = [{"속성": ASPECTS[aspect_idx[offset + k]],
+                     "평가": f"평가 문구 {offset + k}",
+                     "감정": SENTIMENTS[sentiment_idx[offset + k]]} for k in range(n)]
+        json_values.append(json.dumps(triplets, ensure_ascii=False))
+        offset += n
+
+    return pd.DataFrame({
+        "review-ID": [f"emart-{p}-{i + 1}" for i, p in enumerate(product_idx)],
+        "name": [f"상품 {p}" for p in product_idx],
+        "category": np.where(product_idx % 2 == 0, "과자/빙과", "라면/간편식"),
+        "processed": [f"리뷰 본문 {i}" for i in range(num_rows)],
+        "unsloth_deepseek_32b": json_values,
+    })
+
+
+def time_call(func, *args):
+    start_time = time.time()
+    result = func(*args)
+    return result, time.time() - start_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="expand_inference_data 벤치마크")
+    parser.add_argument("--num_rows", type=int, default=1_000_000, help="합성 리뷰 행 수")
+    parser.add_argument("--legacy_rows", type=int, default=20_000,
+                        help="기존 구현과 비교할 행 수 (0이면 비교 생략)")
+    args = parser.parse_args()
+
+    print(f"합성 데이터 생성 중... ({args.num_rows:,}행)")
+    df = make_synthetic_data(args.num_rows)
+
+    expanded_df, elapsed = time_call(expand_inference_data, df, "unsloth_deepseek_32b")
+    print(f"[vectorized] {args.num_rows:,}행 -> {len(expanded_df):,} triplet, "
+          f"{elapsed:.2f}초 ({args.num_rows / elapsed:,.0f} rows/s)")
+
+    if args.legacy_rows:
+        sample_df = df.head(args.legacy_rows)
+        legacy_df, legacy_elapsed = time_call(legacy_expand_inference_data, sample_df, "unsloth_deepseek_32b")
+        new_df, new_elapsed = time_call(expand_inference_data, sample_df, "unsloth_deepseek_32b")
+        pd.testing.assert_frame_equal(legacy_df, new_df)
+        print(f"[legacy]     {len(sample_df):,}행: {legacy_elapsed:.2f}초")
+        print(f"[vectorized] {len(sample_df):,}행: {new_elapsed:.2f}초 "
+              f"(x{legacy_elapsed / max(new_elapsed, 1e-9):.1f}), 결과 동일")
+
+
+if __name__ == "__main__":
+    main()
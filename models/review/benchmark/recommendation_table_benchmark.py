@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+[generate_recommendations 벤치마크]
+- 합성 카테고리 opinion 데이터(기본 1M 행, 상품 20k개, 클러스터 500개)로 추천 테이블 생성 시간을 측정한다.
+- 기존 구현(상품마다 pd.concat, 상품명 전체 검색 2회)과 일부 행(--legacy_rows)에 대해 결과 동일성(행 순서 포함) 및 속도를 비교한다.
+
+실행 예시 (models/review 폴더에서):
+    python benchmark/recommendation_table_benchmark.py --num_rows 1000000 --legacy_rows 50000
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.review_pipeline.keyword_recommendation import generate_recommendations, extract_product_id, get_sorted_clusters
+
+
+def legacy_generate_recommendations(df, id_keyword_map, selected_clusters):
+    """비교용 기존 구현"""
+    result = pd.DataFrame(columns=["카테고리", "키워드", "ID", "상품명", "opinion 개수"])
+    for cluster in selected_clusters:
+        targets = df[df["cluster_label"] == cluster].value_counts(subset=["name"])
+        targets = targets[targets >= 5]
+        items = [item[0] for item in targets.keys().tolist()]
+        ids = [extract_product_id(df[df["name"] == name]["review-ID"].values[0]) for name in items]
+        categories = [df[df["name"] == name]["category"].values[0] for name in items]
+        keyword = id_keyword_map.get(cluster, "")
+        for item, count, pid, cat in zip(items, targets.tolist(), ids, categories):
+            temp_df = pd.DataFrame({
+                "카테고리": [cat],
+                "키워드": [keyword],
+                "ID": [pid],
+                "상품명": [item],
+                "opinion 개수": [count]
+            })
+            result = pd.concat([result, temp_df], ignore_index=True)
+    return result
+
+
+def make_synthetic_category(num_rows, num_products, num_clusters, seed=42):
+    """클러스터마다 일부 상품에 opinion이 몰리는 합성 카테고리 데이터"""
+    rng = np.random.default_rng(seed)
+    cluster_label = rng.zipf(1.3, size=num_rows) % num_clusters
+    # 클러스터별로 선호 상품이 다르도록 (클러스터 번호 기반 offset + zipf 분포)
+    product_idx = (cluster_label * 37 + rng.zipf(1.5, size=num_rows)) % num_products
+    review_no = rng.integers(0, 10000, size=num_rows)
+    return pd.DataFrame({
+        "review-ID": [f"emart-{p}-{r}" for p, r in zip(product_idx, review_no)],
+        "name": [f"상품{p}" for p in product_idx],
+        "category": "snacks",
+        "cluster_label": cluster_label,
+    })
+
+
+def normalize(df):
+    """비교를 위해 dtype 차이만 제거 (행 순서는 그대로 비교)"""
+    df = df.astype({"opinion 개수": int}).astype({column: str for column in ["카테고리", "키워드", "ID", "상품명"]})
+    return df.reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="generate_recommendations 벤치마크")
+    parser.add_argument("--num_rows", type=int, default=1000000)
+    parser.add_argument("--num_products", type=int, default=20000)
+    parser.add_argument("--num_clusters", type=int, default=500)
+    parser.add_argument("--legacy_rows", type=int, default=50000, help="기존 구현과 비교할 행 수 (0이면 비교 생략)")
+    args = parser.parse_args()
+
+    df = make_synthetic_category(args.num_rows, args.num_products, args.num_clusters)
+    id_keyword_map = {cluster: f"키워드{cluster}" for cluster in range(args.num_clusters)}
+    selected_clusters = get_sorted_clusters(df)["cluster_label"].tolist()
+
+    start_time = time.time()
+    result = generate_recommendations(df, id_keyword_map, selected_clusters)
+    elapsed = time.time() - start_time
+    print(f"[전체 {len(df)}행] generate_recommendations: {elapsed:.2f}초, 추천 {len(result)}행")
+
+    if args.legacy_rows:
+        sample = df.iloc[:args.legacy_rows]
+        sample_clusters = get_sorted_clusters(sample)["cluster_label"].tolist()
+        start_time = time.time()
+        new_result = generate_recommendations(sample, id_keyword_map, sample_clusters)
+        new_seconds = time.time() - start_time
+        start_time = time.time()
+        legacy_result = legacy_generate_recommendations(sample, id_keyword_map, sample_clusters)
+        legacy_seconds = time.time() - start_time
+        new_rows, legacy_rows = normalize(new_result), normalize(legacy_result)
+        same = new_rows.equals(legacy_rows)
+        moved = int((new_rows != legacy_rows).any(axis=1).sum()) if new_rows.shape == legacy_rows.shape else None
+        print(f"[비교 {len(sample)}행, 추천 {len(new_result)}행] 기존: {legacy_seconds:.2f}초, 집계: {new_seconds:.3f}초 "
+              f"(x{legacy_seconds / max(new_seconds, 1e-9):.0f}), 결과 동일(행 순서 포함): {same}, 위치가 다른 행: {moved}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+[차원 축소 방식 벤치마크]
+- umap / pca / random_projection 각각에 대해 다음 시간을 측정한다.
+    - fit: reducer를 새로 학습 (저장 포함)
+    - reuse: 저장된 reducer 파일로 같은 임베딩을 다시 축소 (두 번째 실행부터의 비용)
+    - transform: 저장된 reducer로 새 임베딩(--new_ratio 비율)을 transform
+- 축소 결과를 cluster_embeddings로 클러스터링하고, evaluate_clustering으로 원본 임베딩 공간에서
+  실루엣 점수 / Davies-Bouldin Index를 계산한다 (축소 공간마다 척도가 다르므로 원본 공간에서 비교).
+- 축소 공간의 거리 척도가 방식마다 다르므로 distance_threshold는 --distance_threshold umap=21.5 pca=... 형태로 방식별 지정 가능
+
+실행 예시 (models/review 폴더에서):
+    python benchmark/reduction_benchmark.py --embedding_file ./data/embedding_matrics/deepseek_inference_snacks.npy
+    python benchmark/reduction_benchmark.py --num_samples 5000 --distance_threshold umap=21.5 pca=60 random_projection=60
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_blobs
+from sklearn.metrics import adjusted_rand_score
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils.clustering import cluster_embeddings
+from utils.utils import REDUCTION_METHODS, reduce_embeddings, evaluate_clustering
+
+
+def parse_thresholds(values, methods):
+    """["21.5"] 또는 ["umap=21.5", "pca=60"] -> {method: threshold}"""
+    thresholds = {}
+    for value in values:
+        if "=" in value:
+            method, threshold = value.split("=", 1)
+            thresholds[method] = float(threshold)
+        else:
+            thresholds.update({method: float(value) for method in methods})
+    return {method: thresholds.get(method, 21.5) for method in methods}
+
+
+def load_embeddings(args):
+    """--embedding_file이 있으면 저장된 opinion 임베딩, 없으면 BGE-m3 차원의 합성 임베딩"""
+    if args.embedding_file:
+        emb = np.load(args.embedding_file).astype(np.float32)
+        print(f"임베딩 로드: {args.embedding_file} {emb.shape}")
+        return emb
+    emb, _ = make_blobs(n_samples=args.num_samples, n_features=args.dim, centers=args.num_topics, cluster_std=1.0,
+                        center_box=(-3.0, 3.0), random_state=42)
+    return emb.astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="차원 축소 방식 벤치마크")
+    parser.add_argument("--embedding_file", type=str, default=None, help="sentenceBERT_embeddings가 저장한 .npy 파일")
+    parser.add_argument("--num_samples", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--num_topics", type=int, default=50)
+    parser.add_argument("--n_components", type=int, default=256)
+    parser.add_argument("--methods", type=str, nargs="+", default=list(REDUCTION_METHODS))
+    parser.add_argument("--distance_threshold", type=str, nargs="+", default=["21.5"],
+                        help="공통 값 또는 method=값 (예: umap=21.5 pca=60)")
+    parser.add_argument("--clustering_method", type=str, default="ward")
+    parser.add_argument("--new_ratio", type=float, default=0.1, help="transform 시간 측정에 사용할 새 임베딩 비율")
+    parser.add_argument("--output_dir", type=str, default=None, help="reducer / 평가 결과 저장 폴더 (기본: 임시 폴더)")
+    args = parser.parse_args()
+
+    emb = load_embeddings(args)
+    thresholds = parse_thresholds(args.distance_threshold, args.methods)
+    num_new = max(1, int(len(emb) * args.new_ratio))
+    rng = np.random.default_rng(42)
+    new_emb = emb[rng.choice(len(emb), num_new, replace=False)] + rng.normal(0, 0.01, (num_new, emb.shape[1])).astype(np.float32)
+
+    output_dir = args.output_dir or tempfile.mkdtemp(prefix="reduction_benchmark_")
+    os.makedirs(output_dir, exist_ok=True)
+    config = {"paths": {"embedding_dir": output_dir}}
+
+    rows = []
+    labels = {}
+    for method in args.methods:
+        reducer_path = os.path.join(output_dir, f"benchmark_{method}_reducer.joblib")
+        if os.path.exists(reducer_path):
+            os.remove(reducer_path)
+
+        start_time = time.time()
+        reduced = reduce_embeddings(emb, method=method, n_components=args.n_components, reducer_path=reducer_path)
+        fit_seconds = time.time() - start_time
+
+        start_time = time.time()
+        reused = reduce_embeddings(emb, method=method, n_components=args.n_components, reducer_path=reducer_path)
+        reuse_seconds = time.time() - start_time
+        assert np.array_equal(reduced, reused)
+
+        start_time = time.time()
+        reduce_embeddings(new_emb, method=method, n_components=args.n_components, reducer_path=reducer_path)
+        transform_seconds = time.time() - start_time
+
+        start_time = time.time()
+        labels[method] = cluster_embeddings(reduced, method=args.clustering_method,
+                                            distance_threshold=thresholds[method])
+        cluster_seconds = time.time() - start_time
+        # 원본 임베딩 공간에서 평가 ({method}_clustering_evaluation.json으로 저장)
+        scores = evaluate_clustering(emb, labels[method], config, f"benchmark_{method}")
+        reference = args.methods[0]
+        rows.append({
+            "method": method,
+            "threshold": thresholds[method],
+            "fit_s": fit_seconds,
+            "reuse_s": reuse_seconds,
+            f"transform_{num_new}_s": transform_seconds,
+            "cluster_s": cluster_seconds,
+            "clusters": int(np.unique(labels[method]).shape[0]),
+            "Silhouette": scores["Silhouette"],
+            "DBI": scores["DBI"],
+            f"ARI_vs_{reference}": adjusted_rand_score(labels[reference], labels[method]),
+        })
+
+    print(f"\n=== 차원 축소 방식별 시간 / 클러스터 품질 ({len(emb)}건, {emb.shape[1]} -> {args.n_components}차원) ===")
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda value: f"{value:.3f}"))
+    print(f"reducer / 평가 결과 저장 폴더: {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
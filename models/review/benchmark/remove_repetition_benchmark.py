@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+[리뷰 전처리 반복 제거 처리량 벤치마크]
+- 리뷰 텍스트(크롤링 CSV의 review 칼럼, 없으면 합성 리뷰)에 대해 remove_repetition 방식을 비교한다.
+    - 기존: 모든 토큰마다 hannanum.pos 호출 후 반복 압축
+    - 빠른 경로: 토큰 전체가 반복 패턴일 때만 분석기 호출 + 단어별 LRU 캐시 (utils/text_repetition.py)
+    - 빠른 경로 + 프로세스 풀: --num_workers 프로세스 (워커마다 분석기 1개)
+- 세 방식의 결과 동일성, 분석기 호출 수, 처리량(리뷰/초)을 출력한다.
+- 부모 프로세스에서 분석기(JVM)를 만들기 전에 fork해야 하므로 프로세스 풀을 가장 먼저 측정한다.
+
+실행 예시 (models/review 폴더에서):
+    python benchmark/remove_repetition_benchmark.py --input_csv ./data/crawled_reviews/crawled_reviews_meal_kit.csv --num_workers 4
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import pandas as pd
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils.text_repetition import (get_hannanum, is_valid_word, remove_repetition,
+                                   make_repetition_executor, remove_repetition_batch)
+
+
+def legacy_remove_repetition(text, counter):
+    """비교용 기존 방식: 토큰마다 형태소 분석"""
+    def legacy_is_valid_word(word):
+        counter["calls"] += 1
+        pos_tags = get_hannanum().pos(word)
+        for token, pos in pos_tags:
+            if token == word:
+                return True
+        return False
+    def compress_token(token):
+        if legacy_is_valid_word(token):
+            return token
+        n = len(token)
+        for L in range(1, n // 2 + 1):
+            segment = token[:L]
+            if segment * (n // L) == token:
+                return segment
+        return token
+    def compress_token_list(tokens):
+        n = len(tokens)
+        for k in range(1, n // 2 + 1):
+            block = tokens[:k]
+            if block * (n // k) == tokens:
+                return block
+        return tokens
+    if not text or not isinstance(text, str):
+        return ""
+    tokens = text.split()
+    tokens = [compress_token(token) for token in tokens]
+    tokens = compress_token_list(tokens)
+    return " ".join(tokens).strip()
+
+
+def synthetic_reviews(num_reviews, seed=42):
+    """반복 표현이 일부 섞인 합성 리뷰"""
+    rng = random.Random(seed)
+    words = ["배송이", "빠르고", "맛있어요", "양도", "많아서", "좋네요", "포장이", "꼼꼼해요", "재구매", "의사",
+             "있습니다", "가격", "대비", "괜찮아요", "아이들이", "잘", "먹어요", "국물이", "진해요", "조금", "짜요"]
+    repeats = ["ㅋㅋㅋㅋ", "ㅎㅎㅎ", "맛있어요맛있어요", "최고최고", "굿굿굿", "강추강추"]
+    reviews = []
+    for _ in range(num_reviews):
+        tokens = rng.choices(words, k=rng.randint(5, 25))
+        if rng.random() < 0.3:
+            tokens.insert(rng.randrange(len(tokens) + 1), rng.choice(repeats))
+        reviews.append(" ".join(tokens))
+    return reviews
+
+
+def main():
+    parser = argparse.ArgumentParser(description="리뷰 전처리 반복 제거 처리량 벤치마크")
+    parser.add_argument("--input_csv", type=str, default=None, help="review 칼럼이 있는 CSV (없으면 합성 리뷰)")
+    parser.add_argument("--text_col", type=str, default="review")
+    parser.add_argument("--num_samples", type=int, default=5000)
+    parser.add_argument("--num_workers", type=int, default=4)
+    args = parser.parse_args()
+
+    if args.input_csv:
+        texts = pd.read_csv(args.input_csv)[args.text_col].fillna("").astype(str).head(args.num_samples).tolist()
+    else:
+        texts = synthetic_reviews(args.num_samples)
+    print(f"데이터: {args.input_csv or '합성 리뷰'} ({len(texts)}개 리뷰, 토큰 {sum(len(t.split()) for t in texts)}개)")
+
+    executor = make_repetition_executor(args.num_workers)
+    pool_seconds, pool_results = None, None
+    if executor is not None:
+        start_time = time.time()
+        pool_results = remove_repetition_batch(texts, executor)
+        pool_seconds = time.time() - start_time
+        executor.shutdown()
+
+    get_hannanum()  # 분석기(JVM) 초기화 시간은 두 방식 모두에서 제외
+    start_time = time.time()
+    fast_results = [remove_repetition(text) for text in texts]
+    fast_seconds = time.time() - start_time
+    cache_info = is_valid_word.cache_info()
+
+    counter = {"calls": 0}
+    start_time = time.time()
+    legacy_results = [legacy_remove_repetition(text, counter) for text in texts]
+    legacy_seconds = time.time() - start_time
+
+    print("\n=== 반복 제거 방식 비교 ===")
+    print(f"기존 (토큰마다 분석기 호출 {counter['calls']}회): {legacy_seconds:.2f}초 "
+          f"({len(texts) / max(legacy_seconds, 1e-9):.0f} 리뷰/초)")
+    print(f"빠른 경로 (분석기 호출 {cache_info.misses}회, 캐시 hit {cache_info.hits}회): {fast_seconds:.2f}초 "
+          f"({len(texts) / max(fast_seconds, 1e-9):.0f} 리뷰/초), 결과 동일: {fast_results == legacy_results}")
+    if pool_results is not None:
+        print(f"빠른 경로 + 프로세스 풀 ({args.num_workers}개, 분석기 초기화 포함): {pool_seconds:.2f}초 "
+              f"({len(texts) / max(pool_seconds, 1e-9):.0f} 리뷰/초), 결과 동일: {pool_results == legacy_results}")
+    print(f"속도 향상 (빠른 경로): x{legacy_seconds / max(fast_seconds, 1e-9):.1f}")
+
+
+if __name__ == "__main__":
+    main()
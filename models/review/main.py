@@ -8,7 +8,8 @@ import logging
 from src.review_pipeline import (
     aste_inference,
     review_summarization,
-    keyword_recommendation
+    keyword_recommendation,
+    visualization
 )
 from src.sft_pipeline import (  
     review_crawling,
@@ -47,6 +48,8 @@ def run_review_pipeline(config):
         review_summarization.run_review_summarization(config)
     if config["pipeline"]["review"].get("keyword_recommendation", False):
         keyword_recommendation.run_keyword_recommendation(config)
+    if config["pipeline"]["review"].get("visualization", False):
+        visualization.run_visualization(config)
     logging.info("리뷰 파이프라인 완료.")
 
 
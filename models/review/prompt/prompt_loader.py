@@ -1,6 +1,7 @@
 # prompt/prompt_loader.py
 import os
 import json
+import threading
 
 def load_prompt(prompt_filename: str, prompt_dir: str = "./prompt") -> str:
     """
@@ -19,3 +20,62 @@ def load_fewshot(fewshot_filename: str, prompt_dir: str = "./prompt") -> list:
     file_path = os.path.join(prompt_dir, fewshot_filename)
     with open(file_path, "r", encoding="utf-8") as f:
         return json.load(f)
+
+def build_message_prefix(prompt: str, fewshot: list) -> tuple:
+    """
+    system 프롬프트와 few-shot 예시로 user/assistant 메시지 prefix를 구성합니다.
+    few-shot의 query가 리스트면 공백으로 join 합니다.
+    """
+    messages = [{"role": "system", "content": prompt}]
+    for example in fewshot:
+        query_text = " ".join(example["query"]) if isinstance(example["query"], list) else example["query"]
+        messages.append({"role": "user", "content": query_text})
+        messages.append({"role": "assistant", "content": example["answer"]})
+    return tuple(messages)
+
+class PromptRegistry:
+    """
+    프로세스 전역 프롬프트 레지스트리.
+    - 프롬프트/few-shot 파일은 처음 요청될 때 한 번만 읽고, 파일의 mtime이 바뀐 경우에만 다시 읽습니다.
+    - (프롬프트, few-shot) 조합별 메시지 prefix를 미리 만들어 tuple로 캐시합니다.
+      반환된 prefix는 공유 객체이므로 수정하지 말고 `[*prefix, user_message]` 형태로 사용합니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._files = {}      # file_path -> (mtime, content)
+        self._prefixes = {}   # (prompt_path, fewshot_path) -> ((prompt_mtime, fewshot_mtime), prefix)
+
+    def _get_file(self, filename: str, prompt_dir: str, loader):
+        file_path = os.path.join(prompt_dir, filename)
+        mtime = os.path.getmtime(file_path)
+        with self._lock:
+            cached = self._files.get(file_path)
+            if cached is None or cached[0] != mtime:
+                cached = (mtime, loader(filename, prompt_dir))
+                self._files[file_path] = cached
+            return cached
+
+    def get_prompt(self, prompt_filename: str, prompt_dir: str = "./prompt") -> str:
+        return self._get_file(prompt_filename, prompt_dir, load_prompt)[1]
+
+    def get_fewshot(self, fewshot_filename: str, prompt_dir: str = "./prompt") -> list:
+        return self._get_file(fewshot_filename, prompt_dir, load_fewshot)[1]
+
+    def get_message_prefix(self, prompt_filename: str, fewshot_filename: str, prompt_dir: str = "./prompt") -> tuple:
+        """
+        system 프롬프트 + few-shot 메시지 prefix(tuple)를 반환합니다.
+        두 파일 중 하나라도 mtime이 바뀌면 prefix를 다시 만듭니다.
+        """
+        prompt_mtime, prompt = self._get_file(prompt_filename, prompt_dir, load_prompt)
+        fewshot_mtime, fewshot = self._get_file(fewshot_filename, prompt_dir, load_fewshot)
+        key = (os.path.join(prompt_dir, prompt_filename), os.path.join(prompt_dir, fewshot_filename))
+        with self._lock:
+            cached = self._prefixes.get(key)
+            if cached is None or cached[0] != (prompt_mtime, fewshot_mtime):
+                cached = ((prompt_mtime, fewshot_mtime), build_message_prefix(prompt, fewshot))
+                self._prefixes[key] = cached
+            return cached[1]
+
+# 프로세스 전역 레지스트리
+prompt_registry = PromptRegistry()
@@ -14,9 +14,13 @@ import time
 import requests
 import pandas as pd
 import numpy as np
-from dotenv import load_dotenv
-from utils.utils import load_data, expand_inference_data, sentenceBERT_embeddings, umap_reduce_embeddings, agglomerative_clustering, visualize_clustering, evaluate_clustering
-from prompt.prompt_loader import load_prompt, load_fewshot
+from utils.llm_cache import get_llm_cache
+from utils.clustering import cluster_embeddings
+from utils.cluster_state import opinion_keys, space_signature, load_cluster_state, save_cluster_state, incremental_cluster, build_cluster_state
+from utils.utils import load_data, expand_inference_data, sentenceBERT_embeddings, reduce_embeddings, visualize_clustering, evaluate_clustering, get_hcx_headers
+from prompt.prompt_loader import prompt_registry
+
+HCX_ENDPOINT = "https://clovastudio.stream.ntruss.com/testapp/v1/chat-completions/HCX-003"
 
 #########################################################
 # 데이터 전처리 및 확장 관련 함수
@@ -92,45 +96,53 @@ def hcx_generate_cluster_keywords(df, sorted_clusters, text_column="review", clu
         print("-" * 80)
     return id_keyword_map
 
-def generate_recommendations(df, id_keyword_map, selected_clusters):
+def generate_recommendations(df, id_keyword_map, selected_clusters, min_count=5):
     """
-    선택된 클러스터별로, 각 클러스터 내에서 최소 2회 이상 등장한 상품을 대상으로
+    선택된 클러스터별로, 각 클러스터 내에서 min_count회 이상 등장한 상품을 대상으로
     추천 상품 DataFrame을 생성한다.
+    (cluster_label, name) 단위 집계 한 번으로 opinion 개수를 구하고, 상품 ID와 카테고리는
+    상품별 첫 행(review-ID -> 상품 ID, category)에서 가져온 뒤 키워드를 결합한다.
+    클러스터 안의 상품 순서는 기존 value_counts와 같다 (상품명 순 집계를 opinion 개수 내림차순으로 정렬, 동률 순서 포함).
     최종 출력 열은:
       카테고리, 키워드, ID, 상품명, opinion 개수
     """
-    result = pd.DataFrame(columns=["카테고리", "키워드", "ID", "상품명", "opinion 개수"])
+    columns = ["카테고리", "키워드", "ID", "상품명", "opinion 개수"]
+    subset = df[df["cluster_label"].isin(selected_clusters)]
+    if subset.empty:
+        return pd.DataFrame(columns=columns)
+
+    # 클러스터별 상품명 빈도수 (min_count회 이상 등장한 경우만)
+    counts = subset.groupby(["cluster_label", "name"]).size()
+    cluster_counts = {cluster: group.droplevel(0) for cluster, group in counts.groupby(level=0)}
+    pieces = []
     for cluster in selected_clusters:
-        # 상품명별 빈도수 계산 (5회 이상 등장한 경우만)
-        targets = df[df["cluster_label"] == cluster].value_counts(subset=["name"])
-        targets = targets[targets >= 5]
-        items = [item[0] for item in targets.keys().tolist()]
-        # 각 상품의 review-ID에서 상품 ID 추출
-        ids = [extract_product_id(df[df["name"] == name]["review-ID"].values[0]) for name in items]
-        # 카테고리는 각 상품의 "category" 열의 첫 번째 값 사용
-        categories = [df[df["name"] == name]["category"].values[0] for name in items]
-        keyword = id_keyword_map.get(cluster, "")
-        for item, count, pid, cat in zip(items, targets.tolist(), ids, categories):
-            temp_df = pd.DataFrame({
-                "카테고리": [cat],
-                "키워드": [keyword],
-                "ID": [pid],
-                "상품명": [item],
-                "opinion 개수": [count]
-            })
-            result = pd.concat([result, temp_df], ignore_index=True)
-    return result
+        if cluster not in cluster_counts:
+            continue
+        targets = cluster_counts[cluster].sort_values(ascending=False)
+        targets = targets[targets >= min_count]
+        pieces.append(pd.DataFrame({"cluster_label": cluster, "name": targets.index, "opinion 개수": targets.values}))
+    if not pieces:
+        return pd.DataFrame(columns=columns)
+
+    # 상품별 첫 review-ID에서 상품 ID, 첫 category 값 추출
+    first_rows = df.drop_duplicates(subset="name")[["name", "review-ID", "category"]]
+    product_ids = first_rows["review-ID"].str.extract(r"^(emart-\d+)-\d+", expand=False)
+    first_rows = first_rows.assign(ID=product_ids.fillna(first_rows["review-ID"]))
+
+    result = pd.concat(pieces, ignore_index=True).merge(first_rows, on="name", how="left")
+    result["키워드"] = result["cluster_label"].map(id_keyword_map).fillna("")
+    result = result.rename(columns={"category": "카테고리", "name": "상품명"})
+    return result[columns].reset_index(drop=True)
 
-def get_prompt_and_fewshot():
+def get_message_prefix():
     """
-    aspect와 sentiment에 따른 프롬프트와 few-shot 예시를 반환한다.
-    프롬프트와 few-shot 예시는 prompt 폴더 내의 파일로 분리되어 관리된다.
+    추천 키워드 생성용 system 프롬프트 + few-shot 메시지 prefix를 반환한다.
+    프롬프트와 few-shot 예시는 prompt 폴더 내의 파일로 분리되어 관리되며,
+    prompt_registry가 한 번만 읽어 캐시한다 (파일 변경 시 재로드).
     """
-    prompt = load_prompt(prompt_filename="recommendation_prompt.txt",
-                            prompt_dir="./prompt/keyword_recommendation/")
-    fewshot = load_fewshot(fewshot_filename="recommendation_fewshot.json",
-                            prompt_dir="./prompt/keyword_recommendation/")
-    return prompt, fewshot
+    return prompt_registry.get_message_prefix(prompt_filename="recommendation_prompt.txt",
+                                              fewshot_filename="recommendation_fewshot.json",
+                                              prompt_dir="./prompt/keyword_recommendation/")
 
 def robust_inference(query, retry_delay=2):
     """
@@ -144,25 +156,8 @@ def robust_inference(query, retry_delay=2):
         time.sleep(retry_delay)
 
 def inference(query):
-    load_dotenv(os.path.expanduser("~/.env"))
-    AUTHORIZATION = os.getenv("AUTHORIZATION")
-    X_NCP_CLOVASTUDIO_REQUEST_ID = os.getenv("X_NCP_CLOVASTUDIO_REQUEST_ID")
-    if not AUTHORIZATION or not X_NCP_CLOVASTUDIO_REQUEST_ID:
-        raise ValueError("필수 API 인증 정보가 .env에 설정되어 있지 않습니다.")
-    headers = {
-        'Authorization': AUTHORIZATION,
-        'X-NCP-CLOVASTUDIO-REQUEST-ID': X_NCP_CLOVASTUDIO_REQUEST_ID,
-        'Content-Type': 'application/json; charset=utf-8',
-    }
-    prompt, fewshot = get_prompt_and_fewshot()
-
-    messages = [{"role": "system", "content": prompt}]
-    for example in fewshot:
-        # 만약 fewshot의 query가 리스트면 join
-        query_text = " ".join(example["query"]) if isinstance(example["query"], list) else example["query"]
-        messages.append({"role": "user", "content": query_text})
-        messages.append({"role": "assistant", "content": example["answer"]})
-    messages.append({"role": "user", "content": query})
+    headers = get_hcx_headers()
+    messages = [*get_message_prefix(), {"role": "user", "content": query}]
 
     request_data = {
         'messages': messages,
@@ -175,17 +170,25 @@ def inference(query):
         'includeAiFilters': False,
         'seed': 42
     }
-    try:
-        response = requests.post("https://clovastudio.stream.ntruss.com/testapp/v1/chat-completions/HCX-003", headers=headers, json=request_data)
-        response.raise_for_status()
-        response_json = response.json()
-        if response_json.get("status", {}).get("code") == "20000":
-            output_text = response_json["result"]["message"]["content"]
-            return output_text
-        else:
-            return f"API Error: {response_json.get('status', {}).get('message')}"
-    except requests.exceptions.RequestException as e:
-        return f"Request Error: {e}"
+    def call_api():
+        try:
+            response = requests.post(HCX_ENDPOINT, headers=headers, json=request_data)
+            response.raise_for_status()
+            response_json = response.json()
+            if response_json.get("status", {}).get("code") == "20000":
+                output_text = response_json["result"]["message"]["content"]
+                return output_text
+            else:
+                return f"API Error: {response_json.get('status', {}).get('message')}"
+        except requests.exceptions.RequestException as e:
+            return f"Request Error: {e}"
+
+    # 동일한 요청(프롬프트, few-shot, 샘플링 파라미터, 쿼리)은 LLM 캐시에서 재사용
+    return get_llm_cache().get_or_call(
+        stage="keyword_recommendation", endpoint=HCX_ENDPOINT, model="HCX-003",
+        payload=request_data, call_fn=call_api,
+        is_valid=lambda result: not (result.startswith("API Error") or result.startswith("Request Error"))
+    )
 
 #########################################################
 # 최종 추천 파이프라인 실행 함수
@@ -212,6 +215,8 @@ def run_keyword_recommendation(config):
     category_dfs = {category: df for category, df in infer_pos.groupby("category")}
 
     all_recommendations = []  # 전체 카테고리의 추천 결과를 저장할 리스트
+    keyword_config = config.get("keyword_recommendation", {})
+    incremental_config = keyword_config.get("incremental", {})
     
     # 각 카테고리별로 전체 파이프라인 실행
     for category, df_cat in category_dfs.items():
@@ -219,18 +224,38 @@ def run_keyword_recommendation(config):
         
         # 1) 임베딩 매트릭스 생성
         embedding_file = os.path.join(config["paths"]["embedding_dir"], f"deepseek_inference_{category}.npy")
-        embedding_matrix = sentenceBERT_embeddings(embedding_file, df=df_cat, column="opinion")
+        embedding_matrix = sentenceBERT_embeddings(embedding_file, df=df_cat, column="opinion", **config.get("embedding", {}))
         
-        # 2) UMAP 차원 축소
-        reduced_embeddings = umap_reduce_embeddings(embedding_matrix, n_components=256)
+        # 2) 차원 축소 (config의 reduction.method: umap / pca / random_projection, 학습한 reducer는 저장 후 재사용)
+        reduction = keyword_config.get("reduction", {})
+        reducer_path = os.path.join(config["paths"]["embedding_dir"], f"{category}_{reduction.get('method', 'umap')}_reducer.joblib")
+        reduced_embeddings = reduce_embeddings(embedding_matrix, reducer_path=reducer_path, **reduction)
         
-        # 3) 클러스터링 (Agglomerative Clustering 사용, 임계값 조정)
-        cluster_labels = agglomerative_clustering(reduced_embeddings, distance_threshold=21.5)
+        # 3) 클러스터링 (config의 clustering.method: ward / minibatch_ward / knn_ward, 임계값 조정)
+        #    증분 모드: 이전 실행의 centroid에 새 opinion을 배정하고 남은 opinion만 클러스터링
+        clustering_config = keyword_config.get("clustering", {})
+        if incremental_config.get("enabled", False):
+            state_path = os.path.join(config["paths"]["embedding_dir"], f"{category}_cluster_state.joblib")
+            signature = space_signature(config.get("embedding", {}), reduction, reducer_path, reduced_embeddings.shape[1])
+            keys = opinion_keys(df_cat)
+            previous_state = load_cluster_state(state_path, signature)
+            cluster_labels, new_clusters = incremental_cluster(reduced_embeddings, keys, previous_state, clustering_config,
+                                                               assign_radius=incremental_config.get("assign_radius"))
+        else:
+            cluster_labels = cluster_embeddings(reduced_embeddings, **clustering_config)
         df_cat['cluster_label'] = cluster_labels
                 
-        # 4) 클러스터별 정렬 및 키워드 생성
+        # 4) 클러스터별 정렬 및 키워드 생성 (증분 모드에서는 새 클러스터만 HCX 호출)
         sorted_clusters = get_sorted_clusters(df_cat, cluster_column="cluster_label")
-        id_keyword_map = hcx_generate_cluster_keywords(df_cat, sorted_clusters, text_column="review", cluster_column="cluster_label")
+        if incremental_config.get("enabled", False):
+            id_keyword_map = dict(previous_state["keywords"]) if previous_state else {}
+            new_sorted_clusters = sorted_clusters[sorted_clusters["cluster_label"].isin(new_clusters)]
+            print(f"기존 클러스터 키워드 재사용: {len(id_keyword_map)}개, 새 클러스터 키워드 생성: {len(new_sorted_clusters)}개")
+            id_keyword_map.update(hcx_generate_cluster_keywords(df_cat, new_sorted_clusters, text_column="review", cluster_column="cluster_label"))
+            save_cluster_state(state_path, build_cluster_state(reduced_embeddings, keys, cluster_labels, id_keyword_map,
+                                                               signature, previous_state))
+        else:
+            id_keyword_map = hcx_generate_cluster_keywords(df_cat, sorted_clusters, text_column="review", cluster_column="cluster_label")
         
         # 5) 추천 대상 클러스터 선택 (모든 클러스터 사용)
         selected_clusters = sorted_clusters["cluster_label"].tolist()
@@ -247,7 +272,8 @@ def run_keyword_recommendation(config):
         
         all_recommendations.append(recommendation_df)
         print(f"\n[카테고리: {category} 처리 완료]\n")
-        
+
+    get_llm_cache().report("keyword_recommendation")
     return all_recommendations
 
 if __name__ == "__main__":
@@ -2,11 +2,13 @@ import time
 import torch
 import numpy as np
 import pandas as pd
-from tqdm import tqdm
 from ast import literal_eval
 from transformers import AutoTokenizer, AutoModelForCausalLM, BitsAndBytesConfig
 
 from utils.evaluate import evaluate_aste
+from utils.batch_generation import run_batched_generation
+from utils.generation_control import make_generation_controls, load_generation_config
+from utils.prefix_cache import template_prefix
 
 
 PROMPT = """당신은 식품 리뷰의 감성 분석 및 평가 전문가입니다. 주어진 식품 리뷰를 분석하여 해당 리뷰에서 속성과 평가, 감성을 추출하세요.
@@ -51,11 +53,28 @@ def prepare_data(path):
     data_df = pd.read_csv(path)
     return data_df
 
-def extract_aste(model_size, quant_type, data_df, col_name):
+def parse_aste_output(response):
+    """
+    </think> 이후 ```json 코드 블록의 triplet 리스트를 문자열로 반환 (실패 시 None)
+    조기 종료(early_stop)로 닫는 ``` 없이 배열에서 끝난 응답도 처리한다.
+    """
+    try:
+        return str(literal_eval(response.split("</think>")[1].split("```json")[1].split("```")[0]))
+    except Exception:
+        return None
+
+def extract_aste(model_size, quant_type, data_df, col_name, batch_size=8, max_attempts=20, constrained=False,
+                 prefix_cache=False, max_new_tokens=512, thinking_budget=None, early_stop=False):
     """
     model_size: 14 or 8
     quant_type: 8 or 4
     data_df: DataFrame
+    batch_size: 토큰 길이가 비슷한 리뷰끼리 묶어 생성할 배치 크기
+    constrained: True이면 </think> 이후 답변을 ASTE JSON 스키마로 제약 (파싱 실패 재시도 방지)
+    prefix_cache: True이면 PROMPT의 고정 prefix KV 캐시를 재사용 (리뷰별 suffix만 prefill)
+    thinking_budget: 추론(<think>) 토큰 상한. 도달하면 </think>와 답변 시작을 강제 (None이면 제한 없음)
+    early_stop: True이면 </think> 이후 JSON 배열이 닫히는 즉시 해당 리뷰의 생성을 종료
+    반환: 파싱 실패 후 재시도한 총 횟수
     """
 
     # model_name = f"deepseek-ai/DeepSeek-R1-Distill-Qwen-{model_size}B"
@@ -80,44 +99,31 @@ def extract_aste(model_size, quant_type, data_df, col_name):
         device_map="auto"
     )
 
-    total_time = 0
-    for idx, row in tqdm(data_df[pd.isna(data_df[col_name])].iterrows()):
-        txt = row["processed"]
-        # answer = row["aste_golden_label"]
-
-        input_text = PROMPT.format(review=txt)
-        print(row["review-ID"], txt)
-
-        start_time = time.time()
-        inputs = tokenizer(input_text, return_tensors="pt").to("cuda")
-        output = model.generate(**inputs,
-                                max_new_tokens=512,
-                                temperature=0.6,
-                                top_p=0.95,
-                                do_sample=True)
-        output = tokenizer.decode(output[0])
-
-        try:
-            aste = str(literal_eval(output.split("</think>")[1].split("```json")[1].split("```<")[0]))
-            # thinking = output.split("<think>")[1].split("</think>")[0]
-        except Exception as e:
-            aste = np.nan
-            # thinking = output.split("<think>")[1]
-        
-        spent = time.time() - start_time
-
-        # print(f"\nreasoning: \n{thinking}")
-        print(f"\naste: {aste}")
-        # print(f"\nanswer: {answer}")
-        print(f"\n{spent}")
-        print("\n=============================================================\n")
-
-        total_time += spent
-        data_df.loc[idx, col_name] = aste
-        # data_df.loc[idx, "thinking"] = thinking
-    
+    target_df = data_df[pd.isna(data_df[col_name])]
+    prompts = [PROMPT.format(review=txt) for txt in target_df["processed"]]
+
+    logits_processor_factory, stopping_criteria_factory = make_generation_controls(
+        tokenizer, max_new_tokens=max_new_tokens, thinking_budget=thinking_budget,
+        early_stop=early_stop, constrained=constrained
+    )
+
+    prefix_text = template_prefix(lambda review: PROMPT.format(review=review)) if prefix_cache else None
+
+    start_time = time.time()
+    results, failure_counts, _ = run_batched_generation(
+        prompts, model, tokenizer, parse_fn=parse_aste_output,
+        batch_size=batch_size, max_new_tokens=max_new_tokens, max_attempts=max_attempts,
+        add_special_tokens=True,
+        logits_processor_factory=logits_processor_factory,
+        stopping_criteria_factory=stopping_criteria_factory, prefix_text=prefix_text,
+        temperature=0.6, top_p=0.95, do_sample=True
+    )
+    total_time = time.time() - start_time
+
+    data_df.loc[target_df.index, col_name] = [np.nan if aste is None else aste for aste in results]
     data_df.to_csv("./data/aste/inference/deepseek_14b_inference.csv", index=False)
-    print(f"total time: {total_time / len(data_df)}")
+    print(f"total time: {total_time / max(len(target_df), 1)}")
+    return sum(failure_counts)
 
 
 if __name__ == "__main__":
@@ -127,18 +133,15 @@ if __name__ == "__main__":
 
     data_df = prepare_data(data_path)
     data_df[col_name] = None
+    # 배치 크기, 추론 토큰 예산, 조기 종료 등은 config.yaml의 aste_inference.deepseek_14b 설정 사용
+    generation_config = load_generation_config("deepseek_14b")
 
     start_time = time.time()
-    extract_aste(14, 4, data_df, col_name)
-    first_lap = time.time() - start_time
-    
-    num_null = 0
-    while data_df[col_name].isna().sum() > 0:
-        num_null += data_df[col_name].isna().sum()
-        extract_aste(14, 4, data_df, col_name)
+    # 파싱 실패한 리뷰는 extract_aste 내부에서 실패한 것만 다시 배치로 묶어 재시도
+    num_null = extract_aste(14, 4, data_df, col_name, **generation_config)
     end_time = time.time() - start_time
 
-    print(f"\n한 바퀴: {first_lap}초, 총: {end_time}초, 평균: {end_time / 100}초")
+    print(f"\n총: {end_time}초, 평균: {end_time / len(data_df)}초")
     print(f"총 {num_null}개의 추론 실패 후 재시도")
 
     print("\n=== Start Evaluation ===\n")
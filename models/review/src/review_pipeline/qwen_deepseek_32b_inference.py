@@ -1,12 +1,14 @@
 import argparse
 import pandas as pd
 import time
-import re
 import json
-from tqdm import tqdm
 
 from unsloth import FastLanguageModel
 from utils.evaluate import evaluate_aste  # 평가 함수 임포트 (경로에 맞게 수정)
+from utils.batch_generation import run_batched_generation
+from utils.generation_control import make_generation_controls, load_generation_config
+from utils.prefix_cache import template_prefix
+from utils.shard_journal import init_job, iter_pending_shards, load_results, report_progress
 
 
 def load_model():
@@ -103,20 +105,23 @@ PROMPT_TEMPLATE = """당신은 식품 리뷰의 감성 분석 및 평가 전문
 """
 
 
+def build_prompt(review_text: str, tokenizer) -> str:
+    """리뷰에 프롬프트 템플릿과 채팅 템플릿을 적용한 모델 입력 문자열을 반환합니다."""
+    messages = [{"role": "user", "content": PROMPT_TEMPLATE.format(review=review_text)}]
+    return tokenizer.apply_chat_template(
+        messages,
+        tokenize=False,
+        add_generation_prompt=True
+    )
+
 def inference(review_text: str, model, tokenizer):
     """
     입력 리뷰에 대해 모델을 통한 추론을 수행합니다.
     반환: chain-of-thought(cot)와 실제 답변(ans)
     """
-    messages = [{"role": "user", "content": PROMPT_TEMPLATE.format(review=review_text)}]
-    print("입력 메시지:", messages)
-
+    print("입력 리뷰:", review_text)
     # 채팅 템플릿 적용 (문자열 생성)
-    formatted_text = tokenizer.apply_chat_template(
-        messages,
-        tokenize=False,
-        add_generation_prompt=True
-    )
+    formatted_text = build_prompt(review_text, tokenizer)
 
     model_inputs = tokenizer([formatted_text], return_tensors="pt").to(model.device)
     generated_ids = model.generate(
@@ -139,10 +144,10 @@ def inference(review_text: str, model, tokenizer):
 def post_process_answer(answer: str):
     """
     모델의 답변에서 JSON 코드 블록을 추출하고 파싱합니다.
+    조기 종료(early_stop)나 제약 디코딩으로 닫는 ``` 없이 배열에서 끝난 답변도 처리합니다.
     """
-    match = re.search(r"```json\s*(.*?)\s*```", answer, re.DOTALL)
-    if match:
-        json_str = match.group(1)
+    if "```json" in answer:
+        json_str = answer.split("```json", 1)[1].split("```")[0].strip()
     else:
         json_str = answer  # 코드 블록이 없으면 전체 텍스트 사용
 
@@ -153,49 +158,85 @@ def post_process_answer(answer: str):
         data = None
     return data
 
-def run_inference_on_dataframe(df: pd.DataFrame, model, tokenizer, num_samples: int = None) -> pd.DataFrame:
+def parse_response(response: str):
+    """생성 결과에서 </think> 이후의 답변만 JSON으로 파싱합니다 (실패 시 None)."""
+    return post_process_answer(response.split("</think>")[-1].strip())
+
+def run_inference_on_dataframe(df: pd.DataFrame, model, tokenizer, num_samples: int = None,
+                               batch_size: int = 8, max_attempts: int = 20,
+                               constrained: bool = False, prefix_cache: bool = False, max_new_tokens: int = 512,
+                               thinking_budget: int = None, early_stop: bool = False,
+                               on_result=None) -> pd.DataFrame:
     """
-    DataFrame의 각 리뷰에 대해 모델 추론을 수행하고, 결과 및 소요 시간을 기록합니다.
-    JSON 파싱에 실패한 경우 최대 20회까지 재시도하며, 각 리뷰별 실패 횟수를 failure_counts 리스트에 저장합니다.
+    DataFrame의 리뷰를 토큰 길이 순 배치로 묶어 모델 추론을 수행하고, 결과 및 처리량을 기록합니다.
+    JSON 파싱에 실패한 리뷰만 다시 배치로 묶어 최대 max_attempts회까지 시도하며,
+    각 리뷰별 실패 횟수를 failure_counts 리스트에 저장합니다.
+    constrained=True이면 </think> 이후 답변을 ASTE JSON 스키마로 제약하여 한 번에 파싱 가능한 결과를 생성합니다.
+    prefix_cache=True이면 PROMPT_TEMPLATE의 고정 prefix(지시문 + 예시)를 한 번만 prefill하여 재사용합니다.
+    thinking_budget이 주어지면 추론 토큰이 예산에 도달한 리뷰에 </think>와 답변 시작을 강제하고,
+    early_stop=True이면 </think> 이후 JSON 배열이 닫히는 즉시 해당 리뷰의 생성을 종료합니다.
+    on_result가 주어지면 리뷰 결과가 확정될 때마다 on_result(행 위치, JSON 문자열)를 호출합니다
+    (최대 시도 후에도 파싱에 실패한 리뷰는 None).
     """
-    times = []
-    failure_counts = []  # 각 리뷰별 재시도(실패) 횟수를 저장할 리스트
     if num_samples is not None:
         df = df.head(num_samples)
-    
-    for idx, row in tqdm(df.iterrows(), total=df.shape[0], desc="Inference"):
-        review_text = row["processed"]
-        start_time = time.time()
-        attempts = 0  # 재시도 횟수 (성공 시 0이면 최초 시도에 성공한 것)
-        ans_json = None
-        
-        # 최대 20회 시도 (최초 시도 포함하여 최대 20번)
-        while attempts < 20:
-            cot, ans = inference(review_text, model, tokenizer)
-            ans_json = post_process_answer(ans)
-            print(ans_json)
-            if ans_json is not None:
-                break
-            attempts += 1
-            print(f"JSON 추출 실패, 재시도 {attempts}회")
-        
-        if ans_json is None:
-            print("최대 재시도 횟수(20회)를 초과했습니다. 결과를 None으로 저장합니다.")
-        elapsed = time.time() - start_time
-        times.append(elapsed)
-        failure_counts.append(attempts)
-        print(f"처리 시간: {elapsed:.2f}초, 실패 횟수: {attempts}")
-        print("\n" + "=" * 60 + "\n")
-        
-        # 결과를 새로운 컬럼에 저장 (JSON 문자열로)
-        df.loc[idx, "unsloth_deepseek_32b"] = json.dumps(ans_json, ensure_ascii=False)
-    
-    print("전체 처리 시간 리스트:", times)
-    if times:
-        print("평균 처리 시간: {:.2f}초".format(sum(times) / len(times)))
+    df = df.copy()
+
+    prompts = [build_prompt(review_text, tokenizer) for review_text in df["processed"]]
+    logits_processor_factory, stopping_criteria_factory = make_generation_controls(
+        tokenizer, max_new_tokens=max_new_tokens, thinking_budget=thinking_budget,
+        early_stop=early_stop, constrained=constrained
+    )
+
+    prefix_text = template_prefix(lambda review_text: build_prompt(review_text, tokenizer)) if prefix_cache else None
+
+    record_result = None
+    if on_result is not None:
+        def record_result(idx, ans_json):
+            on_result(idx, None if ans_json is None else json.dumps(ans_json, ensure_ascii=False))
+
+    start_time = time.time()
+    results, failure_counts, _ = run_batched_generation(
+        prompts, model, tokenizer, parse_fn=parse_response,
+        batch_size=batch_size, max_new_tokens=max_new_tokens, max_attempts=max_attempts,
+        logits_processor_factory=logits_processor_factory,
+        stopping_criteria_factory=stopping_criteria_factory, prefix_text=prefix_text,
+        on_result=record_result
+    )
+    elapsed = time.time() - start_time
+
+    # 결과를 새로운 컬럼에 저장 (JSON 문자열로)
+    df["unsloth_deepseek_32b"] = [json.dumps(ans_json, ensure_ascii=False) for ans_json in results]
+
+    if len(df):
+        print("전체 처리 시간: {:.2f}초, 평균 처리 시간: {:.2f}초".format(elapsed, elapsed / len(df)))
     print("각 리뷰별 재시도 실패 횟수:", failure_counts)
     return df
 
+def run_sharded_inference(df: pd.DataFrame, model, tokenizer, job_dir: str, num_shards: int = 64,
+                          **generation_config):
+    """
+    review-ID 해시로 나눈 샤드를 점유하며 추론하고, 리뷰 결과를 샤드 journal(job_dir)에 완료 즉시 기록합니다.
+    재시작하거나 여러 워커가 같은 job_dir을 사용하면 journal에 기록된 리뷰는 건너뜁니다.
+    최대 시도 후에도 실패한 리뷰는 실패로 기록되어 재시작 시 다시 처리합니다.
+    반환: (journal 결과를 합친 DataFrame, report_progress 결과 {"total", "done", "remaining", "failed"})
+    """
+    init_job(job_dir, num_shards)
+    review_ids = df["review-ID"].astype(str)
+    for shard, remaining, journal in iter_pending_shards(job_dir, review_ids, num_shards):
+        shard_df = df[review_ids.isin(remaining)].drop_duplicates("review-ID")
+        shard_review_ids = shard_df["review-ID"].astype(str).tolist()
+        print(f"[샤드 {shard}] 남은 리뷰 {len(shard_df)}건 처리")
+        with journal:
+            run_inference_on_dataframe(shard_df, model, tokenizer,
+                                       on_result=lambda idx, ans: journal.append(shard_review_ids[idx], ans),
+                                       **generation_config)
+
+    progress = report_progress(job_dir, review_ids, num_shards)
+    df = df.copy()
+    df["unsloth_deepseek_32b"] = review_ids.map(load_results(job_dir, num_shards))
+    return df, progress
+
 def main():
     parser = argparse.ArgumentParser(description="aste 모델 추론 및 평가 스크립트")
     parser.add_argument("--input_csv", type=str, required=True,
@@ -204,10 +245,38 @@ def main():
                         help="출력 CSV 파일 경로 (저장할 경우)")
     parser.add_argument("--num_samples", type=int, default=None,
                         help="추론할 샘플 개수 (ID 필터링 후 지정 가능)")
+    parser.add_argument("--config", type=str, default="config/config.yaml",
+                        help="설정 파일 경로 (aste_inference.deepseek_32b 설정 사용)")
+    parser.add_argument("--batch_size", type=int, default=None,
+                        help="배치 크기 (토큰 길이가 비슷한 리뷰끼리 묶어 생성, 기본값: config)")
+    parser.add_argument("--thinking_budget", type=int, default=None,
+                        help="추론(<think>) 토큰 상한. 도달하면 </think>와 답변 시작을 강제 (기본값: config, 0이면 제한 없음)")
+    parser.add_argument("--early_stop", action=argparse.BooleanOptionalAction, default=None,
+                        help="</think> 이후 JSON 배열이 닫히면 생성 종료 (기본값: config)")
+    parser.add_argument("--constrained", action="store_true",
+                        help="</think> 이후 답변을 ASTE JSON 스키마로 제약하여 생성 (파싱 실패 재시도 방지)")
+    parser.add_argument("--prefix_cache", action="store_true",
+                        help="프롬프트 템플릿의 고정 prefix KV 캐시를 재사용 (리뷰별 suffix만 prefill)")
+    parser.add_argument("--job_dir", type=str, default=None,
+                        help="샤드 journal 폴더. 지정하면 리뷰 결과를 완료 즉시 기록하고 재시작 시 완료된 리뷰는 건너뜀 "
+                             "(같은 폴더로 여러 워커 실행 가능)")
+    parser.add_argument("--num_shards", type=int, default=64,
+                        help="review-ID 해시 기준 샤드 수 (같은 job_dir에서는 변경 불가)")
     parser.add_argument("--selected_review_ids", type=str, nargs="*", default=None,
                         help="평가할 특정 review-ID 목록 (예: emart-118 emart-50 ...)")
     args = parser.parse_args()
 
+    # CLI 인자가 주어지면 config 값보다 우선
+    generation_config = load_generation_config("deepseek_32b", args.config)
+    for key in ("batch_size", "thinking_budget", "early_stop"):
+        if getattr(args, key) is not None:
+            generation_config[key] = getattr(args, key)
+    generation_config["constrained"] = args.constrained or generation_config.get("constrained", False)
+    generation_config["prefix_cache"] = args.prefix_cache or generation_config.get("prefix_cache", False)
+    if not generation_config.get("thinking_budget"):
+        generation_config["thinking_budget"] = None
+    print("생성 설정:", generation_config)
+
     model, tokenizer = load_model()
 
     df = pd.read_csv(args.input_csv)
@@ -225,7 +294,14 @@ def main():
     
     print("최종 데이터 수:", len(df))
 
-    df = run_inference_on_dataframe(df, model, tokenizer, num_samples=args.num_samples)
+    if args.job_dir:
+        df, progress = run_sharded_inference(df, model, tokenizer, args.job_dir, args.num_shards, **generation_config)
+        if progress["remaining"] > 0:
+            print(f"남은 리뷰 {progress['remaining']}건 (파싱 실패 {progress['failed']}건, 나머지는 다른 워커가 처리 중)이 있어 "
+                  "평가/저장을 건너뜁니다. 같은 --job_dir로 다시 실행하면 남은 리뷰만 처리합니다.")
+            return
+    else:
+        df = run_inference_on_dataframe(df, model, tokenizer, num_samples=args.num_samples, **generation_config)
 
     evaluate_aste(
         df.head(args.num_samples),
@@ -7,53 +7,57 @@
     2. "배송"과 "포장"을 통합한 "배송 및 포장"
 - 각 상품의 원본 리뷰를 활용하여 각 aspect별 긍정/부정 핵심 포인트를 요약하고,
   각 aspect별 고유 리뷰 개수를 산출하여 최종 CSV 파일로 저장한다.
+- multi_aspect 모드에서는 상품마다 모든 aspect/sentiment를 한 번의 HCX 요청으로 요약(JSON 응답)하며,
+  aspect 그룹은 config의 review_summarization.aspect_groups로 자유롭게 지정할 수 있다.
+- 증분 모드에서는 상품 x aspect/sentiment bucket별 fingerprint(리뷰 집합 + 요약 mode, 샘플링 설정, 프롬프트 내용)를 저장하고,
+  다음 실행에서 리뷰나 요청 설정이 바뀐 bucket만 다시 요약하여 기존 CSV에 병합한다.
 """
 
 import os
 import sys
 import time
 import json
+import hashlib
 import requests
+import numpy as np
 import pandas as pd
-from dotenv import load_dotenv
-from prompt.prompt_loader import load_prompt, load_fewshot
-import re
+from prompt.prompt_loader import prompt_registry
+from utils.llm_cache import get_llm_cache
+from utils.utils import expand_inference_data, get_hcx_headers
+from utils.scheduler import run_prioritized_jobs
+from utils.review_sampler import embed_reviews, mmr_sample, estimate_sample_tokens, report_token_savings
+
+HCX_ENDPOINT = "https://clovastudio.stream.ntruss.com/testapp/v1/chat-completions/HCX-003"
+SENTIMENT_POSITIVE = "긍정"
+SENTIMENT_NEGATIVE = "부정"
+# 요약 aspect 그룹: 출력 aspect명 -> 포함되는 ASTE 속성 값
+ASPECT_GROUPS = {
+    "맛": ["맛"],
+    "배송 및 포장": ["배송", "포장"],
+}
+SUMMARY_MODE_PER_BUCKET = "per_bucket"      # 상품 x aspect x sentiment마다 HCX 1회 요청
+SUMMARY_MODE_MULTI_ASPECT = "multi_aspect"  # 상품마다 HCX 1회 요청 (JSON으로 모든 aspect/sentiment 요약)
+MAX_SAMPLE_REVIEWS = 20
+SAMPLING_METHOD_FIRST = "first"  # 고유 리뷰 앞 MAX_SAMPLE_REVIEWS개
+SAMPLING_METHOD_MMR = "mmr"      # BGE-m3 임베딩 MMR + 토큰 예산
+
+def make_summary_keys(aspect_groups: dict) -> list:
+    """aspect 그룹별 "<aspect>-긍정", "<aspect>-부정" 요약 키 리스트를 만든다."""
+    return [f"{aspect}-{sentiment}" for aspect in aspect_groups
+            for sentiment in (SENTIMENT_POSITIVE, SENTIMENT_NEGATIVE)]
+
+def split_summary_key(key: str) -> tuple:
+    """요약 키 "<aspect>-<sentiment>"를 (aspect, sentiment)로 분리한다."""
+    aspect, sentiment = key.rsplit("-", 1)
+    return aspect, sentiment
+
+SUMMARY_KEYS = make_summary_keys(ASPECT_GROUPS)
 
 def load_data(file_path):
     df = pd.read_csv(file_path)
     print("데이터 로드:", file_path)
     return df
 
-def expand_inference_data(df, json_column="unsloth_deepseek_32b"):
-    expanded = []
-    for idx, row in df.iterrows():
-        raw_value = row[json_column]
-
-        # 만약 raw_value가 문자열이면 json.loads()를 사용, 이미 리스트면 그대로 사용
-        if isinstance(raw_value, str):
-            try:
-                parsed = json.loads(raw_value)
-            except json.JSONDecodeError:
-                print(f"JSON 파싱 에러, review-ID: {row.get('review-ID', 'N/A')}")
-                continue
-        elif isinstance(raw_value, list):
-            parsed = raw_value
-        else:
-            # 그 외 타입인 경우 무시
-            continue
-
-        if isinstance(parsed, list):
-            for item in parsed:
-                new_row = row.copy()
-                new_row["aspect"] = item.get("속성", None)
-                new_row["opinion"] = item.get("평가", None)
-                new_row["sentiment"] = item.get("감정", None)
-                expanded.append(new_row)
-    expanded_df = pd.DataFrame(expanded)
-    expanded_df.reset_index(drop=True, inplace=True)
-    expanded_df.ffill(inplace=True)
-    return expanded_df
-
 def filter_invalid_value(raw_value):
     """
     unsloth_deepseek_32b 칼럼의 한 값을 전달받아,
@@ -86,152 +90,238 @@ def load_and_prepare_data(config):
     # print(f"필터링 후 리뷰 데이터: {aste_df.shape[0]}")
     return aste_df
 
-def get_prompt_and_fewshot(aspect: str, sentiment: str):
+def get_message_prefix(aspect: str, sentiment: str) -> tuple:
     """
-    aspect와 sentiment에 따른 프롬프트와 few-shot 예시를 반환한다.
-    프롬프트와 few-shot 예시는 prompt 폴더 내의 파일로 분리되어 관리된다.
+    aspect와 sentiment에 따른 system 프롬프트 + few-shot 메시지 prefix를 반환한다.
+    프롬프트와 few-shot 예시는 prompt 폴더 내의 파일로 분리되어 관리되며,
+    prompt_registry가 한 번만 읽어 캐시한다 (파일 변경 시 재로드).
     """
     if sentiment == "긍정":
-        prompt = load_prompt(prompt_filename="positive_prompt.txt",
-                             prompt_dir="./prompt/review_summarization/")
-        fewshot = load_fewshot(fewshot_filename="positive_fewshot.json",
-                             prompt_dir="./prompt/review_summarization/")
-    else:
-        prompt = load_prompt(prompt_filename="negative_prompt.txt",
-                             prompt_dir="./prompt/review_summarization/")
-        fewshot = load_fewshot(fewshot_filename="negative_fewshot.json",
-                             prompt_dir="./prompt/review_summarization/")
-    return prompt, fewshot
+        return prompt_registry.get_message_prefix(prompt_filename="positive_prompt.txt",
+                                                  fewshot_filename="positive_fewshot.json",
+                                                  prompt_dir="./prompt/review_summarization/")
+    return prompt_registry.get_message_prefix(prompt_filename="negative_prompt.txt",
+                                              fewshot_filename="negative_fewshot.json",
+                                              prompt_dir="./prompt/review_summarization/")
 
-def inference(query: str, sentiment: str, aspect: str) -> str:
-    load_dotenv(os.path.expanduser("~/.env"))
-    AUTHORIZATION = os.getenv("AUTHORIZATION")
-    X_NCP_CLOVASTUDIO_REQUEST_ID = os.getenv("X_NCP_CLOVASTUDIO_REQUEST_ID")
-    if not AUTHORIZATION or not X_NCP_CLOVASTUDIO_REQUEST_ID:
-        raise ValueError("필수 API 인증 정보가 .env에 설정되어 있지 않습니다.")
-    headers = {
-        'Authorization': AUTHORIZATION,
-        'X-NCP-CLOVASTUDIO-REQUEST-ID': X_NCP_CLOVASTUDIO_REQUEST_ID,
-        'Content-Type': 'application/json; charset=utf-8',
-    }
-    prompt, fewshot = get_prompt_and_fewshot(aspect, sentiment)
-    # query가 문자열인데 리스트 형태의 표현이면 join
-    if query.startswith("[") and query.endswith("]"):
-        try:
-            import ast
-            q_list = ast.literal_eval(query)
-            if isinstance(q_list, list):
-                query = " ".join(q_list)
-        except Exception as e:
-            print("Query parsing error:", e)
-            
-    messages = [{"role": "system", "content": prompt}]
-    for example in fewshot:
-        # 만약 fewshot의 query가 리스트면 join
-        query_text = " ".join(example["query"]) if isinstance(example["query"], list) else example["query"]
-        messages.append({"role": "user", "content": query_text})
-        messages.append({"role": "assistant", "content": example["answer"]})
-    messages.append({"role": "user", "content": query})
-    
+def get_multi_aspect_message_prefix() -> tuple:
+    """
+    상품 단위 multi-aspect 요약용 system 프롬프트 + few-shot 메시지 prefix를 반환한다.
+    입력/출력 모두 "<aspect>-<sentiment>" 키를 갖는 JSON 객체이다.
+    """
+    return prompt_registry.get_message_prefix(prompt_filename="multi_aspect_prompt.txt",
+                                              fewshot_filename="multi_aspect_fewshot.json",
+                                              prompt_dir="./prompt/review_summarization/")
+
+def is_api_error(result: str) -> bool:
+    return result.startswith("API Error") or result.startswith("Request Error")
+
+def request_hcx(messages: list, stage: str, max_tokens: int = 1024, is_valid=None) -> str:
+    """
+    HCX chat-completions 요청을 보내고 응답 텍스트(또는 "API Error"/"Request Error" 문자열)를 반환한다.
+    동일한 요청(메시지, 샘플링 파라미터)은 LLM 캐시에서 재사용하며, is_valid가 False인 응답은 캐시하지 않는다.
+    """
+    headers = get_hcx_headers()
     request_data = {
         'messages': messages,
         'topP': 0.8,
         'topK': 0,
-        'maxTokens': 1024,
+        'maxTokens': max_tokens,
         'temperature': 0.5,
         'repeatPenalty': 5.0,
         'stopBefore': [],
         'includeAiFilters': False,
         'seed': 42
     }
-    try:
-        response = requests.post(
-            "https://clovastudio.stream.ntruss.com/testapp/v1/chat-completions/HCX-003",
-            headers=headers, json=request_data
-        )
-        response.raise_for_status()
-        response_json = response.json()
-        if response_json.get("status", {}).get("code") == "20000":
-            output_text = response_json["result"]["message"]["content"]
-            return output_text
-        else:
-            return f"API Error: {response_json.get('status', {}).get('message')}"
-    except requests.exceptions.RequestException as e:
-        return f"Request Error: {e}"
+    def call_api():
+        try:
+            response = requests.post(
+                HCX_ENDPOINT,
+                headers=headers, json=request_data
+            )
+            response.raise_for_status()
+            response_json = response.json()
+            if response_json.get("status", {}).get("code") == "20000":
+                output_text = response_json["result"]["message"]["content"]
+                return output_text
+            else:
+                return f"API Error: {response_json.get('status', {}).get('message')}"
+        except requests.exceptions.RequestException as e:
+            return f"Request Error: {e}"
+
+    return get_llm_cache().get_or_call(
+        stage=stage, endpoint=HCX_ENDPOINT, model="HCX-003",
+        payload=request_data, call_fn=call_api,
+        is_valid=is_valid or (lambda result: not is_api_error(result))
+    )
+
+def inference(query: str, sentiment: str, aspect: str) -> str:
+    # query가 문자열인데 리스트 형태의 표현이면 join
+    if query.startswith("[") and query.endswith("]"):
+        try:
+            import ast
+            q_list = ast.literal_eval(query)
+            if isinstance(q_list, list):
+                query = " ".join(q_list)
+        except Exception as e:
+            print("Query parsing error:", e)
+
+    messages = [*get_message_prefix(aspect, sentiment), {"role": "user", "content": query}]
+    return request_hcx(messages, stage="review_summarization")
 
 def robust_inference(query: str, sentiment: str, aspect: str, retry_delay: int = 2) -> str:
     while True:
         result = inference(query, sentiment, aspect)
-        if not (result.startswith("API Error") or result.startswith("Request Error")):
+        if not is_api_error(result):
             print(result)
             return result
         print("API 오류 발생, 다시 시도합니다...")
         time.sleep(retry_delay)
 
+def sample_reviews_for_summary(reviews: list) -> list:
+    """
+    요약 입력으로 사용할 고유 리뷰를 최대 MAX_SAMPLE_REVIEWS개 선택한다.
+    입력 순서를 유지하며 중복을 제거하므로 실행마다 같은 요청이 만들어진다.
+    """
+    return list(dict.fromkeys(reviews))[:MAX_SAMPLE_REVIEWS]
+
+def attach_review_samples(jobs: list, sampling_config: dict) -> list:
+    """
+    요약 job마다 HCX에 보낼 리뷰 샘플(job["sample"])을 미리 선택한다.
+    - method "mmr": 고유 리뷰를 한 번에 임베딩한 뒤 token_budget 안에서 MMR로 선택
+    - method "first": 고유 리뷰 앞 MAX_SAMPLE_REVIEWS개 (기존 방식)
+    mmr인 경우 기존 방식 대비 절약된 입력 토큰 수를 리포트한다.
+    """
+    method = sampling_config.get("method", SAMPLING_METHOD_FIRST)
+    if method != SAMPLING_METHOD_MMR:
+        for job in jobs:
+            job["sample"] = sample_reviews_for_summary(job["reviews"])
+        return jobs
+
+    max_reviews = sampling_config.get("max_reviews", MAX_SAMPLE_REVIEWS)
+    review_embeddings = embed_reviews([review for job in jobs for review in job["reviews"]],
+                                      model_name=sampling_config.get("model_name", "dragonkue/BGE-m3-ko"),
+                                      batch_size=sampling_config.get("batch_size", 64))
+    baseline_tokens, sampled_tokens = [], []
+    for job in jobs:
+        job["sample"] = mmr_sample(job["reviews"], review_embeddings,
+                                   token_budget=sampling_config.get("token_budget", 600),
+                                   max_reviews=max_reviews,
+                                   mmr_lambda=sampling_config.get("mmr_lambda", 0.7))
+        if job["sample"]:
+            baseline_tokens.append(estimate_sample_tokens(sample_reviews_for_summary(job["reviews"])))
+            sampled_tokens.append(estimate_sample_tokens(job["sample"]))
+    report_token_savings(baseline_tokens, sampled_tokens)
+    return jobs
+
+def strip_quotes(summary: str) -> str:
+    return summary.strip()[1:-1] if summary.startswith('"') and summary.endswith('"') else summary
+
 def summarize_opinions_with_original(reviews: list, sentiment: str, aspect: str) -> tuple:
-    unique_reviews = list(set(reviews))
-    sample_reviews = unique_reviews[:20]
+    sample_reviews = sample_reviews_for_summary(reviews)
     if not sample_reviews:
         return "없습니다.", "없습니다."
     reviews_str = str(sample_reviews)
     summary = robust_inference(reviews_str, sentiment, aspect)
-    summary = summary.strip()[1:-1] if summary.startswith('"') and summary.endswith('"') else summary
+    summary = strip_quotes(summary)
     return summary, reviews_str
 
-def process_product(product_id: str, aste_df: pd.DataFrame) -> dict:
-    SENTIMENT_POSITIVE = "긍정"
-    SENTIMENT_NEGATIVE = "부정"
-    product_reviews = aste_df[aste_df["review-ID"].str.contains(product_id)]
-    product_name = product_reviews["name"].dropna().unique()[0]
-    product_dict = {
-        "ID": product_id,
-        "상품명": product_name,
+def parse_multi_aspect_summary(result: str, keys: list) -> dict:
+    """
+    multi-aspect 요약 응답에서 JSON 객체를 찾아 요청한 키의 요약만 반환한다.
+    코드 블록(```json) 등으로 감싸져 있어도 첫 '{'부터 마지막 '}'까지를 파싱하며,
+    파싱에 실패하거나 값이 문자열이 아닌 키는 결과에서 제외된다.
+    """
+    start, end = result.find("{"), result.rfind("}")
+    if start == -1 or end <= start:
+        return {}
+    try:
+        parsed = json.loads(result[start:end + 1])
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(parsed, dict):
+        return {}
+    return {key: strip_quotes(parsed[key].strip()) for key in keys
+            if isinstance(parsed.get(key), str) and parsed[key].strip()}
+
+def summarize_product_multi_aspect(bucket_jobs: list, retry_delay: int = 2) -> dict:
+    """
+    한 상품의 여러 aspect/sentiment bucket을 하나의 HCX 요청으로 요약한다.
+    응답 JSON에 누락된 키는 bucket 단위 요약(summarize_opinions_with_original)으로 보완한다.
+    반환: {key: summary}
+    """
+    query = {job["key"]: job.get("sample") or sample_reviews_for_summary(job["reviews"]) for job in bucket_jobs}
+    keys = list(query)
+    messages = [*get_multi_aspect_message_prefix(),
+                {"role": "user", "content": json.dumps(query, ensure_ascii=False)}]
+    # 키마다 한 문장 요약이므로 요청 키 수에 비례하여 출력 토큰 한도 설정
+    max_tokens = min(4096, 256 * len(keys))
+    is_valid = lambda result: not is_api_error(result) and len(parse_multi_aspect_summary(result, keys)) == len(keys)
+    while True:
+        result = request_hcx(messages, stage="review_summarization_multi_aspect",
+                             max_tokens=max_tokens, is_valid=is_valid)
+        if not is_api_error(result):
+            break
+        print("API 오류 발생, 다시 시도합니다...")
+        time.sleep(retry_delay)
+    print(result)
+
+    summaries = parse_multi_aspect_summary(result, keys)
+    missing_jobs = [job for job in bucket_jobs if job["key"] not in summaries]
+    if missing_jobs:
+        print(f"multi-aspect 응답 누락 {len(missing_jobs)}건, bucket 단위 요약으로 보완합니다.")
+    for job in missing_jobs:
+        summaries[job["key"]], _ = summarize_opinions_with_original(job.get("sample", job["reviews"]),
+                                                                    job["sentiment"], job["aspect"])
+    return summaries
+
+def add_product_id_column(aste_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    review-ID("emart-(숫자)-(숫자)")에서 상품 ID를 한 번에 추출하여 product_id 칼럼으로 추가한다.
+    (keyword_recommendation.extract_product_id와 동일한 규칙, 매칭 실패 시 원래 값 사용)
+    """
+    review_ids = aste_df["review-ID"].astype(str)
+    aste_df["product_id"] = review_ids.str.extract(r"^(emart-\d+)-\d+", expand=False).fillna(review_ids)
+    return aste_df
+
+def build_product_index(aste_df: pd.DataFrame, aspect_groups: dict = ASPECT_GROUPS) -> dict:
+    """
+    product_id 기준으로 한 번의 groupby를 수행하여 상품별 요약 입력을 구성한다.
+    aspect는 aspect_groups(기본 ASPECT_GROUPS)로 묶고, 감정은 "긍정"과 그 외("부정")로 나눈다.
+    반환: {product_id: {"상품명": ..., "reviews": {"맛-긍정": [...], ...}, "counts": {"맛-긍정": 고유 리뷰 수, ...}}}
+    """
+    summary_keys = make_summary_keys(aspect_groups)
+    aspect_to_group = {aspect: group for group, aspects in aspect_groups.items() for aspect in aspects}
+    names = aste_df.groupby("product_id", sort=True)["name"].first()
+
+    bucket_df = aste_df[["product_id", "aspect", "sentiment", "review"]].copy()
+    bucket_df["aspect_group"] = bucket_df["aspect"].map(aspect_to_group)
+    bucket_df = bucket_df.dropna(subset=["aspect_group"])
+    sentiment_bucket = np.where(bucket_df["sentiment"] == SENTIMENT_POSITIVE, SENTIMENT_POSITIVE, SENTIMENT_NEGATIVE)
+    bucket_df["bucket"] = bucket_df["aspect_group"] + "-" + sentiment_bucket
+
+    grouped = bucket_df.groupby(["product_id", "bucket"], sort=False)["review"]
+    review_lists = grouped.agg(list)
+    unique_counts = grouped.nunique(dropna=False)
+
+    product_index = {
+        product_id: {
+            "상품명": name,
+            "reviews": {key: [] for key in summary_keys},
+            "counts": {key: 0 for key in summary_keys},
+        }
+        for product_id, name in names.items()
     }
-    # 맛 단독 처리
-    pos_reviews_m = product_reviews[(product_reviews["aspect"] == "맛") & (product_reviews["sentiment"] == SENTIMENT_POSITIVE)]["review"].tolist()
-    neg_reviews_m = product_reviews[(product_reviews["aspect"] == "맛") & (product_reviews["sentiment"] != SENTIMENT_POSITIVE)]["review"].tolist()
-    summary_pos_m, _ = summarize_opinions_with_original(pos_reviews_m, SENTIMENT_POSITIVE, "맛")
-    summary_neg_m, _ = summarize_opinions_with_original(neg_reviews_m, SENTIMENT_NEGATIVE, "맛")
-    product_dict["맛-긍정"] = summary_pos_m
-    product_dict["맛-부정"] = summary_neg_m
-
-    # 배송 및 포장 통합 처리: 배송과 포장 둘 다 포함
-    pos_reviews_dp = product_reviews[((product_reviews["aspect"] == "배송") | (product_reviews["aspect"] == "포장")) &
-                                      (product_reviews["sentiment"] == SENTIMENT_POSITIVE)]["review"].tolist()
-    neg_reviews_dp = product_reviews[((product_reviews["aspect"] == "배송") | (product_reviews["aspect"] == "포장")) &
-                                      (product_reviews["sentiment"] != SENTIMENT_POSITIVE)]["review"].tolist()
-    summary_pos_dp, _ = summarize_opinions_with_original(pos_reviews_dp, SENTIMENT_POSITIVE, "배송 및 포장")
-    summary_neg_dp, _ = summarize_opinions_with_original(neg_reviews_dp, SENTIMENT_NEGATIVE, "배송 및 포장")
-    product_dict["배송 및 포장-긍정"] = summary_pos_dp
-    product_dict["배송 및 포장-부정"] = summary_neg_dp
-
-    return product_dict
-
-def update_summary_counts(summary_df: pd.DataFrame, aste_df: pd.DataFrame) -> pd.DataFrame:
-    summary_df["num 맛-긍정"] = None
-    summary_df["num 맛-부정"] = None
-    summary_df["num 배송 및 포장-긍정"] = None
-    summary_df["num 배송 및 포장-부정"] = None
-
-    for idx, row in summary_df.iterrows():
-        product_id = row["ID"]
-        product_reviews = aste_df[aste_df["review-ID"].str.contains(product_id)]
-        num_m_pos = len(product_reviews[(product_reviews["aspect"] == "맛") & (product_reviews["sentiment"] == "긍정")]["review"].unique())
-        num_m_neg = len(product_reviews[(product_reviews["aspect"] == "맛") & (product_reviews["sentiment"] != "긍정")]["review"].unique())
-        num_dp_pos = len(product_reviews[((product_reviews["aspect"] == "배송") | (product_reviews["aspect"] == "포장")) & (product_reviews["sentiment"] == "긍정")]["review"].unique())
-        num_dp_neg = len(product_reviews[((product_reviews["aspect"] == "배송") | (product_reviews["aspect"] == "포장")) & (product_reviews["sentiment"] != "긍정")]["review"].unique())
-
-        summary_df.at[idx, "num 맛-긍정"] = num_m_pos
-        summary_df.at[idx, "num 맛-부정"] = num_m_neg
-        summary_df.at[idx, "num 배송 및 포장-긍정"] = num_dp_pos
-        summary_df.at[idx, "num 배송 및 포장-부정"] = num_dp_neg
+    for (product_id, bucket), reviews in review_lists.items():
+        product_index[product_id]["reviews"][bucket] = reviews
+        product_index[product_id]["counts"][bucket] = int(unique_counts[(product_id, bucket)])
+    return product_index
 
+def update_summary_counts(summary_df: pd.DataFrame, product_index: dict, summary_keys: list = SUMMARY_KEYS) -> pd.DataFrame:
+    for key in summary_keys:
+        summary_df[f"num {key}"] = summary_df["ID"].map(lambda product_id: product_index[product_id]["counts"][key])
     return summary_df
 
-def extract_product_id(review_id):
-    match = re.match(r"(emart-\d+)-\d+", review_id)
-    return match.group(1) if match else review_id  # 매칭 실패 시 원래 값 반환
-
 def load_and_prepare_data(config):
     train_data_path = os.path.join(config["paths"]["inference_dir"], config["inference_data"])
     df_infer = load_data(train_data_path)
@@ -245,28 +335,249 @@ def load_and_prepare_data(config):
     return aste_df
 
 
+def build_summary_jobs(product_index: dict, mode: str = SUMMARY_MODE_PER_BUCKET, sampling_config: dict = None) -> list:
+    """
+    상품 x aspect x sentiment 단위의 요약 job 리스트를 생성한다.
+    priority는 상품의 전체 고유 리뷰 수(리뷰 볼륨)로, 리뷰가 많은 인기 상품이 먼저 처리된다.
+    fingerprint에는 리뷰 집합과 함께 HCX 요청을 결정하는 설정(mode, 샘플링 설정, 프롬프트 내용)이 반영된다.
+    """
+    settings = {sentiment: summary_settings_fingerprint(mode, sampling_config or {}, sentiment)
+                for sentiment in (SENTIMENT_POSITIVE, SENTIMENT_NEGATIVE)}
+    jobs = []
+    for product_id, product in product_index.items():
+        review_volume = sum(product["counts"].values())
+        for key, reviews in product["reviews"].items():
+            aspect, sentiment = split_summary_key(key)
+            jobs.append({
+                "product_id": product_id,
+                "aspect": aspect,
+                "sentiment": sentiment,
+                "key": key,
+                "reviews": reviews,
+                "fingerprint": fingerprint_reviews(reviews, settings[sentiment]),
+                "priority": review_volume,
+            })
+    return jobs
+
+def group_jobs_by_product(jobs: list) -> list:
+    """
+    bucket 단위 요약 job을 상품 단위 job으로 묶는다 (multi-aspect 모드).
+    반환: [{"product_id", "buckets": [bucket job, ...], "priority"}, ...]
+    """
+    product_jobs = {}
+    for job in jobs:
+        product_job = product_jobs.setdefault(job["product_id"], {
+            "product_id": job["product_id"], "buckets": [], "priority": job["priority"],
+        })
+        product_job["buckets"].append(job)
+    return list(product_jobs.values())
+
+def effective_sampling_config(sampling_config: dict) -> dict:
+    """attach_review_samples가 실제로 사용하는 샘플링 설정 (기본값 반영, first 방식은 다른 파라미터 무시)"""
+    method = sampling_config.get("method", SAMPLING_METHOD_FIRST)
+    if method != SAMPLING_METHOD_MMR:
+        return {"method": SAMPLING_METHOD_FIRST, "max_reviews": MAX_SAMPLE_REVIEWS}
+    return {
+        "method": method,
+        "max_reviews": sampling_config.get("max_reviews", MAX_SAMPLE_REVIEWS),
+        "token_budget": sampling_config.get("token_budget", 600),
+        "mmr_lambda": sampling_config.get("mmr_lambda", 0.7),
+        "model_name": sampling_config.get("model_name", "dragonkue/BGE-m3-ko"),
+    }
+
+def summary_settings_fingerprint(mode: str, sampling_config: dict, sentiment: str) -> str:
+    """
+    sentiment bucket의 HCX 요청을 결정하는 설정의 fingerprint(sha256).
+    요약 mode, 샘플링 설정, 사용하는 프롬프트/few-shot 내용(multi_aspect 모드는 누락 키 보완용 bucket 프롬프트 포함)을 해시한다.
+    """
+    prompts = [get_message_prefix(None, sentiment)]
+    if mode == SUMMARY_MODE_MULTI_ASPECT:
+        prompts.append(get_multi_aspect_message_prefix())
+    settings = {"mode": mode, "sampling": effective_sampling_config(sampling_config), "prompts": prompts}
+    return hashlib.sha256(json.dumps(settings, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+def fingerprint_reviews(reviews: list, settings_fingerprint: str = "") -> str:
+    """
+    요약 bucket에 입력되는 리뷰 집합과 요청 설정(summary_settings_fingerprint)의 fingerprint(sha256).
+    순서와 중복에 무관하도록 고유 리뷰를 정렬하여 해시한다.
+    """
+    unique_reviews = sorted({str(review) for review in reviews})
+    return hashlib.sha256("\n".join([settings_fingerprint, *unique_reviews]).encode("utf-8")).hexdigest()
+
+def load_previous_summaries(output_file: str, fingerprint_file: str) -> tuple:
+    """
+    이전 실행의 summarization.csv와 bucket별 fingerprint 파일을 로드한다.
+    둘 중 하나라도 없으면 (None, {})를 반환하여 전체를 새로 요약한다.
+    """
+    if not (os.path.exists(output_file) and os.path.exists(fingerprint_file)):
+        return None, {}
+    previous_df = pd.read_csv(output_file, dtype={"ID": str})
+    with open(fingerprint_file, "r", encoding="utf-8") as f:
+        previous_fingerprints = json.load(f)
+    return previous_df, previous_fingerprints
+
+def split_reusable_jobs(jobs: list, previous_df: pd.DataFrame, previous_fingerprints: dict) -> tuple:
+    """
+    fingerprint가 이전 실행과 같은 bucket은 이전 요약을 재사용하고,
+    새로 생겼거나 리뷰 / 요청 설정(mode, 샘플링, 프롬프트)이 바뀐 bucket만 HCX 요청 대상으로 남긴다.
+    반환: ({(product_id, key): 이전 요약}, 요약이 필요한 job 리스트)
+    """
+    if previous_df is None:
+        return {}, jobs
+    previous_summaries = previous_df.set_index("ID").to_dict(orient="index")
+    reused, jobs_to_run = {}, []
+    for job in jobs:
+        previous_row = previous_summaries.get(job["product_id"], {})
+        previous_summary = previous_row.get(job["key"])
+        previous_fingerprint = previous_fingerprints.get(job["product_id"], {}).get(job["key"])
+        if previous_fingerprint == job["fingerprint"] and isinstance(previous_summary, str):
+            reused[(job["product_id"], job["key"])] = previous_summary
+        else:
+            jobs_to_run.append(job)
+    print(f"재사용 요약 bucket: {len(reused)}, 새로 요약할 bucket: {len(jobs_to_run)}")
+    return reused, jobs_to_run
+
+def load_temp_summaries(temp_file: str) -> dict:
+    """
+    중단된 이전 실행이 남긴 temp_file(CSV)의 {(product_id, key): (fingerprint, summary)}를 반환한다.
+    파일이 없거나 fingerprint 칼럼이 없는 이전 형식이면 빈 dict를 반환한다.
+    """
+    if not os.path.exists(temp_file):
+        return {}
+    temp_df = pd.read_csv(temp_file, dtype={"ID": str})
+    if "fingerprint" not in temp_df.columns:
+        return {}
+    temp_df = temp_df.dropna(subset=["summary"])
+    return {(row.ID, row.key): (row.fingerprint, row.summary) for row in temp_df.itertuples(index=False)}
+
+def split_resumed_jobs(jobs: list, temp_summaries: dict) -> tuple:
+    """
+    중단된 실행에서 이미 요약한 bucket(fingerprint가 같은 temp_file 행)은 그 요약을 사용하고 나머지만 남긴다.
+    반환: ({(product_id, key): 요약}, 요약이 필요한 job 리스트)
+    """
+    resumed, jobs_to_run = {}, []
+    for job in jobs:
+        fingerprint, summary = temp_summaries.get((job["product_id"], job["key"]), (None, None))
+        if fingerprint == job["fingerprint"] and isinstance(summary, str):
+            resumed[(job["product_id"], job["key"])] = summary
+        else:
+            jobs_to_run.append(job)
+    if temp_summaries:
+        print(f"중단된 실행에서 이어받은 요약 bucket: {len(resumed)}, 새로 요약할 bucket: {len(jobs_to_run)}")
+    return resumed, jobs_to_run
+
+def run_summary_jobs(jobs: list, temp_file: str, max_workers: int = 4, mode: str = SUMMARY_MODE_PER_BUCKET) -> dict:
+    """
+    요약 job을 제한된 동시성의 워커 풀로 실행한다.
+    완료된 job은 즉시 temp_file(CSV)에 fingerprint와 함께 한 줄씩 추가되고 (중단 후 재실행 시 이어받기),
+    {(product_id, key): summary}를 반환한다.
+    리뷰가 없는 job은 API 호출 없이 바로 "없습니다."로 처리한다.
+    mode가 "multi_aspect"이면 상품별 bucket을 묶어 상품당 한 번만 요청한다.
+    """
+    summaries = {}
+    api_jobs = []
+    for job in jobs:
+        if job["reviews"]:
+            api_jobs.append(job)
+        else:
+            summaries[(job["product_id"], job["key"])] = "없습니다."
+
+    if mode == SUMMARY_MODE_MULTI_ASPECT:
+        num_buckets = len(api_jobs)
+        api_jobs = group_jobs_by_product(api_jobs)
+
+        def worker(job):
+            return summarize_product_multi_aspect(job["buckets"])
+
+        def write_result(job, product_summaries):
+            fingerprints = {bucket["key"]: bucket["fingerprint"] for bucket in job["buckets"]}
+            rows = []
+            for key, summary in product_summaries.items():
+                summaries[(job["product_id"], key)] = summary
+                rows.append({"ID": job["product_id"], "key": key, "fingerprint": fingerprints[key], "summary": summary})
+            pd.DataFrame(rows).to_csv(temp_file, mode="a", header=not os.path.exists(temp_file), index=False)
+
+        print(f"multi-aspect 요약: bucket {num_buckets}건을 상품 {len(api_jobs)}건의 요청으로 묶었습니다.")
+    else:
+        def worker(job):
+            summary, _ = summarize_opinions_with_original(job.get("sample", job["reviews"]),
+                                                          job["sentiment"], job["aspect"])
+            return summary
+
+        def write_result(job, summary):
+            summaries[(job["product_id"], job["key"])] = summary
+            row = pd.DataFrame([{"ID": job["product_id"], "key": job["key"], "fingerprint": job["fingerprint"],
+                                 "summary": summary}])
+            row.to_csv(temp_file, mode="a", header=not os.path.exists(temp_file), index=False)
+
+    print(f"HCX 요약 요청 수: {len(api_jobs)} (동시 요청 수: {max_workers})")
+    run_prioritized_jobs(api_jobs, worker, max_workers=max_workers, on_result=write_result)
+    return summaries
+
 def run_review_summarization(config):
     print("\n[리뷰 요약 추출 시작]\n")
-    aste_df = load_and_prepare_data(config)
-    product_ids = list({extract_product_id(item) for item in aste_df["review-ID"].tolist()})
+    summarization_config = config.get("review_summarization", {})
+    max_workers = summarization_config.get("max_workers", 4)
+    incremental = summarization_config.get("incremental", True)
+    mode = summarization_config.get("mode", SUMMARY_MODE_PER_BUCKET)
+    aspect_groups = summarization_config.get("aspect_groups", ASPECT_GROUPS)
+    summary_keys = make_summary_keys(aspect_groups)
+    aste_df = add_product_id_column(load_and_prepare_data(config))
+    product_index = build_product_index(aste_df, aspect_groups)
+    product_ids = list(product_index)
     print(f"처리할 상품 수: {len(product_ids)}")
+
+    output_file = os.path.join(config["paths"]["final_outputs_dir"], "summarization.csv")
+    temp_file = os.path.join(config["paths"]["final_outputs_dir"], "summarization_TEMP.csv")
+    fingerprint_file = os.path.join(config["paths"]["final_outputs_dir"], "summarization_fingerprints.json")
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    temp_summaries = load_temp_summaries(temp_file)
+    if not temp_summaries and os.path.exists(temp_file):
+        os.remove(temp_file)  # 이전 형식의 temp 파일은 이어받지 않음
+
+    # 증분 모드: 리뷰 집합과 요청 설정이 바뀌지 않은 bucket은 이전 요약 재사용
+    previous_df, previous_fingerprints = (load_previous_summaries(output_file, fingerprint_file)
+                                          if incremental else (None, {}))
+    sampling_config = summarization_config.get("sampling", {})
+    jobs = build_summary_jobs(product_index, mode, sampling_config)
+    summaries, jobs_to_run = split_reusable_jobs(jobs, previous_df, previous_fingerprints)
+    # 중단된 이전 실행이 temp_file에 남긴 요약 이어받기
+    resumed, jobs_to_run = split_resumed_jobs(jobs_to_run, temp_summaries)
+    summaries.update(resumed)
+    jobs_to_run = attach_review_samples(jobs_to_run, sampling_config)
+    summaries.update(run_summary_jobs(jobs_to_run, temp_file, max_workers=max_workers, mode=mode))
+
     summary_list = []
     for prod_id in product_ids:
-        prod_summary = process_product(prod_id, aste_df)
+        prod_summary = {"ID": prod_id, "상품명": product_index[prod_id]["상품명"]}
+        for key in summary_keys:
+            prod_summary[key] = summaries[(prod_id, key)]
         summary_list.append(prod_summary)
     summary_df = pd.DataFrame(summary_list)
-    summary_df = update_summary_counts(summary_df, aste_df)
-    final_columns = ["ID", "상품명", "맛-긍정", "맛-부정", "배송 및 포장-긍정", "배송 및 포장-부정", 
-                     "num 맛-긍정", "num 맛-부정", "num 배송 및 포장-긍정", "num 배송 및 포장-부정"]
+    summary_df = update_summary_counts(summary_df, product_index, summary_keys)
+    final_columns = ["ID", "상품명"] + summary_keys + [f"num {key}" for key in summary_keys]
     summary_df = summary_df[final_columns]
-    output_file = os.path.join(config["paths"]["final_outputs_dir"], "summarization.csv")
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    if previous_df is not None:
+        # 이번 입력에 없는 상품의 이전 요약은 그대로 유지하여 병합
+        kept_df = previous_df[~previous_df["ID"].isin(product_ids)].reindex(columns=final_columns)
+        summary_df = pd.concat([summary_df, kept_df], ignore_index=True)
     summary_df.to_csv(output_file, index=False)
+
+    fingerprints = previous_fingerprints
+    for job in jobs:
+        fingerprints.setdefault(job["product_id"], {})[job["key"]] = job["fingerprint"]
+    with open(fingerprint_file, "w", encoding="utf-8") as f:
+        json.dump(fingerprints, f, ensure_ascii=False, indent=2)
+
+    if os.path.exists(temp_file):
+        os.remove(temp_file)
     print(f"최종 요약 결과가 저장되었습니다: {output_file}")
+    get_llm_cache().report("review_summarization")
+    if mode == SUMMARY_MODE_MULTI_ASPECT:
+        get_llm_cache().report("review_summarization_multi_aspect")
     print("\n[리뷰 요약 추출 완료]\n")
     return summary_df
 
-
 if __name__ == "__main__":
     run_review_summarization({
         "paths": {
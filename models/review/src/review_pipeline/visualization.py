@@ -6,11 +6,12 @@
 - 최종 출력 CSV 파일은 다음 열로 구성된다:
     카테고리, 키워드, ID, 상품명, opinion 개수
 - 본 파이프라인은 config를 활용하고, prompt 폴더의 프롬프트 및 few-shot 예시를 참고하여 API 호출을 수행한다.
-- run_keyword_recommendation() 함수를 통해 전체 파이프라인을 실행한다.
+- run_visualization() 함수를 통해 전체 파이프라인을 실행한다. (직접 실행: python src/review_pipeline/visualization.py --projection pca)
 """
 
 import os, sys
 import re
+import argparse
 import json
 import time
 import requests
@@ -22,7 +23,8 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
     
-from utils.utils import load_data, expand_inference_data, sentenceBERT_embeddings, umap_reduce_embeddings, agglomerative_clustering, visualize_clustering, evaluate_clustering
+from utils.clustering import cluster_embeddings
+from utils.utils import load_data, expand_inference_data, sentenceBERT_embeddings, reduce_embeddings, visualize_clustering, evaluate_clustering
 
 #########################################################
 # 데이터 전처리 및 확장 관련 함수
@@ -66,49 +68,68 @@ def load_and_prepare_data(config):
 # 최종 평가 실행 함수
 #########################################################
 
-print("\n[추천 키워드 기반 상품 재정렬 시각화, 정량적 평가]\n")
+def run_visualization(config):
+    """
+    카테고리별 긍정 opinion을 임베딩 -> 차원 축소 -> 클러스터링한 뒤,
+    층화 샘플로 2차원 투영 시각화와 정량적 평가(실루엣, DBI)를 수행한다.
+    (샘플 수와 투영 방식은 config의 visualization 설정)
+    """
+    print("\n[추천 키워드 기반 상품 재정렬 시각화, 정량적 평가]\n")
+
+    # 1. 데이터 로드 및 전처리
+    aste_df = load_and_prepare_data(config)
+
+    # 2. 긍정 의견만 선택 (추천 키워드는 긍정 리뷰 기반)
+    infer_pos = aste_df[aste_df["sentiment"] == "긍정"]
+    infer_pos.loc[:, 'category'] = infer_pos['category'].replace({'아이간식': '라면/간편식'})
 
-# config 파일을 config/config.yaml에서 로드 (파일 위치: 프로젝트 루트/config/config.yaml)
-config_path = os.path.join(
-    os.path.dirname(os.path.abspath(__file__)),
-    "..", "..", "config", "config.yaml"
-)
+    category_map = {
+        "과자/빙과": "snacks",
+        "라면/간편식": "meals"
+    }
 
-with open(config_path, "r", encoding="utf-8") as f:
-    config = yaml.safe_load(f)
+    infer_pos["category"] = infer_pos["category"].map(category_map).fillna(infer_pos["category"])
 
+    # 카테고리별로 DataFrame 분할
+    category_dfs = {category: df for category, df in infer_pos.groupby("category")}
 
-# 1. 데이터 로드 및 전처리
-aste_df = load_and_prepare_data(config)
+    evaluation_results = {}
+    for category, df_cat in category_dfs.items():
+        # 3. 리뷰 텍스트 임베딩 생성 (opinion 열 사용)
+        embedding_file = os.path.join(config["paths"]["embedding_dir"], f"deepseek_inference_{category}.npy")
+        embedding_matrix = sentenceBERT_embeddings(embedding_file, df=df_cat, column="opinion", **config.get("embedding", {}))
 
-# 2. 긍정 의견만 선택 (추천 키워드는 긍정 리뷰 기반)
-infer_pos = aste_df[aste_df["sentiment"] == "긍정"]
-infer_pos.loc[:, 'category'] = infer_pos['category'].replace({'아이간식': '라면/간편식'})
+        # 4. 차원 축소 (keyword_recommendation과 같은 reducer 파일을 재사용)
+        reduction = config.get("keyword_recommendation", {}).get("reduction", {})
+        reducer_path = os.path.join(config["paths"]["embedding_dir"], f"{category}_{reduction.get('method', 'umap')}_reducer.joblib")
+        reduced_embeddings = reduce_embeddings(embedding_matrix, reducer_path=reducer_path, **reduction)
 
-category_map = {
-    "과자/빙과": "snacks",
-    "라면/간편식": "meals"
-}
+        # 5. 클러스터링 (config의 clustering.method: ward / minibatch_ward / knn_ward, 임계값 조정)
+        cluster_labels = cluster_embeddings(reduced_embeddings, **config.get("keyword_recommendation", {}).get("clustering", {}))
+        df_cat['cluster_label'] = cluster_labels
 
-infer_pos["category"] = infer_pos["category"].map(category_map).fillna(infer_pos["category"])
+        # 6. 클러스터 시각화 (층화 샘플, 2차원 투영 결과 캐시)
+        visualize_clustering(reduced_embeddings, cluster_labels, config, category)
 
-# 카테고리별로 DataFrame 분할
-category_dfs = {category: df for category, df in infer_pos.groupby("category")}
+        # 7. 평가 Metric (실루엣은 층화 샘플로 계산, 결과 캐시)
+        evaluation_results[category] = evaluate_clustering(reduced_embeddings, cluster_labels, config, category)
 
-for category, df_cat in category_dfs.items():
-    # 3. 리뷰 텍스트 임베딩 생성 (opinion 열 사용)
-    embedding_file = os.path.join(config["paths"]["embedding_dir"], f"deepseek_inference_{category}.npy")
-    embedding_matrix = sentenceBERT_embeddings(embedding_file, df=df_cat, column="opinion")
+    return evaluation_results
 
-    # 4. UMAP 차원 축소
-    reduced_embeddings = umap_reduce_embeddings(embedding_matrix, n_components=256)
 
-    # 5. 클러스터링 (Agglomerative Clustering 사용, 임계값 조정)
-    cluster_labels = agglomerative_clustering(reduced_embeddings, distance_threshold=21.5)
-    df_cat['cluster_label'] = cluster_labels
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="클러스터링 결과 시각화 및 정량적 평가")
+    # config 파일 기본 위치: 프로젝트 루트/config/config.yaml
+    parser.add_argument("--config", type=str,
+                        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "config", "config.yaml"),
+                        help="설정 파일 경로")
+    parser.add_argument("--projection", type=str, default=None, choices=["tsne", "pca", "umap"],
+                        help="2차원 투영 방식 (기본: config의 visualization.projection)")
+    args = parser.parse_args()
 
-    # 6. 클러스터 시각화
-    visualize_clustering(reduced_embeddings, cluster_labels, config, category)
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    if args.projection:
+        config.setdefault("visualization", {})["projection"] = args.projection
 
-    # 7. 평가 Metric
-    evaluate_clustering(reduced_embeddings, cluster_labels, config, category)
+    run_visualization(config)
@@ -4,6 +4,7 @@
 [리뷰 전처리 파이프라인]
 - 원본 리뷰 CSV 파일에서 텍스트를 전처리 (특수문자 제거, 개행 교체, 영어/숫자 필터, 공백 정규화, 반복 제거, 짧은 텍스트 배제)
 - T5 맞춤법 교정 모델로 오타 교정 수행
+- 반복 제거는 utils/text_repetition.py (반복 패턴이 있는 토큰만 형태소 분석, review_preprocessing.num_workers 프로세스로 병렬 처리)
 """
 
 import re
@@ -12,11 +13,9 @@ import torch
 import pandas as pd
 from glob import glob
 from tqdm import tqdm
-from konlpy.tag import Hannanum
 from transformers import T5ForConditionalGeneration, T5Tokenizer
 from utils.utils import load_and_preprocess_reviews
-
-hannanum = Hannanum()
+from utils.text_repetition import make_repetition_executor, remove_repetition_batch
 
 def remove_special_chars(text):
     return re.sub(r'[^a-zA-Z0-9가-힣\s]', '', text) if isinstance(text, str) else ""
@@ -41,36 +40,6 @@ def filter_text_by_number_ratio(text, ratio=0.3):
 def normalize_whitespace(text):
     return re.sub(r'\s+', ' ', text).strip() if isinstance(text, str) else ""
 
-def remove_repetition(text):
-    def is_valid_word(word):
-        pos_tags = hannanum.pos(word)
-        for token, pos in pos_tags:
-            if token == word:
-                return True
-        return False
-    def compress_token(token):
-        if is_valid_word(token):
-            return token
-        n = len(token)
-        for L in range(1, n // 2 + 1):
-            segment = token[:L]
-            if segment * (n // L) == token:
-                return segment
-        return token
-    def compress_token_list(tokens):
-        n = len(tokens)
-        for k in range(1, n // 2 + 1):
-            block = tokens[:k]
-            if block * (n // k) == tokens:
-                return block
-        return tokens
-    if not text or not isinstance(text, str):
-        return ""
-    tokens = text.split()
-    tokens = [compress_token(token) for token in tokens]
-    tokens = compress_token_list(tokens)
-    return " ".join(tokens).strip()
-
 def remove_short_text(text, n=5):
     return text if len(text) > n else ''
 
@@ -113,32 +82,39 @@ def run_review_preprocessing(config):
     if not csv_files:
         print("처리할 CSV 파일이 없습니다.")
         return
-    for src_file in csv_files:
-        base_name = os.path.basename(src_file).replace("crawled_", "processed_", 1)
-        dest_file = os.path.join(output_dir, base_name)
-        meta_base_name = os.path.basename(src_file).replace("crawled_", "meta_", 1)
-        meta_dest_file = os.path.join(output_dir, meta_base_name)
-        try:
-            meta_df, df = load_and_preprocess_reviews(src_file)
-            meta_df.to_csv(meta_dest_file, index=False)
-        except Exception as e:
-            print(f"파일 로드 실패 ({src_file}): {e}")
-            continue
-        tqdm.pandas()
-        df["step_special"] = df["review"].progress_apply(remove_special_chars)
-        df["step_newline"] = df["step_special"].apply(replace_newlines)
-        df["step_eng_filter"] = df["step_newline"].apply(filter_text_by_english_ratio)
-        df["step_num_filter"] = df["step_eng_filter"].apply(filter_text_by_number_ratio)
-        df["step_whitespace"] = df["step_num_filter"].apply(normalize_whitespace)
-        df["step_repetition"] = df["step_whitespace"].progress_apply(remove_repetition)
-        df["step_length"] = df["step_repetition"].apply(remove_short_text)
-        df = df[(df["step_length"] != "") & df["step_length"].notna()]
-        df = batch_correct_typos(df, "step_length", batch_size=100)
-        drop_cols = ["step_special", "step_newline", "step_eng_filter",
-                     "step_num_filter", "step_whitespace", "step_repetition", "step_length"]
-        df.drop(columns=drop_cols, inplace=True)
-        df.to_csv(dest_file, index=False)
-        print(f"\n[전처리 데이터 저장] {dest_file}\n")
+    # 형태소 분석기(JVM)를 사용하기 전에 풀을 만들고 모든 파일에 재사용 (워커별 단어 캐시 유지)
+    num_workers = config.get("review_preprocessing", {}).get("num_workers", 1)
+    executor = make_repetition_executor(num_workers)
+    try:
+        for src_file in csv_files:
+            base_name = os.path.basename(src_file).replace("crawled_", "processed_", 1)
+            dest_file = os.path.join(output_dir, base_name)
+            meta_base_name = os.path.basename(src_file).replace("crawled_", "meta_", 1)
+            meta_dest_file = os.path.join(output_dir, meta_base_name)
+            try:
+                meta_df, df = load_and_preprocess_reviews(src_file)
+                meta_df.to_csv(meta_dest_file, index=False)
+            except Exception as e:
+                print(f"파일 로드 실패 ({src_file}): {e}")
+                continue
+            tqdm.pandas()
+            df["step_special"] = df["review"].progress_apply(remove_special_chars)
+            df["step_newline"] = df["step_special"].apply(replace_newlines)
+            df["step_eng_filter"] = df["step_newline"].apply(filter_text_by_english_ratio)
+            df["step_num_filter"] = df["step_eng_filter"].apply(filter_text_by_number_ratio)
+            df["step_whitespace"] = df["step_num_filter"].apply(normalize_whitespace)
+            df["step_repetition"] = remove_repetition_batch(df["step_whitespace"].tolist(), executor)
+            df["step_length"] = df["step_repetition"].apply(remove_short_text)
+            df = df[(df["step_length"] != "") & df["step_length"].notna()]
+            df = batch_correct_typos(df, "step_length", batch_size=100)
+            drop_cols = ["step_special", "step_newline", "step_eng_filter",
+                         "step_num_filter", "step_whitespace", "step_repetition", "step_length"]
+            df.drop(columns=drop_cols, inplace=True)
+            df.to_csv(dest_file, index=False)
+            print(f"\n[전처리 데이터 저장] {dest_file}\n")
+    finally:
+        if executor is not None:
+            executor.shutdown()
     print("\n[리뷰 전처리 완료]\n")
 
 if __name__ == "__main__":
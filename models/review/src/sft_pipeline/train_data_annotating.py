@@ -16,7 +16,8 @@ from tqdm import tqdm
 from openai import OpenAI
 from dotenv import load_dotenv
 # prompt 모듈에서 프롬프트와 few-shot 예시를 불러옵니다.
-from prompt.prompt_loader import load_prompt, load_fewshot
+from prompt.prompt_loader import prompt_registry
+from utils.llm_cache import get_llm_cache
 
 def run_train_data_annotating(config):
     # 환경 변수 로드
@@ -35,10 +36,9 @@ def run_train_data_annotating(config):
     BATCH_SIZE = 10
     MODEL = config["train_data_annotating"]["annotation_model"]
 
-    PROMPT = load_prompt(prompt_filename="annotation_prompt.txt",
-                         prompt_dir="./prompt/review_annotation/")
-    FEW_SHOT = load_fewshot(fewshot_filename="annotation_fewshot.json",
-                            prompt_dir="./prompt/review_annotation/")
+    MESSAGE_PREFIX = prompt_registry.get_message_prefix(prompt_filename="annotation_prompt.txt",
+                                                        fewshot_filename="annotation_fewshot.json",
+                                                        prompt_dir="./prompt/review_annotation/")
 
     client = OpenAI()
 
@@ -57,17 +57,17 @@ def run_train_data_annotating(config):
     for i in tqdm(range(0, len(remaining), BATCH_SIZE), desc="GPT 처리"):
         batch = remaining.iloc[i : i + BATCH_SIZE]
         for _, row in batch.iterrows():
-            messages = [{"role": "system", "content": PROMPT}]
-            for example in FEW_SHOT:
-                messages.append({"role": "user", "content": example["query"]})
-                messages.append({"role": "assistant", "content": example["answer"]})
-            messages.append({"role": "user", "content": row["processed"]})
-            
-            completion = client.chat.completions.create(
-                model=MODEL,
-                messages=messages,
+            messages = [*MESSAGE_PREFIX, {"role": "user", "content": row["processed"]}]
+
+            # 동일한 모델/메시지 요청은 LLM 캐시에서 재사용
+            response = get_llm_cache().get_or_call(
+                stage="train_data_annotating", endpoint="openai/chat.completions", model=MODEL,
+                payload={"messages": messages},
+                call_fn=lambda: client.chat.completions.create(
+                    model=MODEL,
+                    messages=messages,
+                ).choices[0].message.content
             )
-            response = completion.choices[0].message.content
             entry = row.to_dict()
             entry["GPT_Response"] = response
             results.append(entry)
@@ -80,6 +80,7 @@ def run_train_data_annotating(config):
         print(f"처리 완료: {i + len(batch)} / {len(remaining)} 건")
         results = []
     print("\n모든 데이터 GPT 처리 완료.\n")
+    get_llm_cache().report("train_data_annotating")
 
     df_temp = pd.read_csv(output_temp_file)
     results = []
@@ -63,7 +63,7 @@ def run_train_data_sampling(config):
     filtered_file = filter_data(config)
     embedding_path = os.path.join(config["paths"]["embedding_dir"], "train_sampling.npy")
     raw_data = pd.read_csv(filtered_file)
-    embedding_matrix = sentenceBERT_embeddings(embedding_path, raw_data, column="processed")
+    embedding_matrix = sentenceBERT_embeddings(embedding_path, raw_data, column="processed", **config.get("embedding", {}))
     kmeans, labels, num_clusters = perform_kmeans_clustering(embedding_matrix, num_clusters=config["train_data_annotating"]["num_train_data"])
     selected_indices = select_representative_samples(kmeans, labels, num_clusters, embedding_matrix)
     sampled_df = raw_data.iloc[selected_indices].reset_index(drop=True)
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+[배치 생성 엔진 모듈]
+- 프롬프트를 토큰 길이 순으로 정렬하여 비슷한 길이끼리 배치(bucket)로 묶음 (패딩 낭비 최소화)
+- left padding으로 배치 생성 (decoder-only 모델은 프롬프트 끝이 정렬되어야 함)
+- 파싱(JSON 추출)에 실패한 항목만 다시 큐에 넣어 재생성
+- 배치별 처리량(리뷰/s, 생성 토큰/s) 기록 및 리포트
+- prefix_text를 주면 템플릿의 고정 prefix KV 캐시를 재사용하여 리뷰별 suffix만 prefill (utils/prefix_cache.py)
+- stopping_criteria_factory로 행별 조기 종료 조건(예: JSON 배열 닫힘)을 적용 (utils/generation_control.py)
+
+모델/토크나이저는 transformers의 generate 인터페이스만 사용하므로,
+CPU에서 작은 causal LM으로도 동일하게 실행할 수 있다.
+"""
+
+import time
+import numpy as np
+from transformers import LogitsProcessorList, StoppingCriteriaList
+
+from utils.prefix_cache import prefix_kv_cache, expand_for_batch, build_prefixed_inputs
+
+
+def prepare_tokenizer_for_batching(tokenizer):
+    """배치 생성을 위해 left padding과 pad 토큰을 설정한다 (pad 토큰이 없으면 eos 사용)."""
+    tokenizer.padding_side = "left"
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    return tokenizer
+
+
+def make_length_buckets(lengths, batch_size):
+    """토큰 길이 오름차순(동일 길이는 입력 순서)으로 정렬한 인덱스를 batch_size개씩 묶는다."""
+    order = np.argsort(np.asarray(lengths), kind="stable")
+    return [order[start:start + batch_size].tolist() for start in range(0, len(order), batch_size)]
+
+
+def generate_batch(prompts, model, tokenizer, max_new_tokens=512, skip_special_tokens=True,
+                   add_special_tokens=False, logits_processor_factory=None, stopping_criteria_factory=None,
+                   prefix_entry=None, **generate_kwargs):
+    """
+    프롬프트 배치를 left padding하여 한 번에 생성하고, 입력 이후 생성된 부분만 디코딩한다.
+    logits_processor_factory가 주어지면 배치마다 새 logits processor를 만들어 사용한다 (예: 스키마 제약 디코딩).
+    stopping_criteria_factory도 같은 방식으로 배치마다 새 stopping criteria를 만든다 (종료된 행은 패딩으로 채워짐).
+    prefix_entry(prefix KV 캐시 항목)가 주어지면 [prefix | 패딩 | suffix]로 입력을 구성하고 캐시된 KV를 재사용한다.
+    반환: (응답 문자열 리스트, 배치 통계 dict)
+    """
+    start_time = time.time()
+    if logits_processor_factory is not None:
+        generate_kwargs["logits_processor"] = LogitsProcessorList([logits_processor_factory()])
+    if stopping_criteria_factory is not None:
+        generate_kwargs["stopping_criteria"] = StoppingCriteriaList([stopping_criteria_factory()])
+    num_prefix_tokens = 0
+    if prefix_entry is not None:
+        num_prefix_tokens = len(prefix_entry["prefix_ids"])
+        suffix_ids = tokenizer([prompt[len(prefix_entry["prefix_text"]):] for prompt in prompts],
+                               add_special_tokens=False)["input_ids"]
+        model_inputs = build_prefixed_inputs(prefix_entry, suffix_ids, tokenizer.pad_token_id, model.device)
+        generate_kwargs["past_key_values"] = expand_for_batch(prefix_entry, len(prompts))
+    else:
+        model_inputs = tokenizer(prompts, return_tensors="pt", padding=True,
+                                 add_special_tokens=add_special_tokens).to(model.device)
+    output_ids = model.generate(
+        **model_inputs,
+        max_new_tokens=max_new_tokens,
+        pad_token_id=tokenizer.pad_token_id,
+        **generate_kwargs
+    )
+    # left padding이므로 모든 행의 프롬프트가 같은 위치에서 끝난다
+    new_ids = output_ids[:, model_inputs["input_ids"].shape[1]:]
+    responses = tokenizer.batch_decode(new_ids, skip_special_tokens=skip_special_tokens)
+    elapsed = time.time() - start_time
+
+    generated_tokens = int((new_ids != tokenizer.pad_token_id).sum())
+    # 통계의 프롬프트 토큰은 새로 prefill한 부분(캐시된 prefix 제외) 기준
+    prefilled_mask = model_inputs["attention_mask"][:, num_prefix_tokens:]
+    stats = {
+        "batch_size": len(prompts),
+        "prompt_tokens": int(prefilled_mask.sum()),
+        "padded_tokens": int(prefilled_mask.numel()),
+        "cached_prefix_tokens": num_prefix_tokens * len(prompts),
+        "generated_tokens": generated_tokens,
+        "elapsed": elapsed,
+        "items_per_sec": len(prompts) / elapsed if elapsed > 0 else 0.0,
+        "tokens_per_sec": generated_tokens / elapsed if elapsed > 0 else 0.0,
+    }
+    return responses, stats
+
+
+def run_batched_generation(prompts, model, tokenizer, parse_fn, batch_size=8, max_new_tokens=512,
+                           max_attempts=20, skip_special_tokens=True, add_special_tokens=False,
+                           logits_processor_factory=None, stopping_criteria_factory=None, prefix_text=None,
+                           on_result=None, **generate_kwargs):
+    """
+    전체 프롬프트를 길이 bucket 단위로 배치 생성하고, parse_fn(response)이 None인 항목만 재시도한다.
+
+    Args:
+        prompts (list[str]): 채팅 템플릿 등이 적용된 최종 입력 문자열
+        parse_fn (callable): 응답 문자열 -> 파싱 결과 (실패 시 None)
+        batch_size (int): 배치 크기
+        max_attempts (int): 항목별 최대 시도 횟수 (최초 시도 포함)
+        add_special_tokens (bool): 채팅 템플릿 없이 원문 프롬프트를 쓰는 경우 True (BOS 토큰 추가)
+        logits_processor_factory (callable): 배치마다 logits processor를 새로 만드는 함수 (없으면 제약 없음)
+        stopping_criteria_factory (callable): 배치마다 행별 stopping criteria를 새로 만드는 함수 (없으면 EOS/길이 한도까지 생성)
+        prefix_text (str): 모든 프롬프트가 공유하는 고정 prefix. 주어지면 prefix KV 캐시를 재사용한다.
+        on_result (callable): 항목 결과가 확정될 때마다 on_result(idx, parsed)로 호출 (최대 시도 초과 시 parsed=None)
+        generate_kwargs: model.generate에 그대로 전달 (temperature, top_p, do_sample 등)
+
+    Returns:
+        list: 항목별 파싱 결과 (최대 시도 후에도 실패하면 None)
+        list: 항목별 실패(재시도) 횟수
+        list[dict]: 배치별 통계 (round, batch_size, prompt/generated tokens, elapsed, items/tokens per sec)
+    """
+    prepare_tokenizer_for_batching(tokenizer)
+    prefix_entry = None
+    if prefix_text is not None:
+        if not all(prompt.startswith(prefix_text) for prompt in prompts):
+            raise ValueError("prefix_text로 시작하지 않는 프롬프트가 있습니다.")
+        prefix_entry = prefix_kv_cache.get(model, tokenizer, prefix_text, add_special_tokens=add_special_tokens)
+        # 길이 bucket은 새로 prefill할 suffix 길이 기준
+        prompts_for_length = [prompt[len(prefix_text):] for prompt in prompts]
+        lengths = [len(ids) for ids in tokenizer(prompts_for_length, add_special_tokens=False)["input_ids"]]
+    else:
+        lengths = [len(ids) for ids in tokenizer(prompts, add_special_tokens=add_special_tokens)["input_ids"]]
+    results = [None] * len(prompts)
+    failure_counts = [0] * len(prompts)
+    batch_stats = []
+
+    pending = list(range(len(prompts)))
+    for attempt in range(max_attempts):
+        if not pending:
+            break
+        failed = []
+        for bucket in make_length_buckets([lengths[idx] for idx in pending], batch_size):
+            batch_indices = [pending[pos] for pos in bucket]
+            responses, stats = generate_batch([prompts[idx] for idx in batch_indices], model, tokenizer,
+                                              max_new_tokens=max_new_tokens,
+                                              skip_special_tokens=skip_special_tokens,
+                                              add_special_tokens=add_special_tokens,
+                                              logits_processor_factory=logits_processor_factory,
+                                              stopping_criteria_factory=stopping_criteria_factory,
+                                              prefix_entry=prefix_entry, **generate_kwargs)
+            num_parsed = 0
+            for idx, response in zip(batch_indices, responses):
+                parsed = parse_fn(response)
+                if parsed is None:
+                    failed.append(idx)
+                else:
+                    results[idx] = parsed
+                    num_parsed += 1
+                    if on_result is not None:
+                        on_result(idx, parsed)
+            stats.update({"round": attempt, "parsed": num_parsed})
+            batch_stats.append(stats)
+            print(f"[배치 {len(batch_stats)}] round {attempt}, size {stats['batch_size']}, "
+                  f"파싱 성공 {num_parsed}, {stats['elapsed']:.2f}초 "
+                  f"({stats['items_per_sec']:.2f} 리뷰/s, {stats['tokens_per_sec']:.1f} 토큰/s)")
+        for idx in failed:
+            failure_counts[idx] += 1
+        if failed:
+            print(f"JSON 추출 실패 {len(failed)}건 재시도 (round {attempt + 1})")
+        pending = sorted(failed)
+
+    if pending:
+        print(f"최대 시도 횟수({max_attempts}회)를 초과한 {len(pending)}건은 None으로 저장합니다.")
+        if on_result is not None:
+            for idx in pending:
+                on_result(idx, None)
+    num_failures = sum(failure_counts)
+    print(f"재시도율: 리뷰 {len(prompts)}건, 파싱 실패 {num_failures}회 "
+          f"(리뷰당 {num_failures / max(len(prompts), 1):.2f}회, 실패 발생 리뷰 "
+          f"{sum(count > 0 for count in failure_counts)}건)")
+    report_batch_throughput(batch_stats)
+    if prefix_entry is not None:
+        report_prefix_savings(prefix_entry, batch_stats)
+    return results, failure_counts, batch_stats
+
+
+def report_batch_throughput(batch_stats):
+    """
+    배치별 통계를 합산하여 전체 처리량을 출력하고 반환한다.
+    반환: {"batches", "items", "generated_tokens", "elapsed", "items_per_sec", "tokens_per_sec", "padding_ratio"}
+    """
+    elapsed = sum(stats["elapsed"] for stats in batch_stats)
+    items = sum(stats["batch_size"] for stats in batch_stats)
+    generated_tokens = sum(stats["generated_tokens"] for stats in batch_stats)
+    padded_tokens = sum(stats["padded_tokens"] for stats in batch_stats)
+    prompt_tokens = sum(stats["prompt_tokens"] for stats in batch_stats)
+    report = {
+        "batches": len(batch_stats),
+        "items": items,
+        "generated_tokens": generated_tokens,
+        "elapsed": elapsed,
+        "items_per_sec": items / elapsed if elapsed > 0 else 0.0,
+        "tokens_per_sec": generated_tokens / elapsed if elapsed > 0 else 0.0,
+        "padding_ratio": 1 - prompt_tokens / padded_tokens if padded_tokens else 0.0,
+    }
+    print(f"배치 생성 처리량: 배치 {report['batches']}개, 생성 {report['items']}건 / {report['elapsed']:.2f}초 "
+          f"({report['items_per_sec']:.2f} 리뷰/s, {report['tokens_per_sec']:.1f} 토큰/s), "
+          f"패딩 비율 {report['padding_ratio']:.1%}")
+    return report
+
+
+def report_prefix_savings(prefix_entry, batch_stats):
+    """
+    prefix KV 캐시로 생략한 prefill 토큰 수와 리뷰당 절약 시간(prefix 1회 prefill 시간 기준 추정)을 출력한다.
+    """
+    items = sum(stats["batch_size"] for stats in batch_stats)
+    skipped_tokens = sum(stats["cached_prefix_tokens"] for stats in batch_stats)
+    report = {
+        "prefix_tokens": len(prefix_entry["prefix_ids"]),
+        "skipped_prefill_tokens": skipped_tokens,
+        "prefill_time_saved_per_review": prefix_entry["prefill_time"],
+        "prefill_time_saved": prefix_entry["prefill_time"] * items,
+    }
+    print(f"prefix KV 캐시: prefix {report['prefix_tokens']} 토큰, prefill 생략 {skipped_tokens} 토큰, "
+          f"리뷰당 prefill 절약 약 {report['prefill_time_saved_per_review']:.3f}초 "
+          f"(총 약 {report['prefill_time_saved']:.2f}초)")
+    return report
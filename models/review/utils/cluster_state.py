@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+[추천 키워드 증분 클러스터링 모듈]
+- 이전 실행의 클러스터 상태(centroid, 키워드, opinion별 라벨)를 카테고리별 파일로 저장
+- 다음 실행에서는
+    1) 이전에 처리한 opinion(review-ID + opinion 해시)은 기존 라벨을 그대로 사용
+    2) 새 opinion은 가장 가까운 centroid가 반경(assign_radius) 이내이면 해당 클러스터에 배정
+    3) 배정되지 않은 opinion만 cluster_embeddings로 클러스터링하여 새 클러스터 번호 부여
+  -> HCX 키워드 생성은 새 클러스터에 대해서만 호출
+- centroid는 축소 공간 좌표이므로, 임베딩 모델 / 차원 축소 설정 / reducer 파일 / 축소 결과 차원이 바뀌면 상태를 버리고 전체 재클러스터링
+  (데이터 수가 n_components 이하이면 reduce_embeddings가 원본 차원을 그대로 반환하므로 차원도 비교)
+
+저장 구조 ({embedding_dir}/{category}_cluster_state.joblib):
+    {"signature", "centroids": {라벨: 벡터}, "sizes": {라벨: 개수}, "keywords": {라벨: 키워드},
+     "opinion_keys": (N,) S16 배열, "opinion_labels": (N,) int 배열}
+"""
+
+import os
+import hashlib
+import joblib
+import numpy as np
+from utils.clustering import cluster_embeddings
+
+
+def opinion_keys(df, columns=("review-ID", "opinion")):
+    """opinion 행별 식별 해시 (sha256 앞 16바이트, 같은 리뷰의 같은 opinion은 같은 키)"""
+    joined = df[list(columns)].astype(str).agg("\x1f".join, axis=1)
+    return np.array([hashlib.sha256(text.encode("utf-8")).digest()[:16] for text in joined], dtype="S16")
+
+
+def space_signature(embedding_config, reduction_config, reducer_path, output_dim):
+    """
+    centroid 좌표 공간을 결정하는 설정 (reducer 파일이 다시 학습되면 수정 시각/크기가 바뀜).
+    output_dim: 실제 축소 결과의 차원 (reduced_embeddings.shape[1])
+    """
+    reducer_stat = None
+    if reducer_path and os.path.exists(reducer_path):
+        stat = os.stat(reducer_path)
+        reducer_stat = (stat.st_size, stat.st_mtime_ns)
+    return {"embedding": dict(embedding_config), "reduction": dict(reduction_config), "reducer": reducer_stat,
+            "output_dim": int(output_dim)}
+
+
+def load_cluster_state(state_path, signature):
+    """저장된 상태를 반환한다 (없거나 좌표 공간이 다르면 None)."""
+    if not os.path.exists(state_path):
+        return None
+    state = joblib.load(state_path)
+    if state["signature"] != signature:
+        print(f"임베딩/차원 축소 설정이 바뀌어 이전 클러스터 상태를 사용하지 않습니다: {state_path}")
+        return None
+    return state
+
+
+def save_cluster_state(state_path, state):
+    os.makedirs(os.path.dirname(os.path.abspath(state_path)), exist_ok=True)
+    tmp_path = f"{state_path}.tmp"
+    joblib.dump(state, tmp_path)
+    os.replace(tmp_path, state_path)
+    print(f"클러스터 상태 저장: {state_path} (클러스터 {len(state['centroids'])}개)")
+
+
+def assign_to_centroids(emb, centroid_labels, centroids, radius, chunk_size=4096):
+    """가장 가까운 centroid까지의 거리가 radius 이하이면 그 라벨, 아니면 -1"""
+    labels = np.full(len(emb), -1, dtype=np.int64)
+    if len(emb) == 0 or len(centroids) == 0:
+        return labels
+    centroid_sq = (centroids ** 2).sum(axis=1)
+    for start in range(0, len(emb), chunk_size):
+        chunk = emb[start:start + chunk_size]
+        sq_dist = (chunk ** 2).sum(axis=1)[:, None] + centroid_sq[None, :] - 2 * chunk @ centroids.T
+        nearest = sq_dist.argmin(axis=1)
+        within = sq_dist[np.arange(len(chunk)), nearest] <= radius ** 2
+        labels[start:start + chunk_size][within] = centroid_labels[nearest[within]]
+    return labels
+
+
+def incremental_cluster(reduced_embeddings, keys, state, clustering_config, assign_radius=None):
+    """
+    이전 상태를 기준으로 라벨을 정하고 (labels, new_clusters)를 반환한다.
+    - assign_radius가 None이면 distance_threshold / sqrt(2) 사용
+      (큰 클러스터와 점 하나의 Ward 병합 거리 ≈ sqrt(2)·||x - c||가 임계값 미만인 경우에 해당)
+    - new_clusters: 이번 실행에서 새로 만들어진 라벨 목록 (키워드 생성 대상)
+    """
+    if state is None:
+        labels = cluster_embeddings(reduced_embeddings, **clustering_config)
+        return labels, sorted(np.unique(labels).tolist())
+
+    if assign_radius is None:
+        assign_radius = clustering_config.get("distance_threshold", 21.5) / np.sqrt(2)
+    previous = dict(zip(state["opinion_keys"].tolist(), state["opinion_labels"].tolist()))
+    labels = np.array([previous.get(key, -1) for key in keys.tolist()], dtype=np.int64)
+    is_new = labels < 0
+    print(f"이전에 처리한 opinion {int((~is_new).sum())}건, 새 opinion {int(is_new.sum())}건")
+
+    centroid_labels = np.array(list(state["centroids"].keys()), dtype=np.int64)
+    centroids = np.array(list(state["centroids"].values()), dtype=np.float32)
+    new_idx = np.flatnonzero(is_new)
+    labels[new_idx] = assign_to_centroids(reduced_embeddings[new_idx], centroid_labels, centroids, assign_radius)
+    leftover_idx = np.flatnonzero(labels < 0)
+    print(f"기존 클러스터에 배정: {len(new_idx) - len(leftover_idx)}건 (반경 {assign_radius:.2f}), "
+          f"새로 클러스터링: {len(leftover_idx)}건")
+
+    new_clusters = []
+    if len(leftover_idx) == 1:
+        next_label = int(centroid_labels.max()) + 1 if len(centroid_labels) else 0
+        labels[leftover_idx] = next_label
+        new_clusters = [next_label]
+    elif len(leftover_idx) > 1:
+        next_label = int(centroid_labels.max()) + 1 if len(centroid_labels) else 0
+        leftover_labels = cluster_embeddings(reduced_embeddings[leftover_idx], **clustering_config)
+        labels[leftover_idx] = leftover_labels + next_label
+        new_clusters = sorted((np.unique(leftover_labels) + next_label).tolist())
+    return labels, new_clusters
+
+
+def build_cluster_state(reduced_embeddings, keys, labels, keywords, signature, previous_state=None):
+    """현재 라벨로 centroid를 다시 계산한 상태를 만든다 (이번 데이터에 없는 이전 클러스터는 유지)."""
+    centroids = dict(previous_state["centroids"]) if previous_state else {}
+    sizes = dict(previous_state["sizes"]) if previous_state else {}
+    unique_labels, inverse, counts = np.unique(labels, return_inverse=True, return_counts=True)
+    sums = np.zeros((len(unique_labels), reduced_embeddings.shape[1]), dtype=np.float64)
+    np.add.at(sums, inverse, reduced_embeddings)
+    for label, total, count in zip(unique_labels.tolist(), sums, counts.tolist()):
+        centroids[label] = (total / count).astype(np.float32)
+        sizes[label] = count
+    return {
+        "signature": signature,
+        "centroids": centroids,
+        "sizes": sizes,
+        "keywords": dict(keywords),
+        "opinion_keys": np.asarray(keys, dtype="S16"),
+        "opinion_labels": np.asarray(labels, dtype=np.int64),
+    }
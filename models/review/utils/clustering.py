@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+[대규모 클러스터링 모듈]
+- 기존 agglomerative_clustering(전체 Ward, compute_full_tree)은 메모리/시간이 O(n²)이라 수만 건 이상에서 사용 불가
+- 같은 distance_threshold 기준을 유지하는 대체 방식 제공
+    - minibatch_ward: MiniBatchKMeans로 과분할(micro cluster)한 뒤, centroid에 크기 가중 Ward를 적용
+      (centroid 간 초기 거리를 sqrt(2·n_i·n_j/(n_i+n_j))·||c_i - c_j||로 두고 Lance-Williams로 갱신하므로
+       점 단위 Ward의 병합 거리와 같은 척도이며, 데이터가 n_micro_clusters 이하면 기존 Ward와 동일)
+    - knn_ward: kNN 그래프로 병합 후보를 제한한 Ward (sklearn connectivity)
+- cluster_embeddings(emb, method=...)로 선택하며 config.yaml의 keyword_recommendation.clustering 설정 사용
+"""
+
+import time
+import numpy as np
+from sklearn.cluster import AgglomerativeClustering, MiniBatchKMeans
+from sklearn.neighbors import kneighbors_graph
+
+CLUSTERING_METHODS = ("ward", "minibatch_ward", "knn_ward")
+
+
+def weighted_ward_linkage(centroids, sizes):
+    """
+    크기 가중 centroid에 대한 Ward 병합 목록 [(a, b, 병합 거리)]을 반환한다 (nearest-neighbor chain, O(k²)).
+    병합된 클러스터는 인덱스 a를 이어서 사용한다.
+    """
+    centroids = np.asarray(centroids, dtype=np.float64)
+    size = np.asarray(sizes, dtype=np.float64).copy()
+    num_clusters = len(centroids)
+    sq_norms = (centroids ** 2).sum(axis=1)
+    dist = np.maximum(sq_norms[:, None] + sq_norms[None, :] - 2 * centroids @ centroids.T, 0.0)
+    # 제곱 Ward 거리: 2·n_i·n_j/(n_i+n_j)·||c_i - c_j||²
+    dist *= 2 * size[:, None] * size[None, :] / (size[:, None] + size[None, :])
+    np.fill_diagonal(dist, np.inf)
+
+    merges = []
+    active = np.ones(num_clusters, dtype=bool)
+    chain = []
+    for _ in range(num_clusters - 1):
+        while True:
+            if not chain:
+                chain.append(int(np.flatnonzero(active)[0]))
+            a = chain[-1]
+            b = int(np.argmin(dist[a]))
+            # 동률이면 chain의 직전 원소를 우선 (무한 루프 방지)
+            if len(chain) > 1 and dist[a, chain[-2]] <= dist[a, b]:
+                b = chain[-2]
+            if len(chain) > 1 and b == chain[-2]:
+                chain = chain[:-2]
+                break
+            chain.append(b)
+        merged = ((size[a] + size) * dist[a] + (size[b] + size) * dist[b] - size * dist[a, b]) / (size[a] + size[b] + size)
+        merges.append((a, b, float(np.sqrt(dist[a, b]))))
+        merged[[a, b]] = np.inf
+        merged[~active] = np.inf
+        dist[a, :] = merged
+        dist[:, a] = merged
+        dist[b, :] = np.inf
+        dist[:, b] = np.inf
+        size[a] += size[b]
+        active[b] = False
+    return merges
+
+
+def cut_merges(merges, num_clusters, distance_threshold):
+    """병합 거리가 distance_threshold 미만인 병합만 적용한 라벨(0부터 연속)을 반환한다 (sklearn과 같은 기준)."""
+    parent = np.arange(num_clusters)
+
+    def find(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    # Ward는 병합 거리가 단조 증가하므로 거리 순으로 적용하면 dendrogram 절단과 같다
+    for a, b, distance in sorted(merges, key=lambda merge: merge[2]):
+        if distance >= distance_threshold:
+            break
+        parent[find(b)] = find(a)
+    roots = np.array([find(node) for node in range(num_clusters)])
+    _, labels = np.unique(roots, return_inverse=True)
+    return labels
+
+
+def minibatch_ward_clustering(emb, distance_threshold=21.5, n_micro_clusters=2000, batch_size=4096,
+                              random_state=42):
+    """
+    MiniBatchKMeans로 n_micro_clusters개로 과분할한 뒤 centroid에 크기 가중 Ward를 적용한다.
+    데이터 수가 n_micro_clusters 이하면 각 점을 그대로 micro cluster로 사용한다 (기존 Ward와 같은 결과).
+    """
+    emb = np.asarray(emb, dtype=np.float32)
+    if len(emb) <= n_micro_clusters:
+        micro_labels = np.arange(len(emb))
+        centroids, sizes = emb, np.ones(len(emb))
+    else:
+        kmeans = MiniBatchKMeans(n_clusters=n_micro_clusters, batch_size=batch_size, random_state=random_state,
+                                 n_init="auto")
+        micro_labels = kmeans.fit_predict(emb)
+        # 빈 micro cluster는 제외하고 실제 소속 점의 평균을 centroid로 사용
+        used, micro_labels, sizes = np.unique(micro_labels, return_inverse=True, return_counts=True)
+        centroids = np.zeros((len(used), emb.shape[1]), dtype=np.float64)
+        np.add.at(centroids, micro_labels, emb)
+        centroids /= sizes[:, None]
+    merges = weighted_ward_linkage(centroids, sizes)
+    return cut_merges(merges, len(centroids), distance_threshold)[micro_labels]
+
+
+def knn_ward_clustering(emb, distance_threshold=21.5, n_neighbors=15):
+    """kNN 그래프로 연결된 점끼리만 병합하는 Ward (sklearn connectivity 제약)"""
+    connectivity = kneighbors_graph(emb, n_neighbors=n_neighbors, include_self=False, n_jobs=-1)
+    clustering = AgglomerativeClustering(distance_threshold=distance_threshold, n_clusters=None,
+                                         compute_full_tree=True, linkage="ward", connectivity=connectivity)
+    return clustering.fit_predict(emb)
+
+
+def cluster_embeddings(emb, method="ward", distance_threshold=21.5, n_micro_clusters=2000, batch_size=4096,
+                       n_neighbors=15, random_state=42):
+    """
+    method에 따라 임베딩을 클러스터링하고 라벨을 반환한다.
+    - ward: 기존 전체 Ward (소규모 데이터)
+    - minibatch_ward: MiniBatchKMeans 과분할 + centroid 크기 가중 Ward
+    - knn_ward: kNN 그래프 제약 Ward
+    """
+    if method not in CLUSTERING_METHODS:
+        raise ValueError(f"지원하지 않는 클러스터링 방식: {method} (가능: {CLUSTERING_METHODS})")
+    start_time = time.time()
+    if method == "ward":
+        clustering = AgglomerativeClustering(distance_threshold=distance_threshold, n_clusters=None,
+                                             compute_full_tree=True, linkage="ward")
+        labels = clustering.fit_predict(emb)
+    elif method == "minibatch_ward":
+        labels = minibatch_ward_clustering(emb, distance_threshold=distance_threshold,
+                                           n_micro_clusters=n_micro_clusters, batch_size=batch_size,
+                                           random_state=random_state)
+    else:
+        labels = knn_ward_clustering(emb, distance_threshold=distance_threshold, n_neighbors=n_neighbors)
+    print(f"{method} 클러스터링 완료: {len(emb)}건, 클러스터 수 {np.unique(labels).shape[0]}, "
+          f"{time.time() - start_time:.2f}초")
+    return labels
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+[ASTE 출력 스키마 제약 디코딩 모듈]
+- </think> 이후의 답변을 아래 형식의 JSON 배열로만 생성되도록 logits를 제한
+    ```json
+    [{"속성": "<문자열>", "평가": "<문자열>", "감정": "<긍정|부정|중립>"}, ...]
+    ```
+- 토큰을 바이트 단위 오토마톤으로 검사하므로 byte-level BPE(Qwen 등)와 sentencepiece 토크나이저 모두 사용 가능
+  (문자열 값은 UTF-8 문자 경계에서만 닫히므로 한 글자가 여러 토큰으로 나뉘어도 깨진 문자가 남지 않음)
+- 생성 길이 한도(max_new_tokens)에 가까워지면
+    - 추론(<think>)이 끝나지 않은 경우 </think>를 강제로 삽입하고
+    - 답변 중이면 문자열/배열을 닫도록 강제하여 한 번의 생성으로 항상 파싱 가능한 결과를 보장
+
+사용 예시:
+    grammar = AsteJsonGrammar(tokenizer)
+    processor = make_aste_logits_processor_factory(grammar, tokenizer, max_new_tokens=512)()
+    model.generate(**inputs, max_new_tokens=512, logits_processor=LogitsProcessorList([processor]))
+"""
+
+from collections import defaultdict
+import numpy as np
+import torch
+from transformers import LogitsProcessor
+
+SENTIMENTS = ("긍정", "부정", "중립")
+QUOTE = ord('"')
+# 문자열 값에 허용하지 않는 바이트: 이스케이프가 필요한 문자, 코드 블록(```)을 닫을 수 있는 backtick
+FORBIDDEN_STRING_BYTES = (QUOTE, ord("\\"), ord("`"))
+
+# 문법 구성 요소 (인덱스가 곧 상태 번호)
+LIT_OPEN, BRANCH_FIRST, LIT_OBJ, STR_ASPECT, LIT_OPINION, STR_OPINION, \
+    LIT_SENTIMENT, CHOICE_SENTIMENT, LIT_OBJ_CLOSE, BRANCH_NEXT, LIT_SEP, LIT_CLOSE, END = range(13)
+NEXT_PART = {LIT_OPEN: BRANCH_FIRST, LIT_OBJ: STR_ASPECT, STR_ASPECT: LIT_OPINION, LIT_OPINION: STR_OPINION,
+             STR_OPINION: LIT_SENTIMENT, LIT_SENTIMENT: CHOICE_SENTIMENT, CHOICE_SENTIMENT: LIT_OBJ_CLOSE,
+             LIT_OBJ_CLOSE: BRANCH_NEXT, LIT_SEP: LIT_OBJ, LIT_CLOSE: END}
+
+
+def bytes_to_unicode():
+    """GPT-2 byte-level BPE의 바이트 -> 유니코드 문자 매핑 (transformers 버전과 무관하게 사용)"""
+    byte_values = list(range(ord("!"), ord("~") + 1)) + list(range(ord("¡"), ord("¬") + 1)) \
+        + list(range(ord("®"), ord("ÿ") + 1))
+    char_values = byte_values[:]
+    extra = 0
+    for byte in range(256):
+        if byte not in byte_values:
+            byte_values.append(byte)
+            char_values.append(256 + extra)
+            extra += 1
+    return dict(zip(byte_values, map(chr, char_values)))
+
+
+# UTF-8 검사 상태: 0은 문자 경계, 1~3은 continuation(0x80-0xBF) 바이트가 그 수만큼 남은 상태,
+# 4~7은 두 번째 바이트 범위가 좁은 lead(E0, ED, F0, F4) 직후 상태 (overlong / surrogate / U+10FFFF 초과 방지)
+UTF8_RANGES = {4: (0xA0, 0xBF, 1), 5: (0x80, 0x9F, 1), 6: (0x90, 0xBF, 2), 7: (0x80, 0x8F, 2)}
+UTF8_REMAINING = (0, 1, 2, 3, 2, 2, 3, 3)  # 상태별 남은 바이트 수
+UTF8_STATES = len(UTF8_REMAINING)
+
+
+def utf8_next(utf8_state, byte):
+    """UTF-8 검사 상태를 바이트 하나만큼 진행한다 (올바른 UTF-8이 아니면 None)."""
+    if utf8_state in UTF8_RANGES:
+        low, high, next_state = UTF8_RANGES[utf8_state]
+        return next_state if low <= byte <= high else None
+    if utf8_state:
+        return utf8_state - 1 if 0x80 <= byte <= 0xBF else None
+    if byte < 0x80:
+        return 0
+    if 0xC2 <= byte <= 0xDF:
+        return 1
+    if byte in (0xE0, 0xED, 0xF0, 0xF4):
+        return {0xE0: 4, 0xED: 5, 0xF0: 6, 0xF4: 7}[byte]
+    if 0xE1 <= byte <= 0xEF:
+        return 2
+    if 0xF1 <= byte <= 0xF3:
+        return 3
+    return None
+
+
+def build_token_bytes(tokenizer):
+    """
+    토큰 ID별 원시 바이트 테이블을 만든다.
+    byte-level BPE 토큰은 GPT-2 byte 매핑으로, sentencepiece의 <0xNN> / '▁' 토큰은 직접 변환한다.
+    special token과 추가 토큰(</think> 등)은 답변에 쓰이지 않도록 None으로 둔다.
+    """
+    byte_decoder = {char: byte for byte, char in bytes_to_unicode().items()}
+    excluded_ids = set(tokenizer.all_special_ids) | set(tokenizer.get_added_vocab().values())
+    table = [None] * len(tokenizer)
+    for token, token_id in tokenizer.get_vocab().items():
+        if token_id in excluded_ids or token_id >= len(table):
+            continue
+        if len(token) == 6 and token.startswith("<0x") and token.endswith(">"):
+            table[token_id] = bytes([int(token[3:5], 16)])
+        elif all(char in byte_decoder for char in token):
+            table[token_id] = bytes(byte_decoder[char] for char in token)
+        elif "▁" in token:
+            table[token_id] = token.replace("▁", " ").encode("utf-8")
+        else:
+            table[token_id] = tokenizer.convert_tokens_to_string([token]).encode("utf-8")
+    return table
+
+
+class AsteJsonGrammar:
+    """
+    ASTE triplet JSON 배열 문법의 바이트 단위 오토마톤.
+    상태는 (문법 위치, 위치 내 offset, 완성된 triplet 수, 감정 prefix, UTF-8 검사 상태) 튜플이며,
+    문자열 값은 따옴표/역슬래시/backtick/제어 문자를 제외한 최대 max_value_bytes 바이트의 올바른 UTF-8까지 허용한다
+    (닫는 따옴표는 UTF-8 문자 경계에서만 허용).
+    토크나이저별로 한 번 만들어 재사용한다 (토큰 바이트 테이블과 허용 토큰 목록을 캐시).
+    """
+
+    def __init__(self, tokenizer, prefix="\n\n```json\n", suffix="\n```", max_value_bytes=192, max_triplets=16):
+        self.token_bytes = build_token_bytes(tokenizer)
+        self.eos_token_id = tokenizer.eos_token_id
+        self.max_value_bytes = max_value_bytes
+        self.max_triplets = max_triplets
+        self.choices = tuple(sentiment.encode("utf-8") for sentiment in SENTIMENTS)
+        self.literals = {
+            LIT_OPEN: (prefix + "[").encode("utf-8"),
+            LIT_OBJ: '{"속성": "'.encode("utf-8"),
+            LIT_OPINION: '", "평가": "'.encode("utf-8"),
+            LIT_SENTIMENT: '", "감정": "'.encode("utf-8"),
+            LIT_OBJ_CLOSE: b'"}',
+            LIT_SEP: b", ",
+            LIT_CLOSE: ("]" + suffix).encode("utf-8"),
+        }
+        self.initial_state = (LIT_OPEN, 0, 0, b"", 0)
+
+        lengths = np.array([len(raw) if raw else 0 for raw in self.token_bytes])
+        safe = np.array([bool(raw) and all(byte >= 0x20 and byte not in FORBIDDEN_STRING_BYTES for byte in raw)
+                         for raw in self.token_bytes])
+        # 문자열 내부에서 그대로 허용되는 토큰 (따옴표로 닫지 않는 토큰)
+        self.safe_mask = torch.from_numpy(safe)
+        self.token_lengths = torch.from_numpy(lengths)
+        # 문자열 내부 토큰의 UTF-8 전이: utf8_exit[s, id] = UTF-8 검사 상태 s에서 토큰을 소비한 후의 상태 (-1: 불가)
+        utf8_exit = np.full((UTF8_STATES, len(self.token_bytes)), -1, dtype=np.int64)
+        for token_id in np.flatnonzero(safe).tolist():
+            for start in range(UTF8_STATES):
+                utf8_state = start
+                for byte in self.token_bytes[token_id]:
+                    utf8_state = utf8_next(utf8_state, byte)
+                    if utf8_state is None:
+                        break
+                if utf8_state is not None:
+                    utf8_exit[start, token_id] = utf8_state
+        self.utf8_exit = torch.from_numpy(utf8_exit)
+        self.utf8_remaining = torch.tensor(UTF8_REMAINING + (0,), dtype=torch.long)  # 인덱스 -1(불가)은 0
+        self.quote_ids = [token_id for token_id, raw in enumerate(self.token_bytes) if raw and QUOTE in raw]
+        self.first_byte_ids = defaultdict(list)
+        for token_id, raw in enumerate(self.token_bytes):
+            if raw:
+                self.first_byte_ids[raw[0]].append(token_id)
+        self._allowed_cache = {}
+
+    def _branch_targets(self, state, closing):
+        part, _, num_triplets, _, _ = state
+        if closing or num_triplets >= self.max_triplets:
+            return [LIT_CLOSE]
+        return [LIT_OBJ, LIT_CLOSE] if part == BRANCH_FIRST else [LIT_SEP, LIT_CLOSE]
+
+    def step(self, state, byte, closing=False):
+        """바이트 하나를 소비한 다음 상태를 반환한다 (허용되지 않으면 None)."""
+        part, offset, num_triplets, choice, utf8_state = state
+        if part in self.literals:
+            literal = self.literals[part]
+            if literal[offset] != byte:
+                return None
+            if offset + 1 < len(literal):
+                return (part, offset + 1, num_triplets, choice, 0)
+            if part == LIT_OBJ_CLOSE:
+                num_triplets += 1
+            return (NEXT_PART[part], 0, num_triplets, b"", 0)
+        if part in (BRANCH_FIRST, BRANCH_NEXT):
+            for target in self._branch_targets(state, closing):
+                if self.literals[target][0] == byte:
+                    return self.step((target, 0, num_triplets, b"", 0), byte, closing)
+            return None
+        if part in (STR_ASPECT, STR_OPINION):
+            if byte == QUOTE:
+                # 빈 문자열, UTF-8 문자 중간에서 닫는 것은 허용하지 않음
+                if offset == 0 or utf8_state:
+                    return None
+                return self.step((NEXT_PART[part], 0, num_triplets, b"", 0), byte, closing)
+            if byte < 0x20 or byte in FORBIDDEN_STRING_BYTES:
+                return None
+            utf8_state = utf8_next(utf8_state, byte)
+            # 시작한 문자를 max_value_bytes 안에서 끝낼 수 있어야 함
+            if utf8_state is None or offset + 1 + UTF8_REMAINING[utf8_state] > self.max_value_bytes:
+                return None
+            return (part, offset + 1, num_triplets, choice, utf8_state)
+        if part == CHOICE_SENTIMENT:
+            choice += bytes([byte])
+            if not any(option.startswith(choice) for option in self.choices):
+                return None
+            if choice in self.choices:
+                return (NEXT_PART[part], 0, num_triplets, b"", 0)
+            return (part, offset, num_triplets, choice, 0)
+        return None
+
+    def advance(self, state, token_id, closing=False):
+        """토큰 하나를 소비한 다음 상태를 반환한다 (허용되지 않으면 None)."""
+        raw = self.token_bytes[token_id] if token_id < len(self.token_bytes) else None
+        if not raw:
+            return None
+        for byte in raw:
+            state = self.step(state, byte, closing)
+            if state is None:
+                return None
+        return state
+
+    def _next_bytes(self, state, closing):
+        part, offset, _, choice, _ = state
+        if part in self.literals:
+            return {self.literals[part][offset]}
+        if part in (BRANCH_FIRST, BRANCH_NEXT):
+            return {self.literals[target][0] for target in self._branch_targets(state, closing)}
+        if part == CHOICE_SENTIMENT:
+            return {option[len(choice)] for option in self.choices if option.startswith(choice)}
+        return set()
+
+    def allowed_mask(self, state, closing, vocab_size):
+        """현재 상태에서 허용되는 토큰의 bool mask(vocab_size)를 반환한다."""
+        key = (state, closing)
+        if key not in self._allowed_cache:
+            part = state[0]
+            if part == END:
+                ids = [self.eos_token_id]
+            else:
+                if part in (STR_ASPECT, STR_OPINION):
+                    candidates = self.quote_ids
+                else:
+                    candidates = [token_id for byte in self._next_bytes(state, closing)
+                                  for token_id in self.first_byte_ids.get(byte, [])]
+                ids = [token_id for token_id in candidates if self.advance(state, token_id, closing) is not None]
+            self._allowed_cache[key] = torch.tensor(ids, dtype=torch.long)
+
+        mask = torch.zeros(vocab_size, dtype=torch.bool)
+        mask[self._allowed_cache[key]] = True
+        part, offset, _, _, utf8_state = state
+        # 문자열 내부: 닫는 중(closing)이 아니면 예산 안의 일반 토큰 허용 (빈 문자열 방지를 위해 첫 글자는 항상 허용)
+        # 닫는 중이면 쓰던 UTF-8 문자를 마저 끝내는 토큰만 허용 (문자 경계에서 따옴표로 닫음)
+        if part in (STR_ASPECT, STR_OPINION) and (not closing or offset == 0 or utf8_state):
+            remaining = self.max_value_bytes - offset
+            exit_state = self.utf8_exit[utf8_state]
+            string_mask = self.safe_mask & (exit_state >= 0) \
+                & (self.token_lengths + self.utf8_remaining[exit_state] <= remaining)
+            if closing:
+                # 문자 경계에서 끝나는 토큰, 또는 쓰던 문자의 남은 바이트 일부만 이어 쓰는 토큰
+                closing_mask = exit_state == 0
+                if utf8_state:
+                    closing_mask |= self.token_lengths + self.utf8_remaining[exit_state] == UTF8_REMAINING[utf8_state]
+                string_mask &= closing_mask
+            mask[:len(string_mask)] |= string_mask
+        return mask
+
+
+class AsteJsonLogitsProcessor(LogitsProcessor):
+    """
+    배치 generate 1회용 logits processor.
+    - </think> 전: 제약 없음. 단, 남은 토큰이 answer_reserve 이하이거나
+      추론 토큰이 thinking_budget에 도달하면 </think>를 강제 삽입
+    - </think> 후: AsteJsonGrammar가 허용하는 토큰만 남김
+    - 남은 토큰이 closing_reserve 이하이면 새 triplet을 시작하지 않고 현재 문자열/배열을 닫음
+    """
+
+    def __init__(self, grammar, think_end_ids, max_new_tokens, answer_reserve=160, closing_reserve=48,
+                 thinking_budget=None):
+        self.grammar = grammar
+        self.think_end_ids = list(think_end_ids)
+        self.max_new_tokens = max_new_tokens
+        self.thinking_budget = thinking_budget
+        self.answer_reserve = answer_reserve
+        self.closing_reserve = closing_reserve
+        self.prompt_len = None
+        self.rows = None
+
+    def _update_row(self, row, generated_ids):
+        for token_id in generated_ids[row["consumed"]:]:
+            if row["done"]:
+                break
+            if row["state"] is None:
+                row["tail"].append(token_id)
+                if row["tail"][-len(self.think_end_ids):] == self.think_end_ids:
+                    row["state"] = self.grammar.initial_state
+            else:
+                next_state = self.grammar.advance(row["state"], token_id, row["closing"])
+                # END 상태 이후(EOS/패딩)나 예외적인 토큰이면 더 이상 제약하지 않음
+                row["done"] = next_state is None
+                row["state"] = next_state
+        row["consumed"] = len(generated_ids)
+
+    def __call__(self, input_ids, scores):
+        if self.prompt_len is None:
+            self.prompt_len = input_ids.shape[1]
+            self.rows = [{"state": None, "tail": [], "consumed": 0, "forced": 0, "closing": False, "done": False}
+                         for _ in range(input_ids.shape[0])]
+        num_generated = input_ids.shape[1] - self.prompt_len
+        remaining = self.max_new_tokens - num_generated
+        over_budget = self.thinking_budget is not None and num_generated >= self.thinking_budget
+
+        for row_idx, row in enumerate(self.rows):
+            self._update_row(row, input_ids[row_idx, self.prompt_len:].tolist())
+            if row["done"]:
+                continue
+            if row["state"] is None:
+                # 답변 전에 EOS로 끝나지 않도록 차단
+                scores[row_idx, self.grammar.eos_token_id] = -float("inf")
+                if row["forced"] or over_budget or remaining <= self.answer_reserve:
+                    # 추론 예산 초과: </think> 토큰열을 순서대로 강제
+                    forced_id = self.think_end_ids[row["forced"]]
+                    row["forced"] += 1
+                    scores[row_idx, :] = -float("inf")
+                    scores[row_idx, forced_id] = 0.0
+                continue
+            row["closing"] = remaining <= self.closing_reserve
+            mask = self.grammar.allowed_mask(row["state"], row["closing"], scores.shape[-1]).to(scores.device)
+            scores[row_idx, ~mask] = -float("inf")
+        return scores
+
+
+def make_aste_logits_processor_factory(grammar, tokenizer, max_new_tokens, answer_reserve=160, closing_reserve=48,
+                                       thinking_budget=None):
+    """
+    배치마다 새 AsteJsonLogitsProcessor를 만드는 factory를 반환한다 (run_batched_generation용).
+    thinking_budget이 주어지면 추론 토큰이 예산에 도달한 행에 </think>를 강제한다 (utils/generation_control.py와 동일한 기준).
+    """
+    think_end_ids = tokenizer.encode("</think>", add_special_tokens=False)
+
+    def factory():
+        return AsteJsonLogitsProcessor(grammar, think_end_ids, max_new_tokens,
+                                       answer_reserve=answer_reserve, closing_reserve=closing_reserve,
+                                       thinking_budget=thinking_budget)
+    return factory
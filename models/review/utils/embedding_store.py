@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+[텍스트 임베딩 저장소 모듈]
+- 텍스트 해시(sha256 앞 16바이트) -> 행 번호 인덱스 + float16 임베딩 행렬(memory-mapped 파일)
+- append-only: 새 텍스트만 인코딩하여 파일 끝에 추가하고, 이미 저장된 텍스트는 다시 모델에 넣지 않음
+- 조회는 텍스트 목록 단위(bulk)로 하며, 행렬은 np.memmap으로 열어 파일 전체를 메모리에 읽지 않음
+  (matrix()는 복사 없는 memmap 뷰, get_or_encode()는 요청한 행만 읽은 float32 복사본)
+- 모델명별 하위 폴더에 저장하므로 여러 임베딩 모델을 함께 사용할 수 있음
+- 쓰기는 파일 lock(fcntl)으로 직렬화되어 여러 프로세스가 같은 저장소를 공유할 수 있음
+
+저장 구조 (기본 ~/.cache/foodly/embedding_store, 환경 변수 EMBEDDING_STORE_PATH로 변경):
+    <store_dir>/<모델명>/
+    ├── meta.json     # model_name, dim, dtype
+    ├── vectors.f16   # (행 수, dim) float16 행렬 (row-major, 헤더 없음)
+    └── keys.bin      # 행 순서대로 텍스트 해시 16바이트씩 (vectors 기록 후 추가 -> 기록 완료된 행만 인덱스에 반영)
+EMBEDDING_STORE_DISABLE=1 이면 저장소 없이 매번 인코딩한다.
+
+사용 예시:
+    store = get_embedding_store("dragonkue/BGE-m3-ko")
+    embeddings = store.get_or_encode(texts, encode_fn=lambda new_texts: encode_texts(new_texts, ...))
+"""
+
+import os
+import re
+import json
+import fcntl
+import hashlib
+import threading
+import numpy as np
+from functools import lru_cache
+
+DEFAULT_STORE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "foodly", "embedding_store")
+KEY_BYTES = 16
+DTYPE = np.float16
+
+
+def text_key(text) -> bytes:
+    return hashlib.sha256(str(text).encode("utf-8")).digest()[:KEY_BYTES]
+
+
+class EmbeddingStore:
+    def __init__(self, store_dir, model_name, enabled=True):
+        self.model_name = model_name
+        self.enabled = enabled
+        self.dir = os.path.join(store_dir, re.sub(r"[^0-9A-Za-z._-]+", "__", model_name))
+        self.meta_path = os.path.join(self.dir, "meta.json")
+        self.vectors_path = os.path.join(self.dir, "vectors.f16")
+        self.keys_path = os.path.join(self.dir, "keys.bin")
+        self.lock_path = os.path.join(self.dir, ".lock")
+        self._lock = threading.Lock()
+        self._index = {}     # text key -> row
+        self._num_rows = 0
+        self._matrix = None  # np.memmap (num_rows, dim)
+        self.dim = None
+        self.stats = {"lookups": 0, "hit": 0, "encoded": 0}
+        if self.enabled:
+            os.makedirs(self.dir, exist_ok=True)
+            self._refresh()
+
+    def _refresh(self):
+        """다른 프로세스가 추가한 행까지 인덱스에 반영한다 (keys.bin에 기록된 행만 유효)."""
+        if self.dim is None and os.path.exists(self.meta_path):
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta["model_name"] != self.model_name:
+                raise ValueError(f"임베딩 저장소 모델 불일치: {meta['model_name']} != {self.model_name} ({self.dir})")
+            self.dim = meta["dim"]
+        if self.dim is None or not os.path.exists(self.keys_path):
+            return
+        row_bytes = self.dim * np.dtype(DTYPE).itemsize
+        num_rows = min(os.path.getsize(self.keys_path) // KEY_BYTES, os.path.getsize(self.vectors_path) // row_bytes)
+        if num_rows == self._num_rows:
+            return
+        with open(self.keys_path, "rb") as f:
+            f.seek(self._num_rows * KEY_BYTES)
+            new_keys = f.read((num_rows - self._num_rows) * KEY_BYTES)
+        for offset in range(0, len(new_keys), KEY_BYTES):
+            self._index.setdefault(new_keys[offset:offset + KEY_BYTES], self._num_rows + offset // KEY_BYTES)
+        self._num_rows = num_rows
+        self._matrix = np.memmap(self.vectors_path, dtype=DTYPE, mode="r", shape=(num_rows, self.dim))
+
+    def __len__(self):
+        return self._num_rows
+
+    def lookup(self, texts) -> np.ndarray:
+        """텍스트별 행 번호 배열을 반환한다 (저장되지 않은 텍스트는 -1)."""
+        with self._lock:
+            self._refresh()
+            return np.fromiter((self._index.get(text_key(text), -1) for text in texts), dtype=np.int64,
+                               count=len(texts))
+
+    def matrix(self):
+        """저장된 전체 행렬의 memory-mapped 뷰 (읽기 전용, 복사 없음)"""
+        with self._lock:
+            self._refresh()
+            return self._matrix
+
+    def add(self, texts, vectors):
+        """새 텍스트의 임베딩을 파일 끝에 추가한다 (이미 저장된 텍스트는 무시)."""
+        vectors = np.asarray(vectors)
+        with self._lock, open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if self.dim is None and not os.path.exists(self.meta_path):
+                    with open(self.meta_path, "w", encoding="utf-8") as f:
+                        json.dump({"model_name": self.model_name, "dim": int(vectors.shape[1]),
+                                   "dtype": np.dtype(DTYPE).name}, f, ensure_ascii=False)
+                self._refresh()
+                if vectors.shape[1] != self.dim:
+                    raise ValueError(f"임베딩 차원 불일치: {vectors.shape[1]} != {self.dim} ({self.dir})")
+                new_rows = {}
+                for text, vector in zip(texts, vectors):
+                    key = text_key(text)
+                    if key not in self._index and key not in new_rows:
+                        new_rows[key] = vector
+                if not new_rows:
+                    return 0
+                # 비정상 종료로 keys.bin보다 길게 남은 vectors.f16 꼬리를 잘라낸 뒤 추가
+                row_bytes = self.dim * np.dtype(DTYPE).itemsize
+                with open(self.vectors_path, "ab") as f:
+                    f.truncate(self._num_rows * row_bytes)
+                    f.write(np.stack(list(new_rows.values())).astype(DTYPE).tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+                with open(self.keys_path, "ab") as f:
+                    f.truncate(self._num_rows * KEY_BYTES)
+                    f.write(b"".join(new_rows))
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._refresh()
+                return len(new_rows)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def get_or_encode(self, texts, encode_fn) -> np.ndarray:
+        """
+        텍스트 목록의 (N, dim) float32 임베딩을 반환한다 (요청한 행만 memmap에서 읽은 새 배열, 저장소 뷰가 아님).
+        저장소에 없는 고유 텍스트만 encode_fn(texts) -> (M, dim)으로 인코딩하여 추가한다.
+        행 번호가 연속 구간이면 (예: 저장 순서대로 다시 조회) fancy indexing 대신 slice로 읽어 중간 복사를 생략한다.
+        """
+        texts = [str(text) for text in texts]
+        if not self.enabled:
+            return np.asarray(encode_fn(texts), dtype=np.float32)
+        rows = self.lookup(texts)
+        missing = list(dict.fromkeys(text for text, row in zip(texts, rows) if row < 0))
+        self.stats["lookups"] += len(texts)
+        self.stats["hit"] += len(texts) - int((rows < 0).sum())
+        self.stats["encoded"] += len(missing)
+        if missing:
+            self.add(missing, encode_fn(missing))
+            rows = self.lookup(texts)
+        matrix = self.matrix()
+        if len(rows) == 0 or matrix is None:
+            # 빈 입력 (meta.json만 있고 저장된 행이 없는 저장소 포함)
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        if rows[-1] - rows[0] == len(rows) - 1 and (len(rows) == 1 or (np.diff(rows) == 1).all()):
+            return np.asarray(matrix[rows[0]:rows[-1] + 1], dtype=np.float32)
+        return np.asarray(matrix[rows], dtype=np.float32)
+
+    def report(self):
+        """조회 통계를 출력하고 반환한다 (encoded는 새로 인코딩한 고유 텍스트 수)."""
+        hit_rate = self.stats["hit"] / self.stats["lookups"] if self.stats["lookups"] else 0.0
+        print(f"[임베딩 저장소] {self.model_name}: 저장 {self._num_rows}건, 조회 {self.stats['lookups']}건 중 "
+              f"hit {self.stats['hit']} (hit rate {hit_rate:.1%}), 새로 인코딩 {self.stats['encoded']}건")
+        return dict(self.stats, rows=self._num_rows, hit_rate=hit_rate)
+
+
+@lru_cache(maxsize=None)
+def get_embedding_store(model_name, store_dir=None):
+    """모델명별 프로세스 전역 임베딩 저장소 (환경 변수 EMBEDDING_STORE_PATH, EMBEDDING_STORE_DISABLE)"""
+    store_dir = store_dir or os.environ.get("EMBEDDING_STORE_PATH", DEFAULT_STORE_DIR)
+    enabled = os.environ.get("EMBEDDING_STORE_DISABLE", "0") != "1"
+    return EmbeddingStore(store_dir, model_name, enabled=enabled)
@@ -1,14 +1,18 @@
 import json
+import torch
 import numpy as np
 import pandas as pd
 import seaborn as sns
-from tqdm import tqdm
 from ast import literal_eval
-from bert_score import score
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from bert_score import BERTScorer
+from bert_score.utils import get_hash, lang2model, model2layers
 import matplotlib.pyplot as plt
 import matplotlib.font_manager as fm
 from scipy.optimize import linear_sum_assignment
 from sklearn.metrics import confusion_matrix, classification_report
+from utils.similarity_cache import get_similarity_cache
 
 
 """
@@ -20,8 +24,14 @@ evaluate_aste(
     df, 
     golden_label_col="aste_golden_label", 
     model_prediction_col="aste_hcx", 
-    # eval_threshold=0.85
+    # eval_threshold=0.85,
+    # device="cpu",  # 기본값: GPU가 있으면 cuda, 없으면 cpu
+    # similarity="cosine", eval_threshold=...,  # 빠른 평가: BGE-m3-ko 임베딩 코사인 유사도 (임계값은 calibrate_cosine_threshold로 보정한 값 필수)
 )
+
+BERTScore 모델은 (lang, device)별로 한 번만 로드하여 재사용하고,
+DataFrame 전체의 (GL 평가, 예측 평가) 쌍을 중복 제거한 뒤 한 번의 배치 호출로 유사도를 계산한다.
+계산한 유사도는 디스크 캐시(utils/similarity_cache.py)에 저장되어, 다른 예측 칼럼/체크포인트 평가 시 처음 보는 쌍만 계산한다.
 """
 
 
@@ -67,36 +77,108 @@ def extract_triplets(json_str):
         return []
     
 
-def bertscore_similarity(text1, text2):
+def resolve_device(device=None):
+    """device가 None이면 GPU가 있을 때 cuda, 없으면 cpu"""
+    if device is None:
+        return "cuda" if torch.cuda.is_available() else "cpu"
+    return device
+
+
+@lru_cache(maxsize=None)
+def get_bert_scorer(lang="ko", device=None, model_type=None, num_layers=None):
+    """BERTScore 모델을 (lang, device, model_type)별로 한 번만 로드하여 재사용한다."""
+    return BERTScorer(lang=lang, device=resolve_device(device), model_type=model_type, num_layers=num_layers)
+
+
+def bertscore_model_id(lang="ko", model_type=None, num_layers=None):
+    """모델을 로드하지 않고 BERTScore 설정 식별자(모델명, 레이어, idf, 버전)를 만든다 (유사도 캐시 키)."""
+    model_type = model_type or lang2model[lang.lower()]
+    num_layers = num_layers or model2layers[model_type]
+    return get_hash(model_type, num_layers, False, False, False, False)
+
+
+def bertscore_pairs(text_pairs, device=None, batch_size=64):
+    """
+    (text1, text2) 쌍 목록의 BERTScore F1을 {(text1, text2): F1} 딕셔너리로 반환한다.
+    유사도 캐시(similarity_cache)에 없는 고유 쌍만 한 번의 배치 호출로 계산한다.
+    """
+    def score_fn(missing_pairs):
+        cands = [text1 for text1, _ in missing_pairs]
+        refs = [text2 for _, text2 in missing_pairs]
+        P, R, F1 = get_bert_scorer(device=resolve_device(device)).score(cands, refs, verbose=False, batch_size=batch_size)
+        return F1.tolist()
+
+    if not text_pairs:
+        return {}
+    return get_similarity_cache().get_or_score("bertscore", bertscore_model_id(), text_pairs, score_fn)
+
+
+def bertscore_matrix(texts1, texts2, device=None, batch_size=64):
+    """texts1 x texts2 전체 쌍의 BERTScore F1 행렬 (len(texts1), len(texts2))"""
+    scores = bertscore_pairs([(text1, text2) for text1 in texts1 for text2 in texts2], device, batch_size)
+    return np.array([[scores[(text1, text2)] for text2 in texts2] for text1 in texts1]).reshape(len(texts1), len(texts2))
+
+
+def bertscore_similarity(text1, text2, device=None):
     """
     BERTScore를 사용하여 두 문장의 유사도를 측정함.
     F1-score를 반환 (0~1).
     """
-    P, R, F1 = score([text1], [text2], lang="ko", verbose=False, device="cuda")
-    return F1.item()
+    return bertscore_pairs([(text1, text2)], device)[(text1, text2)]
+
+
+def instance_similarity_matrix(gl_triplets, hcx_triplets, pair_scores):
+    """미리 계산한 {(GL 평가, 예측 평가): 유사도}에서 인스턴스의 '평가' 유사도 행렬을 만든다."""
+    return np.array([[pair_scores[(gl["평가"], hcx["평가"])] for hcx in hcx_triplets] for gl in gl_triplets]
+                    ).reshape(len(gl_triplets), len(hcx_triplets))
+
+
+SIMILARITY_METHODS = ("bertscore", "cosine")
+# similarity별 기본 '평가' 매칭 임계값 (cosine은 기본값 없음: calibrate_cosine_threshold로 보정한 값을 명시)
+DEFAULT_EVAL_THRESHOLDS = {"bertscore": 0.85}
+DEFAULT_EMBEDDING_MODEL = "dragonkue/BGE-m3-ko"
+
+
+def embed_eval_texts(texts, model_name=DEFAULT_EMBEDDING_MODEL, batch_size=64):
+    """'평가' 문장들의 {문장: 정규화된 임베딩}을 반환한다 (임베딩 저장소에 없는 문장만 인코딩)."""
+    # utils.utils는 umap/hdbscan/sentence_transformers를 불러오고 matplotlib backend를 Agg로 바꾸므로
+    # BERTScore 평가나 그래프 출력에 영향이 없도록 cosine 경로에서만 import
+    from utils.utils import encode_texts
+    from utils.embedding_store import get_embedding_store
+    unique_texts = list(dict.fromkeys(texts))
+    if not unique_texts:
+        return {}
+    vectors = get_embedding_store(model_name).get_or_encode(
+        [str(text) for text in unique_texts],
+        encode_fn=lambda new_texts: encode_texts(new_texts, model_name=model_name, batch_size=batch_size)
+    )
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    return dict(zip(unique_texts, vectors))
+
+
+def cosine_similarity_matrix(gl_triplets, hcx_triplets, text_vectors):
+    """인스턴스의 '평가' 코사인 유사도 행렬 (GL 임베딩 행렬 x 예측 임베딩 행렬 전치, 행렬곱 1회)"""
+    if len(gl_triplets) == 0 or len(hcx_triplets) == 0:
+        return np.zeros((len(gl_triplets), len(hcx_triplets)))
+    gl_vectors = np.stack([text_vectors[gl["평가"]] for gl in gl_triplets])
+    hcx_vectors = np.stack([text_vectors[hcx["평가"]] for hcx in hcx_triplets])
+    return (gl_vectors @ hcx_vectors.T).astype(np.float64)
 
 
-def match_triplets(gl_triplets, hcx_triplets, eval_threshold=0.85):
+def match_triplets(gl_triplets, hcx_triplets, eval_threshold=0.85, sim_matrix=None, device=None):
     """
     GL와 HCX의 triplet 리스트 간에 '평가' 항목의 BERTScore 유사도를 기준으로
     1:1 매칭을 수행한다. Hungarian Algorithm을 활용하며, 유사도가 eval_threshold 이상인 경우만 후보로 선정한다.
+    sim_matrix(GL x HCX 유사도 행렬)를 주면 그대로 사용하고, 없으면 인스턴스의 전체 쌍을 한 번에 계산한다.
     
     반환: [(gl_index, hcx_index, similarity), ...] (similarity >= eval_threshold)
     """
     if len(gl_triplets) == 0 or len(hcx_triplets) == 0:
         return []  # 매칭 불가
     
-    num_gl = len(gl_triplets)
-    num_hcx = len(hcx_triplets)
-    cost_matrix = np.zeros((num_gl, num_hcx))
-    sim_matrix = np.zeros((num_gl, num_hcx))
-    
-    # 각 pair에 대해 '평가' 항목의 유사도를 계산하여 cost matrix 구성
-    for i, gl in enumerate(gl_triplets):
-        for j, hcx in enumerate(hcx_triplets):
-            sim = bertscore_similarity(gl["평가"], hcx["평가"])
-            sim_matrix[i, j] = sim
-            cost_matrix[i, j] = 1 - sim  # cost: 유사도가 높으면 낮은 cost
+    if sim_matrix is None:
+        sim_matrix = bertscore_matrix([gl["평가"] for gl in gl_triplets], [hcx["평가"] for hcx in hcx_triplets], device)
+    cost_matrix = 1 - sim_matrix  # cost: 유사도가 높으면 낮은 cost
     
     # Hungarian Algorithm 적용
     row_ind, col_ind = linear_sum_assignment(cost_matrix)
@@ -108,7 +190,7 @@ def match_triplets(gl_triplets, hcx_triplets, eval_threshold=0.85):
     return candidate_matches
 
 
-def evaluate_instance(gl_triplets, hcx_triplets, eval_threshold=0.85):
+def evaluate_instance(gl_triplets, hcx_triplets, eval_threshold=0.85, sim_matrix=None, device=None):
     """
     한 인스턴스(하나의 원문)에 대해 GL와 HCX triplet 세트를 평가한다.
     
@@ -133,7 +215,7 @@ def evaluate_instance(gl_triplets, hcx_triplets, eval_threshold=0.85):
     }
     
     # 1:1 매칭 (평가 항목 기준)
-    candidate_matches = match_triplets(gl_triplets, hcx_triplets, eval_threshold)
+    candidate_matches = match_triplets(gl_triplets, hcx_triplets, eval_threshold, sim_matrix, device)
     matched_gl_indices = set()
     matched_hcx_indices = set()
     
@@ -176,76 +258,48 @@ def evaluate_instance(gl_triplets, hcx_triplets, eval_threshold=0.85):
     return counts
 
 
-def aggregate_evaluation(df, golden_label_col, model_prediction_col, eval_threshold=0.85):
+FIELDS = ["속성", "평가", "감정"]
+
+
+def _parse_row(values):
+    gl_value, pred_value = values
+    return extract_triplets(gl_value), extract_triplets(pred_value)
+
+
+def _match_row(args):
+    gl_triplets, hcx_triplets, sim_matrix, eval_threshold = args
+    return match_triplets(gl_triplets, hcx_triplets, eval_threshold, sim_matrix)
+
+
+def _map_rows(fn, items, num_workers=1):
+    """행 단위 작업을 num_workers개 프로세스로 나눠 순서대로 실행한다 (1이면 현재 프로세스)."""
+    if num_workers is None or num_workers <= 1 or len(items) < 2:
+        return [fn(item) for item in items]
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        return list(executor.map(fn, items, chunksize=max(1, len(items) // (num_workers * 4))))
+
+
+def build_triplet_table(parsed_rows, row_matches):
     """
-    데이터프레임(df)의 각 인스턴스에 대해 GL와 HCX triplet 세트를 평가하고,
-    전체 TP, FN, FP를 집계하여 '속성', '평가', '감정' 각각에 대해 Precision, Recall, F1을 계산한다.
-    
-    동시에 속성(Aspect)과 감정(Sentiment)의 gold/pred 라벨을 수집하는데,
-    단순히 1:1 매칭된 경우뿐 아니라, 매칭되지 않은 triplet에 대해
-      - GL에만 존재하면 predicted는 "NO_PRED"로,
-      - 예측에만 존재하면 gold는 "NO_GOLD"로 기록하여 전체 평가에 반영한다.
-    
-    또한, '평가' 항목의 BERTScore 유사도 리스트도 축적한다.
-    
-    반환:
-      - metrics: 속성, 평가, 감정에 대한 Precision, Recall, F1-score 및 TP, FN, FP 개수
-      - classification_data: [aspects_gold, aspects_pred, sentiments_gold, sentiments_pred] (전체 사례)
-      - eval_similarities: 평가(BERTScore) 유사도 리스트 (매칭된 경우만)
+    파싱된 (GL, 예측) triplet과 매칭 결과를 하나의 표로 만든다.
+    열: row(행 번호), side("gold"/"pred"), index(행 내 순서), 속성, 평가, 감정,
+        match_index(매칭된 상대 triplet의 index, 없으면 -1), similarity(매칭 유사도, 없으면 NaN)
     """
-    total_counts = {
-        "속성": {"TP": 0, "FN": 0, "FP": 0},
-        "평가": {"TP": 0, "FN": 0, "FP": 0},
-        "감정": {"TP": 0, "FN": 0, "FP": 0}
-    }
-    
-    # 전체 classification 데이터를 위한 리스트 (매칭된 경우와 미매칭 사례 포함)
-    aspects_gold_all = []
-    aspects_pred_all = []
-    sentiments_gold_all = []
-    sentiments_pred_all = []
-    eval_similarities = []
-    
-    for idx, row in tqdm(df.iterrows(), total=len(df)):
-        gl_triplets = extract_triplets(row[golden_label_col])
-        hcx_triplets = extract_triplets(row[model_prediction_col])
-        
-        candidate_matches = match_triplets(gl_triplets, hcx_triplets, eval_threshold)
-        matched_gl_indices = set([i for i, j, sim in candidate_matches])
-        matched_hcx_indices = set([j for i, j, sim in candidate_matches])
-        
-        # 매칭된 경우: 실제 라벨을 기록
-        for i, j, sim in candidate_matches:
-            aspects_gold_all.append(gl_triplets[i]["속성"])
-            aspects_pred_all.append(hcx_triplets[j]["속성"])
-            sentiments_gold_all.append(gl_triplets[i]["감정"])
-            sentiments_pred_all.append(hcx_triplets[j]["감정"])
-            eval_similarities.append(sim)
-            
-        # 매칭되지 않은 GL triplet: 예측이 없으므로 predicted를 "NO_PRED"로 기록
-        for idx_gl, gl_triplet in enumerate(gl_triplets):
-            if idx_gl not in matched_gl_indices:
-                aspects_gold_all.append(gl_triplet["속성"])
-                aspects_pred_all.append("NO_PRED")
-                sentiments_gold_all.append(gl_triplet["감정"])
-                sentiments_pred_all.append("NO_PRED")
-        
-        # 매칭되지 않은 예측 triplet: GL에 해당하는 항목이 없으므로 gold를 "NO_GOLD"로 기록
-        for idx_hcx, hcx_triplet in enumerate(hcx_triplets):
-            if idx_hcx not in matched_hcx_indices:
-                aspects_gold_all.append("NO_GOLD")
-                aspects_pred_all.append(hcx_triplet["속성"])
-                sentiments_gold_all.append("NO_GOLD")
-                sentiments_pred_all.append(hcx_triplet["감정"])
-        
-        # 인스턴스별 평가 (전체 TP/FN/FP 집계)
-        counts = evaluate_instance(gl_triplets, hcx_triplets, eval_threshold)
-        for field in total_counts:
-            total_counts[field]["TP"] += counts[field]["TP"]
-            total_counts[field]["FN"] += counts[field]["FN"]
-            total_counts[field]["FP"] += counts[field]["FP"]
-    
-    # 각 필드별 Precision, Recall, F1 계산
+    records = []
+    for row, ((gl_triplets, hcx_triplets), matches) in enumerate(zip(parsed_rows, row_matches)):
+        gl_match = {i: (j, sim) for i, j, sim in matches}
+        hcx_match = {j: (i, sim) for i, j, sim in matches}
+        for side, triplets, match in (("gold", gl_triplets, gl_match), ("pred", hcx_triplets, hcx_match)):
+            for index, triplet in enumerate(triplets):
+                match_index, similarity = match.get(index, (-1, np.nan))
+                records.append((row, side, index, triplet["속성"], triplet["평가"], triplet["감정"],
+                                int(match_index), float(similarity)))
+    table = pd.DataFrame(records, columns=["row", "side", "index", *FIELDS, "match_index", "similarity"])
+    return table.astype({"row": np.int64, "index": np.int64, "match_index": np.int64, "similarity": np.float64})
+
+
+def compute_metrics(total_counts):
+    """필드별 TP, FN, FP로 Precision, Recall, F1 계산"""
     metrics = {}
     for field, vals in total_counts.items():
         TP = vals["TP"]
@@ -262,14 +316,169 @@ def aggregate_evaluation(df, golden_label_col, model_prediction_col, eval_thresh
             "FN": FN,
             "FP": FP
         }
-    
-    # 결과 출력
+    return metrics
+
+
+def run_evaluation_engine(df, golden_label_col, model_prediction_col, eval_threshold=None, device=None, batch_size=64,
+                          num_workers=1, similarity="bertscore", embedding_model=DEFAULT_EMBEDDING_MODEL):
+    """
+    각 행을 한 번만 파싱하고 한 번만 매칭하여, 평가에 필요한 모든 결과를 triplet 표에서 계산한다.
+      1. 전체 행 파싱 (num_workers개 프로세스)
+      2. similarity="bertscore": 전체 (GL 평가, 예측 평가) 쌍의 BERTScore를 한 번의 배치 호출로 계산
+         similarity="cosine": 전체 '평가' 문장을 한 번 임베딩하고 인스턴스마다 행렬곱 1회로 코사인 유사도 계산
+      3. 행별 Hungarian 매칭 (num_workers개 프로세스)
+      4. triplet 표에서 TP/FN/FP, classification_data, 라벨 목록, 유사도 리스트 계산
+
+    eval_threshold가 None이면 similarity별 기본값(DEFAULT_EVAL_THRESHOLDS)을 사용한다.
+    cosine은 보정되지 않은 임계값의 F1이 BERTScore 결과와 비교 불가능하므로 기본값 없이 ValueError를 발생시킨다.
+
+    반환: {"metrics", "classification_data", "eval_similarities", "labels": {"속성": [...], "감정": [...]}, "triplets"}
+    """
+    if similarity not in SIMILARITY_METHODS:
+        raise ValueError(f"지원하지 않는 유사도 방식: {similarity} (가능: {SIMILARITY_METHODS})")
+    if eval_threshold is None:
+        if similarity not in DEFAULT_EVAL_THRESHOLDS:
+            raise ValueError(f"similarity=\"{similarity}\"는 eval_threshold를 지정해야 합니다 "
+                             "(calibrate_cosine_threshold 또는 benchmark/aste_similarity_calibration.py로 보정)")
+        eval_threshold = DEFAULT_EVAL_THRESHOLDS[similarity]
+    values = list(zip(df[golden_label_col], df[model_prediction_col]))
+    parsed_rows = _map_rows(_parse_row, values, num_workers)
+    if similarity == "bertscore":
+        pair_scores = bertscore_pairs([(gl["평가"], hcx["평가"]) for gl_triplets, hcx_triplets in parsed_rows
+                                       for gl in gl_triplets for hcx in hcx_triplets], device, batch_size)
+        get_similarity_cache().report("bertscore")
+        sim_matrices = [instance_similarity_matrix(gl_triplets, hcx_triplets, pair_scores)
+                        for gl_triplets, hcx_triplets in parsed_rows]
+    else:
+        text_vectors = embed_eval_texts([triplet["평가"] for gl_triplets, hcx_triplets in parsed_rows
+                                         for triplet in gl_triplets + hcx_triplets], embedding_model, batch_size)
+        sim_matrices = [cosine_similarity_matrix(gl_triplets, hcx_triplets, text_vectors)
+                        for gl_triplets, hcx_triplets in parsed_rows]
+    match_args = [(gl_triplets, hcx_triplets, sim_matrix, eval_threshold)
+                  for (gl_triplets, hcx_triplets), sim_matrix in zip(parsed_rows, sim_matrices)]
+    row_matches = _map_rows(_match_row, match_args, num_workers)
+    table = build_triplet_table(parsed_rows, row_matches)
+
+    gold = table[table["side"] == "gold"]
+    pred = table[table["side"] == "pred"]
+    matched = gold[gold["match_index"] >= 0].merge(
+        pred[["row", "index", *FIELDS]], left_on=["row", "match_index"], right_on=["row", "index"],
+        suffixes=("_gold", "_pred"))
+    num_matched = len(matched)
+    num_unmatched_gold = int((gold["match_index"] < 0).sum())
+    num_unmatched_pred = int((pred["match_index"] < 0).sum())
+
+    # 매칭된 triplet: '평가'는 TP, '속성'/'감정'은 일치하면 TP, 불일치하면 FN과 FP
+    # 매칭되지 않은 triplet: 라벨에만 있으면 FN, 예측에만 있으면 FP (세 항목 모두)
+    total_counts = {}
+    for field in FIELDS:
+        tp = num_matched if field == "평가" else int((matched[f"{field}_gold"] == matched[f"{field}_pred"]).sum())
+        mismatched = num_matched - tp
+        total_counts[field] = {"TP": tp, "FN": mismatched + num_unmatched_gold, "FP": mismatched + num_unmatched_pred}
+
+    # classification_data: 행마다 매칭된 쌍 -> GL에만 있는 triplet(NO_PRED) -> 예측에만 있는 triplet(NO_GOLD) 순서
+    parts = [
+        pd.DataFrame({"row": matched["row"], "part": 0, "index": matched["index_gold"],
+                      "aspect_gold": matched["속성_gold"], "aspect_pred": matched["속성_pred"],
+                      "sentiment_gold": matched["감정_gold"], "sentiment_pred": matched["감정_pred"]}),
+        gold[gold["match_index"] < 0].assign(part=1, aspect_gold=lambda x: x["속성"], aspect_pred="NO_PRED",
+                                             sentiment_gold=lambda x: x["감정"], sentiment_pred="NO_PRED"),
+        pred[pred["match_index"] < 0].assign(part=2, aspect_gold="NO_GOLD", aspect_pred=lambda x: x["속성"],
+                                             sentiment_gold="NO_GOLD", sentiment_pred=lambda x: x["감정"]),
+    ]
+    ordered = pd.concat([part[["row", "part", "index", "aspect_gold", "aspect_pred", "sentiment_gold", "sentiment_pred"]]
+                         for part in parts], ignore_index=True).sort_values(["row", "part", "index"], kind="stable")
+    classification_data = [ordered[column].tolist() for column in ["aspect_gold", "aspect_pred", "sentiment_gold", "sentiment_pred"]]
+    eval_similarities = gold[gold["match_index"] >= 0].sort_values(["row", "index"])["similarity"].tolist()
+    labels = {field: sorted(set(table[field].tolist()) | {"NO_PRED", "NO_GOLD"}) for field in ["속성", "감정"]}
+
+    return {
+        "metrics": compute_metrics(total_counts),
+        "classification_data": classification_data,
+        "eval_similarities": eval_similarities,
+        "labels": labels,
+        "triplets": table,
+    }
+
+
+def print_metrics(metrics):
     print("최종 평가 결과:")
     for field, m in metrics.items():
         print(f"{field} -> Precision: {m['Precision']:.4f}, Recall: {m['Recall']:.4f}, F1: {m['F1']:.4f} (TP: {m['TP']}, FN: {m['FN']}, FP: {m['FP']})")
+
+
+def aggregate_evaluation(df, golden_label_col, model_prediction_col, eval_threshold=None, device=None, batch_size=64,
+                         num_workers=1, similarity="bertscore"):
+    """
+    데이터프레임(df)의 각 인스턴스에 대해 GL와 HCX triplet 세트를 평가하고,
+    전체 TP, FN, FP를 집계하여 '속성', '평가', '감정' 각각에 대해 Precision, Recall, F1을 계산한다.
     
-    classification_data = [aspects_gold_all, aspects_pred_all, sentiments_gold_all, sentiments_pred_all]
-    return metrics, classification_data, eval_similarities
+    동시에 속성(Aspect)과 감정(Sentiment)의 gold/pred 라벨을 수집하는데,
+    단순히 1:1 매칭된 경우뿐 아니라, 매칭되지 않은 triplet에 대해
+      - GL에만 존재하면 predicted는 "NO_PRED"로,
+      - 예측에만 존재하면 gold는 "NO_GOLD"로 기록하여 전체 평가에 반영한다.
+    
+    또한, '평가' 항목의 BERTScore 유사도 리스트도 축적한다.
+    각 행은 run_evaluation_engine에서 한 번만 파싱, 매칭된다.
+    
+    반환:
+      - metrics: 속성, 평가, 감정에 대한 Precision, Recall, F1-score 및 TP, FN, FP 개수
+      - classification_data: [aspects_gold, aspects_pred, sentiments_gold, sentiments_pred] (전체 사례)
+      - eval_similarities: 평가(BERTScore) 유사도 리스트 (매칭된 경우만)
+    """
+    result = run_evaluation_engine(df, golden_label_col, model_prediction_col, eval_threshold, device, batch_size,
+                                   num_workers, similarity)
+    print_metrics(result["metrics"])
+    return result["metrics"], result["classification_data"], result["eval_similarities"]
+
+
+def calibrate_cosine_threshold(df, golden_label_col, model_prediction_col, bertscore_threshold=0.85, device=None,
+                               embedding_model=DEFAULT_EMBEDDING_MODEL, batch_size=64):
+    """
+    골든 라벨 데이터의 모든 (GL 평가, 예측 평가) 후보 쌍에 대해, BERTScore 매칭 여부(F1 >= bertscore_threshold)와
+    가장 많이 일치하도록 코사인 유사도 임계값을 고른다.
+    (코사인 값 정렬 후 누적합으로 모든 후보 임계값의 일치율을 한 번에 계산, 임계값은 인접한 두 값의 중간)
+
+    반환: {"threshold", "agreement"(결정 일치율), "precision", "recall", "num_pairs", "bertscore_positive"}
+    """
+    parsed_rows = [_parse_row(values) for values in zip(df[golden_label_col], df[model_prediction_col])]
+    pairs = list(dict.fromkeys((gl["평가"], hcx["평가"]) for gl_triplets, hcx_triplets in parsed_rows
+                               for gl in gl_triplets for hcx in hcx_triplets))
+    if not pairs:
+        raise ValueError("보정에 사용할 (GL 평가, 예측 평가) 쌍이 없습니다.")
+    bert_scores = bertscore_pairs(pairs, device, batch_size)
+    text_vectors = embed_eval_texts([text for pair in pairs for text in pair], embedding_model, batch_size)
+    cosine = np.array([float(text_vectors[text1] @ text_vectors[text2]) for text1, text2 in pairs])
+    target = np.array([bert_scores[pair] >= bertscore_threshold for pair in pairs])
+
+    # 코사인 내림차순으로 정렬하여, 상위 k개를 매칭으로 판단할 때의 일치 수를 k = 0..N에 대해 계산
+    order = np.argsort(-cosine, kind="stable")
+    sorted_cosine, sorted_target = cosine[order], target[order]
+    true_positive = np.concatenate([[0], np.cumsum(sorted_target)])
+    k = np.arange(len(pairs) + 1)
+    agreement = (true_positive + (len(pairs) - k) - (target.sum() - true_positive)) / len(pairs)
+    # 같은 코사인 값 사이에서는 나눌 수 없으므로 값이 바뀌는 위치(와 양 끝)만 후보로 사용
+    valid = np.concatenate([[True], sorted_cosine[:-1] > sorted_cosine[1:], [True]])
+    best = int(np.flatnonzero(valid)[np.argmax(agreement[valid])])
+    if best == 0:
+        threshold = float(sorted_cosine[0]) + 1e-6
+    elif best == len(pairs):
+        threshold = float(sorted_cosine[-1])
+    else:
+        threshold = float((sorted_cosine[best - 1] + sorted_cosine[best]) / 2)
+
+    predicted = cosine >= threshold
+    result = {
+        "threshold": threshold,
+        "agreement": float((predicted == target).mean()),
+        "precision": float((predicted & target).sum() / max(predicted.sum(), 1)),
+        "recall": float((predicted & target).sum() / max(target.sum(), 1)),
+        "num_pairs": len(pairs),
+        "bertscore_positive": int(target.sum()),
+    }
+    print(f"코사인 임계값 보정: {threshold:.4f} (BERTScore >= {bertscore_threshold} 결정과 일치율 {result['agreement']:.1%}, "
+          f"precision {result['precision']:.3f}, recall {result['recall']:.3f}, 쌍 {len(pairs)}개)")
+    return result
 
 
 def extract_unique_labels(df, golden_label_col, model_prediction_col, field):
@@ -327,22 +536,23 @@ def plot_evaluation_similarity(eval_similarities):
     plt.show()
 
 
-def compute_confusion_and_report(df, golden_label_col, model_prediction_col, classification_data):
+def compute_confusion_and_report(df, golden_label_col, model_prediction_col, classification_data, labels=None):
     """
     축적된 gold와 predicted 라벨을 이용하여, 속성과 감정에 대한 Confusion Matrix와
     Classification Report를 출력한다.
+    labels({"속성": [...], "감정": [...]}, run_evaluation_engine 결과)가 주어지면 df를 다시 파싱하지 않는다.
     """
     aspects_gold, aspects_pred, sentiments_gold, sentiments_pred = classification_data
     
     print("=== 속성 (Aspect) Confusion Matrix ===")
-    aspect_labels = extract_unique_labels(df, golden_label_col, model_prediction_col, "속성")
+    aspect_labels = labels["속성"] if labels else extract_unique_labels(df, golden_label_col, model_prediction_col, "속성")
     plot_confusion_matrix(aspects_gold, aspects_pred, labels=aspect_labels, title="Aspect Confusion Matrix")
     
     print("\n=== 속성 (Aspect) Classification Report ===")
     print(classification_report(aspects_gold, aspects_pred))
     
     print("=== 감정 (Sentiment) Confusion Matrix ===")
-    sentiment_labels = extract_unique_labels(df, golden_label_col, model_prediction_col, "감정")
+    sentiment_labels = labels["감정"] if labels else extract_unique_labels(df, golden_label_col, model_prediction_col, "감정")
     plot_confusion_matrix(sentiments_gold, sentiments_pred, labels=sentiment_labels, title="Sentiment Confusion Matrix")
     
     print("\n=== 감정 (Sentiment) Classification Report ===")
@@ -370,11 +580,13 @@ def compute_eval_statistics(eval_similarities):
     return avg_similarity, median_similarity, std_similarity
 
 
-def evaluate_aste(df, golden_label_col, model_prediction_col, eval_threshold=0.85):
+def evaluate_aste(df, golden_label_col, model_prediction_col, eval_threshold=None, device=None, num_workers=1,
+                  similarity="bertscore"):
     """
     전체 평가 과정을 한 번에 실행하는 Wrapper 함수.
 
-    1. aggregate_evaluation() 실행하여 성능 메트릭, Confusion Matrix용 데이터, 유사도 리스트 계산
+    1. run_evaluation_engine() 실행하여 각 행을 한 번씩 파싱/매칭하고 성능 메트릭, Confusion Matrix용 데이터,
+       라벨 목록, 유사도 리스트 계산
     2. compute_confusion_and_report() 실행하여 Confusion Matrix 및 Classification Report 출력
     3. compute_eval_statistics() 실행하여 BERTScore 유사도 통계 출력
 
@@ -382,7 +594,10 @@ def evaluate_aste(df, golden_label_col, model_prediction_col, eval_threshold=0.8
         df (pd.DataFrame): 평가할 데이터프레임
         golden_label_col (str): 골든 라벨 컬럼명
         model_prediction_col (str): 모델 예측 컬럼명
-        eval_threshold (float): BERTScore 유사도 기준 임계값
+        eval_threshold (float): '평가' 유사도 기준 임계값 (None이면 bertscore 0.85, cosine은 보정한 값 필수)
+        device (str): BERTScore 계산 장치 ("cuda", "cpu" 등, None이면 GPU 유무로 자동 선택)
+        num_workers (int): 행 파싱/매칭에 사용할 프로세스 수 (1이면 현재 프로세스)
+        similarity (str): '평가' 매칭 유사도 ("bertscore" 또는 "cosine": BGE-m3-ko 임베딩 코사인, CPU에서 빠름)
 
     Returns:
         dict: 전체 평가 메트릭 (metrics)
@@ -390,20 +605,28 @@ def evaluate_aste(df, golden_label_col, model_prediction_col, eval_threshold=0.8
         list: 평가(BERTScore) 유사도 리스트 (eval_similarities)
     """
     print("\n=== Step 1: Aggregate Evaluation ===")
-    metrics, classification_data, eval_similarities = aggregate_evaluation(
+    result = run_evaluation_engine(
         df, 
         golden_label_col=golden_label_col, 
         model_prediction_col=model_prediction_col, 
-        eval_threshold=eval_threshold
+        eval_threshold=eval_threshold,
+        device=device,
+        num_workers=num_workers,
+        similarity=similarity
     )
+    metrics, classification_data, eval_similarities = result["metrics"], result["classification_data"], result["eval_similarities"]
+    print_metrics(metrics)
 
     print("\n=== Step 2: Compute Confusion Matrix and Classification Report ===")
     compute_confusion_and_report(
         df=df, 
         golden_label_col=golden_label_col, 
         model_prediction_col=model_prediction_col,
-        classification_data=classification_data
+        classification_data=classification_data,
+        labels=result["labels"]
     )
 
     print("\n=== Step 3: Compute Evaluation Statistics (BERTScore Similarity) ===")
     compute_eval_statistics(eval_similarities)
+
+    return metrics, classification_data, eval_similarities
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+[R1-distill 생성 제어 모듈]
+- 추론 토큰 예산(thinking_budget): <think> 구간이 예산을 넘으면 </think>와 답변 시작("```json")을 강제 삽입
+- JSON 조기 종료: </think> 이후 최상위 JSON 배열이 닫히면 해당 행의 생성을 즉시 종료
+  (문자열 안의 괄호는 무시하며, 큰따옴표/작은따옴표 문자열 모두 처리)
+- 둘 다 행(리뷰)별로 동작하므로 배치 생성(utils/batch_generation.py)에서 그대로 사용할 수 있다.
+
+사용 예시:
+    processor = make_thinking_budget_factory(tokenizer, thinking_budget=256)()
+    stopper = make_json_stop_factory(tokenizer)()
+    model.generate(**inputs, max_new_tokens=512,
+                   logits_processor=LogitsProcessorList([processor]),
+                   stopping_criteria=StoppingCriteriaList([stopper]))
+"""
+
+import yaml
+import torch
+from transformers import LogitsProcessor, StoppingCriteria
+
+from utils.constrained_decoding import AsteJsonGrammar, make_aste_logits_processor_factory
+
+THINK_END = "</think>"
+ANSWER_PREFIX = "\n\n```json\n"
+_GRAMMAR_CACHE = {}  # id(tokenizer) -> (tokenizer, AsteJsonGrammar)
+
+
+class ThinkingBudgetLogitsProcessor(LogitsProcessor):
+    """
+    배치 generate 1회용 logits processor.
+    행별로 </think>가 나오기 전 생성 토큰 수를 세고, thinking_budget에 도달하면
+    forced_ids(</think> + 답변 시작 토큰열)를 순서대로 강제한다.
+    모델이 예산 안에 스스로 </think>를 생성하면 이후로는 관여하지 않는다.
+    """
+
+    def __init__(self, think_end_ids, forced_ids, thinking_budget):
+        self.think_end_ids = list(think_end_ids)
+        self.forced_ids = list(forced_ids)
+        self.thinking_budget = thinking_budget
+        self.prompt_len = None
+        self.rows = None
+
+    def __call__(self, input_ids, scores):
+        if self.prompt_len is None:
+            self.prompt_len = input_ids.shape[1]
+            self.rows = [{"closed": False, "forced": 0} for _ in range(input_ids.shape[0])]
+        num_generated = input_ids.shape[1] - self.prompt_len
+
+        for row_idx, row in enumerate(self.rows):
+            if row["forced"] >= len(self.forced_ids):
+                continue
+            if row["forced"] == 0:
+                if row["closed"]:
+                    continue
+                tail = input_ids[row_idx, max(self.prompt_len, input_ids.shape[1] - len(self.think_end_ids)):].tolist()
+                if tail == self.think_end_ids:
+                    row["closed"] = True
+                    continue
+                if num_generated < self.thinking_budget:
+                    continue
+            # 추론 예산 초과: </think> + 답변 시작 토큰열을 순서대로 강제
+            forced_id = self.forced_ids[row["forced"]]
+            row["forced"] += 1
+            scores[row_idx, :] = -float("inf")
+            scores[row_idx, forced_id] = 0.0
+        return scores
+
+
+class JsonArrayStoppingCriteria(StoppingCriteria):
+    """
+    배치 generate 1회용 stopping criteria.
+    </think> 이후 처음 열린 '['가 짝이 맞게 닫히면 해당 행을 종료(True)로 표시한다.
+    이후 토큰은 generate가 패딩으로 채우므로 코드 블록 닫기("```")와 EOS를 기다리지 않는다.
+    """
+
+    def __init__(self, tokenizer, think_end_ids, token_text_cache):
+        self.tokenizer = tokenizer
+        self.think_end_ids = list(think_end_ids)
+        self.token_text_cache = token_text_cache
+        self.prompt_len = None
+        self.rows = None
+
+    def _token_text(self, token_id):
+        text = self.token_text_cache.get(token_id)
+        if text is None:
+            text = self.tokenizer.decode([token_id])
+            self.token_text_cache[token_id] = text
+        return text
+
+    def _update_row(self, row, generated_ids):
+        for token_id in generated_ids[row["consumed"]:]:
+            if not row["answer"]:
+                row["tail"] = (row["tail"] + [token_id])[-len(self.think_end_ids):]
+                row["answer"] = row["tail"] == self.think_end_ids
+                continue
+            for char in self._token_text(token_id):
+                if row["quote"]:
+                    if row["escape"]:
+                        row["escape"] = False
+                    elif char == "\\":
+                        row["escape"] = True
+                    elif char == row["quote"]:
+                        row["quote"] = None
+                elif char == "[":
+                    row["depth"] += 1
+                elif char == "]" and row["depth"] > 0:
+                    row["depth"] -= 1
+                    if row["depth"] == 0:
+                        row["stopped"] = True
+                        break
+                elif char in "\"'" and row["depth"] > 0:
+                    row["quote"] = char
+            if row["stopped"]:
+                break
+        row["consumed"] = len(generated_ids)
+
+    def __call__(self, input_ids, scores, **kwargs):
+        if self.prompt_len is None:
+            # 첫 호출 시점에는 이미 토큰 1개가 생성되어 있음
+            self.prompt_len = input_ids.shape[1] - 1
+            self.rows = [{"answer": False, "tail": [], "consumed": 0, "depth": 0, "quote": None,
+                          "escape": False, "stopped": False} for _ in range(input_ids.shape[0])]
+        for row_idx, row in enumerate(self.rows):
+            if not row["stopped"]:
+                self._update_row(row, input_ids[row_idx, self.prompt_len:].tolist())
+        return torch.tensor([row["stopped"] for row in self.rows], dtype=torch.bool, device=input_ids.device)
+
+
+def make_thinking_budget_factory(tokenizer, thinking_budget, answer_prefix=ANSWER_PREFIX):
+    """배치마다 새 ThinkingBudgetLogitsProcessor를 만드는 factory를 반환한다 (run_batched_generation용)."""
+    think_end_ids = tokenizer.encode(THINK_END, add_special_tokens=False)
+    forced_ids = tokenizer.encode(THINK_END + answer_prefix, add_special_tokens=False)
+
+    def factory():
+        return ThinkingBudgetLogitsProcessor(think_end_ids, forced_ids, thinking_budget)
+    return factory
+
+
+def make_json_stop_factory(tokenizer):
+    """배치마다 새 JsonArrayStoppingCriteria를 만드는 factory를 반환한다 (토큰 디코딩 결과는 공유 캐시)."""
+    think_end_ids = tokenizer.encode(THINK_END, add_special_tokens=False)
+    token_text_cache = {}
+
+    def factory():
+        return JsonArrayStoppingCriteria(tokenizer, think_end_ids, token_text_cache)
+    return factory
+
+
+def get_aste_grammar(tokenizer):
+    """
+    토크나이저별 AsteJsonGrammar를 한 번만 만든다 (vocab 전체 바이트 테이블 구성을 매 호출 반복하지 않음).
+    토크나이저 참조도 함께 보관하므로 같은 id가 다른 토크나이저에 재사용되지 않는다.
+    """
+    cached = _GRAMMAR_CACHE.get(id(tokenizer))
+    if cached is None:
+        cached = (tokenizer, AsteJsonGrammar(tokenizer))
+        _GRAMMAR_CACHE[id(tokenizer)] = cached
+    return cached[1]
+
+
+def make_generation_controls(tokenizer, max_new_tokens=512, thinking_budget=None, early_stop=False,
+                             constrained=False):
+    """
+    ASTE 생성 옵션으로 (logits_processor_factory, stopping_criteria_factory)를 만든다.
+    constrained=True이면 스키마 제약 processor가 추론 예산도 함께 처리한다 (답변 시작은 문법이 강제).
+    """
+    logits_processor_factory = None
+    if constrained:
+        grammar = get_aste_grammar(tokenizer)
+        logits_processor_factory = make_aste_logits_processor_factory(grammar, tokenizer, max_new_tokens=max_new_tokens,
+                                                                      thinking_budget=thinking_budget)
+    elif thinking_budget is not None:
+        logits_processor_factory = make_thinking_budget_factory(tokenizer, thinking_budget)
+    stopping_criteria_factory = make_json_stop_factory(tokenizer) if early_stop else None
+    return logits_processor_factory, stopping_criteria_factory
+
+
+def load_generation_config(model_key, config_path="config/config.yaml"):
+    """
+    config.yaml의 aste_inference 공통 설정에 모델별(model_key) 설정을 덮어쓴 dict를 반환한다.
+    예: load_generation_config("deepseek_14b") -> {"max_new_tokens", "early_stop", "batch_size", "thinking_budget", ...}
+    """
+    with open(config_path, "r", encoding="utf-8") as f:
+        section = yaml.safe_load(f).get("aste_inference", {})
+    generation_config = {key: value for key, value in section.items() if not isinstance(value, dict)}
+    generation_config.update(section.get(model_key, {}))
+    return generation_config
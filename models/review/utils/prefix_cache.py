@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+[프롬프트 prefix KV 캐시 모듈]
+- ASTE 프롬프트 템플릿에서 {review} 앞의 고정 부분(지시문 + 예시)을 한 번만 prefill하여 past_key_values를 보관
+- 배치 생성 시 캐시를 배치 크기만큼 복제하여 리뷰별 suffix만 새로 계산
+- 캐시 항목은 (모델, prefix 텍스트 해시, special token 여부)로 식별하며,
+  같은 모델에 다른 템플릿이 들어오면 이전 항목은 삭제(무효화)
+- 리뷰당 절약된 prefill 토큰 수 / 시간 리포트
+"""
+
+import copy
+import time
+import hashlib
+import threading
+import torch
+
+REVIEW_SENTINEL = "\u0000REVIEW\u0000"
+
+
+def template_prefix(build_prompt_fn) -> str:
+    """build_prompt_fn(review)로 만든 최종 입력에서 리뷰 앞의 고정 prefix 문자열을 반환한다."""
+    prompt = build_prompt_fn(REVIEW_SENTINEL)
+    if REVIEW_SENTINEL not in prompt:
+        raise ValueError("프롬프트 템플릿에서 리뷰 위치를 찾을 수 없습니다.")
+    return prompt.split(REVIEW_SENTINEL, 1)[0]
+
+
+class PrefixKVCache:
+    """
+    프로세스 전역 prefix KV 캐시.
+    get()으로 받은 항목의 past_key_values는 공유 객체이므로, 생성에는 expand_for_batch()로 복제해서 사용한다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> entry
+
+    @staticmethod
+    def make_key(model, prefix_text, add_special_tokens):
+        template_hash = hashlib.sha256(prefix_text.encode("utf-8")).hexdigest()
+        return (id(model), template_hash, add_special_tokens)
+
+    def get(self, model, tokenizer, prefix_text, add_special_tokens=False):
+        """
+        prefix의 KV 캐시 항목을 반환한다 (없으면 prefill 후 저장).
+        반환: {"prefix_text", "prefix_ids", "past_key_values", "prefill_time", "template_hash"}
+        """
+        key = self.make_key(model, prefix_text, add_special_tokens)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry
+            # 같은 모델의 이전 템플릿 캐시는 무효화
+            self._entries = {cached_key: cached for cached_key, cached in self._entries.items()
+                             if cached_key[0] != id(model)}
+
+            prefix_ids = tokenizer(prefix_text, return_tensors="pt",
+                                   add_special_tokens=add_special_tokens)["input_ids"].to(model.device)
+            start_time = time.time()
+            with torch.no_grad():
+                outputs = model(input_ids=prefix_ids, use_cache=True)
+            prefill_time = time.time() - start_time
+            entry = {
+                "prefix_text": prefix_text,
+                "prefix_ids": prefix_ids[0].tolist(),
+                "past_key_values": outputs.past_key_values,
+                "prefill_time": prefill_time,
+                "template_hash": key[1],
+            }
+            self._entries[key] = entry
+            print(f"prefix KV 캐시 생성: {len(entry['prefix_ids'])} 토큰, prefill {prefill_time:.3f}초 "
+                  f"(template {key[1][:12]})")
+            return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def expand_for_batch(entry, batch_size):
+    """캐시 항목의 past_key_values를 복제하여 batch_size만큼 확장한다 (generate가 캐시를 변경하므로 매번 복제)."""
+    past_key_values = copy.deepcopy(entry["past_key_values"])
+    if batch_size > 1:
+        past_key_values.batch_repeat_interleave(batch_size)
+    return past_key_values
+
+
+def build_prefixed_inputs(entry, suffix_ids, pad_token_id, device):
+    """
+    [prefix | left padding | suffix] 형태의 input_ids / attention_mask를 만든다.
+    prefix는 모든 행에서 같은 위치(0..P-1)에 있으므로 캐시된 KV를 그대로 사용할 수 있고,
+    중간의 패딩은 attention_mask로 가려진다.
+    """
+    prefix_ids = entry["prefix_ids"]
+    max_len = max(len(ids) for ids in suffix_ids)
+    input_ids, attention_mask = [], []
+    for ids in suffix_ids:
+        num_pad = max_len - len(ids)
+        input_ids.append(prefix_ids + [pad_token_id] * num_pad + ids)
+        attention_mask.append([1] * len(prefix_ids) + [0] * num_pad + [1] * len(ids))
+    return {
+        "input_ids": torch.tensor(input_ids, dtype=torch.long, device=device),
+        "attention_mask": torch.tensor(attention_mask, dtype=torch.long, device=device),
+    }
+
+
+# 프로세스 전역 prefix 캐시
+prefix_kv_cache = PrefixKVCache()
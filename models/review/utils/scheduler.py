@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+[API 호출 스케줄러 모듈]
+- 여러 API 호출 작업(job)을 제한된 동시성의 워커 풀에 우선순위 순서대로 제출
+- 완료되는 즉시 콜백으로 결과 전달
+- 처리량(jobs/s) 및 지연 시간(p50/p95) 리포트
+"""
+
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+def run_prioritized_jobs(jobs, worker_fn, max_workers=4, on_result=None):
+    """
+    jobs를 priority 내림차순으로 정렬하여 워커 풀에 제출한다.
+    ThreadPoolExecutor의 작업 큐는 FIFO이므로, 우선순위가 높은 job이 먼저 실행된다.
+
+    Args:
+        jobs (list[dict]): "priority" 키를 갖는 job 리스트 (없으면 0으로 간주)
+        worker_fn (callable): job을 받아 결과를 반환하는 함수
+        max_workers (int): 동시 실행 워커 수
+        on_result (callable): (job, result)를 받아 완료 즉시 호출되는 콜백 (메인 스레드에서 실행)
+
+    Returns:
+        list: (job, result) 튜플 리스트 (우선순위 순서)
+        dict: 처리량 리포트 (report_throughput 참고)
+    """
+    ordered_jobs = sorted(jobs, key=lambda job: job.get("priority", 0), reverse=True)
+    results = [None] * len(ordered_jobs)
+    latencies = []
+
+    def timed_worker(job):
+        start_time = time.time()
+        result = worker_fn(job)
+        return result, time.time() - start_time
+
+    start_time = time.time()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(timed_worker, job): idx for idx, job in enumerate(ordered_jobs)}
+        for future in as_completed(futures):
+            idx = futures[future]
+            result, latency = future.result()
+            latencies.append(latency)
+            results[idx] = (ordered_jobs[idx], result)
+            if on_result is not None:
+                on_result(ordered_jobs[idx], result)
+    elapsed = time.time() - start_time
+
+    return results, report_throughput(latencies, elapsed)
+
+
+def report_throughput(latencies, elapsed):
+    """
+    job별 지연 시간 리스트와 전체 소요 시간으로 처리량 리포트를 계산하고 출력한다.
+    반환: {"jobs", "elapsed", "jobs_per_sec", "p50_latency", "p95_latency"}
+    """
+    num_jobs = len(latencies)
+    report = {
+        "jobs": num_jobs,
+        "elapsed": float(elapsed),
+        "jobs_per_sec": float(num_jobs / elapsed) if elapsed > 0 else 0.0,
+        "p50_latency": float(np.percentile(latencies, 50)) if latencies else 0.0,
+        "p95_latency": float(np.percentile(latencies, 95)) if latencies else 0.0,
+    }
+    print(f"처리량: {report['jobs']}건 / {report['elapsed']:.2f}초 "
+          f"({report['jobs_per_sec']:.2f} jobs/s), "
+          f"지연 시간 p50: {report['p50_latency']:.2f}초, p95: {report['p95_latency']:.2f}초")
+    return report
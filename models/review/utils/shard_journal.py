@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+[샤드 단위 재시작 가능 인퍼런스 journal 모듈]
+- review-ID의 해시로 입력을 num_shards개 샤드에 결정적으로 배정 (입력 순서/행 추가와 무관)
+- 샤드마다 append-only JSONL journal(shard_00000.jsonl)에 리뷰 결과를 완료 즉시 한 줄씩 기록 (flush + fsync)
+- 재시작 시 journal에 있는 review-ID는 건너뛰고 남은 리뷰만 처리
+    - 최대 시도 후에도 실패한 리뷰는 status "failed"로 기록하며, 재시작 시 다시 처리 대상이 됨
+- 여러 워커 프로세스가 같은 job 폴더에서 샤드를 나눠 처리 (lock 파일 원자적 생성으로 샤드 점유)
+    - 같은 호스트에서 점유 프로세스가 종료된 lock은 stale로 보고 회수
+
+job 폴더 구조:
+    job_dir/
+    ├── manifest.json          # num_shards, id_col (재시작 시 설정 일치 여부 확인)
+    ├── shard_00000.jsonl      # {"id": review-ID, "result": 결과 문자열} 한 줄씩 (실패: {"id", "result": null, "status": "failed"})
+    └── shard_00000.lock       # 처리 중인 워커 정보 (처리 종료 시 삭제)
+"""
+
+import os
+import json
+import time
+import socket
+import hashlib
+
+MANIFEST_FILE = "manifest.json"
+
+
+def shard_of(review_id, num_shards: int) -> int:
+    """review-ID를 sha256 해시로 샤드 번호에 배정한다 (프로세스/실행 환경과 무관하게 동일)."""
+    digest = hashlib.sha256(str(review_id).encode("utf-8")).hexdigest()
+    return int(digest[:16], 16) % num_shards
+
+
+def init_job(job_dir, num_shards: int, id_col="review-ID") -> dict:
+    """
+    job 폴더와 manifest.json을 만든다. 이미 있으면 설정이 같은지 확인한다.
+    샤드 수가 바뀌면 기존 journal의 샤드 배정과 맞지 않으므로 ValueError를 발생시킨다.
+    """
+    os.makedirs(job_dir, exist_ok=True)
+    manifest = {"num_shards": num_shards, "id_col": id_col}
+    manifest_path = os.path.join(job_dir, MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved != manifest:
+            raise ValueError(f"job 설정이 기존 manifest와 다릅니다: {saved} != {manifest} ({job_dir})")
+        return saved
+    tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+    return manifest
+
+
+def shard_path(job_dir, shard: int, suffix="jsonl"):
+    return os.path.join(job_dir, f"shard_{shard:05d}.{suffix}")
+
+
+class ShardJournal:
+    """샤드 하나의 append-only 결과 journal. 점유한 워커만 기록한다."""
+
+    def __init__(self, job_dir, shard: int):
+        self.path = shard_path(job_dir, shard)
+
+    def _records(self):
+        """기록을 순서대로 반환한다. 비정상 종료로 잘린 마지막 줄은 무시한다."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    def load(self) -> dict:
+        """완료된 {review-ID: 결과}를 반환한다. 실패로 기록된 리뷰는 제외한다 (재시작 시 다시 처리)."""
+        return {record["id"]: record["result"] for record in self._records() if record.get("status") != "failed"}
+
+    def load_failed(self) -> set:
+        """실패로 기록되고 이후 완료되지 않은 review-ID 집합을 반환한다."""
+        failed = set()
+        for record in self._records():
+            if record.get("status") == "failed":
+                failed.add(record["id"])
+            else:
+                failed.discard(record["id"])
+        return failed
+
+    def open(self):
+        """추가 기록용으로 연다. 마지막 줄이 잘려 있으면 줄바꿈을 먼저 써서 새 기록과 섞이지 않게 한다."""
+        needs_newline = False
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            with open(self.path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+        self._file = open(self.path, "a", encoding="utf-8")
+        if needs_newline:
+            self._file.write("\n")
+        return self
+
+    def append(self, review_id, result):
+        """리뷰 결과를 기록한다. result가 None이면 실패로 기록한다."""
+        record = {"id": str(review_id), "result": result}
+        if result is None:
+            record["status"] = "failed"
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _is_stale_lock(lock_path) -> bool:
+    """같은 호스트에서 점유 프로세스가 이미 종료된 lock이면 True (다른 호스트의 lock은 판단하지 않음)."""
+    try:
+        with open(lock_path, "r", encoding="utf-8") as f:
+            owner = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return False
+    if owner.get("host") != socket.gethostname():
+        return False
+    try:
+        os.kill(owner["pid"], 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        return False
+    return False
+
+
+def claim_shard(job_dir, shard: int) -> bool:
+    """lock 파일을 원자적으로 만들어 샤드를 점유한다. 다른 워커가 점유 중이면 False."""
+    lock_path = shard_path(job_dir, shard, "lock")
+    for _ in range(2):
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if not _is_stale_lock(lock_path):
+                return False
+            print(f"종료된 워커의 샤드 lock 회수: {lock_path}")
+            try:
+                os.remove(lock_path)
+            except FileNotFoundError:
+                pass
+            continue
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"host": socket.gethostname(), "pid": os.getpid(), "claimed_at": time.time()}, f)
+        return True
+    return False
+
+
+def release_shard(job_dir, shard: int):
+    try:
+        os.remove(shard_path(job_dir, shard, "lock"))
+    except FileNotFoundError:
+        pass
+
+
+def iter_pending_shards(job_dir, review_ids, num_shards: int):
+    """
+    남은 리뷰가 있는 샤드를 점유하며 (샤드 번호, 남은 review-ID 리스트, journal)을 순서대로 반환한다.
+    워커마다 시작 샤드를 pid 기준으로 달리하여 점유 경합을 줄인다. 처리가 끝나면(다음 반복 시) lock을 해제한다.
+    review-ID는 문자열로 비교/기록한다.
+    """
+    shard_ids = {}
+    for review_id in dict.fromkeys(str(review_id) for review_id in review_ids):
+        shard_ids.setdefault(shard_of(review_id, num_shards), []).append(review_id)
+    shards = sorted(shard_ids)
+    if not shards:
+        return
+    start = os.getpid() % len(shards)
+    for shard in shards[start:] + shards[:start]:
+        journal = ShardJournal(job_dir, shard)
+        if set(shard_ids[shard]) <= journal.load().keys():
+            continue
+        if not claim_shard(job_dir, shard):
+            continue
+        try:
+            # 점유 직전에 다른 워커가 끝냈을 수 있으므로 journal을 다시 읽는다
+            done = journal.load()
+            remaining = [review_id for review_id in shard_ids[shard] if review_id not in done]
+            if remaining:
+                yield shard, remaining, journal
+        finally:
+            release_shard(job_dir, shard)
+
+
+def load_results(job_dir, num_shards: int) -> dict:
+    """모든 샤드 journal의 {review-ID(문자열): 결과}를 합쳐 반환한다."""
+    results = {}
+    for shard in range(num_shards):
+        results.update(ShardJournal(job_dir, shard).load())
+    return results
+
+
+def load_failed(job_dir, num_shards: int) -> set:
+    """모든 샤드 journal에서 실패로 기록되고 완료되지 않은 review-ID(문자열) 집합을 반환한다."""
+    failed = set()
+    for shard in range(num_shards):
+        failed |= ShardJournal(job_dir, shard).load_failed()
+    return failed
+
+
+def report_progress(job_dir, review_ids, num_shards: int) -> dict:
+    """전체 / 완료 / 남은 리뷰 수(그중 실패 기록 수)를 출력하고 반환한다."""
+    unique_ids = {str(review_id) for review_id in review_ids}
+    done = unique_ids & load_results(job_dir, num_shards).keys()
+    failed = (unique_ids - done) & load_failed(job_dir, num_shards)
+    report = {"total": len(unique_ids), "done": len(done), "remaining": len(unique_ids) - len(done),
+              "failed": len(failed)}
+    print(f"[샤드 journal] 전체 {report['total']}건, 완료 {report['done']}건, 남은 리뷰 {report['remaining']}건 "
+          f"(실패 {report['failed']}건) ({job_dir})")
+    return report
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+[문장 쌍 유사도 캐시 모듈]
+- ASTE 평가의 (GL 평가, 예측 평가) 쌍 유사도를 (metric, model, text_a, text_b)의 해시로 식별하여 SQLite 파일에 저장
+- 같은 골든 라벨을 여러 예측 칼럼(aste_hcx, aste_gpt, unsloth_deepseek_32b, ...)이나 체크포인트와 비교할 때
+  이미 계산한 쌍은 다시 계산하지 않고, 처음 보는 쌍만 계산
+- model에는 유사도 계산 설정 전체(모델명, 레이어, idf, 라이브러리 버전 등)를 넣어 설정이 바뀌면 다른 키가 되도록 함
+- 조회/저장은 쌍 목록 단위(bulk)로 수행하며 metric별 hit / 새로 계산 통계 리포트
+
+기본 캐시 파일은 ~/.cache/foodly/similarity_cache.sqlite3 이며,
+환경 변수 SIMILARITY_CACHE_PATH로 경로를 변경할 수 있고 SIMILARITY_CACHE_DISABLE=1 이면 캐시를 사용하지 않는다.
+
+사용 예시:
+    scores = get_similarity_cache().get_or_score("bertscore", model_id, pairs, score_fn=lambda missing: [...])
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+from functools import lru_cache
+from collections import defaultdict
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "foodly", "similarity_cache.sqlite3")
+QUERY_CHUNK = 500  # SQLite IN 절 최대 변수 수 이하로 나눠 조회
+
+
+class SimilarityCache:
+    def __init__(self, db_path=DEFAULT_CACHE_PATH, enabled=True):
+        self.db_path = db_path
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.stats = defaultdict(lambda: {"lookups": 0, "hit": 0, "scored": 0})
+        self._conn = None
+        if self.enabled:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS scores (key BLOB PRIMARY KEY, score REAL NOT NULL)")
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(metric, model, text_a, text_b):
+        """(metric, model, text_a, text_b)의 sha256 앞 16바이트 (순서가 다른 쌍은 다른 키)"""
+        raw = json.dumps([metric, model, text_a, text_b], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).digest()[:16]
+
+    def get_many(self, metric, model, pairs):
+        """저장된 쌍의 유사도를 {(text_a, text_b): score}로 반환한다 (없는 쌍은 제외)."""
+        if not self.enabled or not pairs:
+            return {}
+        key_to_pair = {self.make_key(metric, model, text_a, text_b): (text_a, text_b) for text_a, text_b in pairs}
+        keys = list(key_to_pair)
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), QUERY_CHUNK):
+                chunk = keys[start:start + QUERY_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT key, score FROM scores WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for key, score in rows:
+                    found[key_to_pair[bytes(key)]] = score
+        return found
+
+    def set_many(self, metric, model, scores):
+        """{(text_a, text_b): score}를 저장한다."""
+        if not self.enabled or not scores:
+            return
+        rows = [(self.make_key(metric, model, text_a, text_b), float(score)) for (text_a, text_b), score in scores.items()]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO scores (key, score) VALUES (?, ?)", rows)
+            self._conn.commit()
+
+    def get_or_score(self, metric, model, pairs, score_fn):
+        """
+        쌍 목록의 유사도를 {(text_a, text_b): score}로 반환한다.
+        캐시에 없는 고유 쌍만 score_fn(missing_pairs) -> 같은 순서의 점수 목록으로 계산하여 저장한다.
+        """
+        unique_pairs = list(dict.fromkeys(pairs))
+        scores = self.get_many(metric, model, unique_pairs)
+        missing = [pair for pair in unique_pairs if pair not in scores]
+        if missing:
+            new_scores = dict(zip(missing, (float(score) for score in score_fn(missing))))
+            self.set_many(metric, model, new_scores)
+            scores.update(new_scores)
+        with self._lock:
+            self.stats[metric]["lookups"] += len(unique_pairs)
+            self.stats[metric]["hit"] += len(unique_pairs) - len(missing)
+            self.stats[metric]["scored"] += len(missing)
+        return scores
+
+    def report(self, metric=None):
+        """metric별 조회 쌍 수 / hit / 새로 계산한 쌍 수 통계를 출력하고 반환한다."""
+        metrics = [metric] if metric is not None else sorted(self.stats)
+        report = {}
+        for name in metrics:
+            counts = dict(self.stats[name])
+            counts["hit_rate"] = counts["hit"] / counts["lookups"] if counts["lookups"] else 0.0
+            report[name] = counts
+            print(f"[유사도 캐시] {name}: 조회 {counts['lookups']}쌍, hit {counts['hit']} "
+                  f"(hit rate {counts['hit_rate']:.1%}), 새로 계산 {counts['scored']}쌍")
+        return report
+
+
+@lru_cache(maxsize=1)
+def get_similarity_cache():
+    """환경 변수 설정을 반영한 프로세스 전역 SimilarityCache를 반환한다."""
+    return SimilarityCache(
+        db_path=os.getenv("SIMILARITY_CACHE_PATH", DEFAULT_CACHE_PATH),
+        enabled=os.getenv("SIMILARITY_CACHE_DISABLE", "0") != "1",
+    )
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+[반복 표현 제거 모듈]
+- 리뷰 전처리의 remove_repetition (예: "맛있어요맛있어요" -> "맛있어요", "좋아요 좋아요" -> "좋아요")
+- 토큰이 같은 문자열의 반복으로만 이루어진 경우에만 형태소 분석기(Hannanum, JVM)로 유효 단어인지 확인
+  (반복이 아닌 토큰은 분석 결과와 무관하게 그대로 유지되므로 분석기 호출 생략, 결과는 기존과 동일)
+- 단어별 분석 결과는 프로세스 안에서 크기 제한 LRU(VALID_WORD_CACHE_SIZE)로 캐시되어 여러 파일 처리에 재사용
+- remove_repetition_batch(texts, executor)로 프로세스 풀에서 병렬 처리 (워커마다 분석기 1개)
+"""
+
+import re
+import multiprocessing
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from tqdm import tqdm
+
+VALID_WORD_CACHE_SIZE = 100000
+REPEATED_TOKEN = re.compile(r"(.+?)\1+", re.DOTALL)  # 가장 짧은 반복 단위로 토큰 전체가 구성되는지
+
+
+@lru_cache(maxsize=1)
+def get_hannanum():
+    """프로세스마다 Hannanum 분석기(JVM)를 처음 사용할 때 한 번만 생성한다."""
+    from konlpy.tag import Hannanum
+    return Hannanum()
+
+
+@lru_cache(maxsize=VALID_WORD_CACHE_SIZE)
+def is_valid_word(word):
+    """형태소 분석 결과에 단어 전체가 하나의 형태소로 나오면 유효 단어로 판단"""
+    pos_tags = get_hannanum().pos(word)
+    for token, pos in pos_tags:
+        if token == word:
+            return True
+    return False
+
+
+def compress_token(token):
+    match = REPEATED_TOKEN.fullmatch(token)
+    if match is None or is_valid_word(token):
+        return token
+    return match.group(1)
+
+
+def compress_token_list(tokens):
+    n = len(tokens)
+    for k in range(1, n // 2 + 1):
+        block = tokens[:k]
+        if block * (n // k) == tokens:
+            return block
+    return tokens
+
+
+def remove_repetition(text):
+    if not text or not isinstance(text, str):
+        return ""
+    tokens = text.split()
+    tokens = [compress_token(token) for token in tokens]
+    tokens = compress_token_list(tokens)
+    return " ".join(tokens).strip()
+
+
+def make_repetition_executor(num_workers):
+    """
+    remove_repetition용 프로세스 풀 (num_workers <= 1이면 None: 현재 프로세스에서 처리).
+    부모 프로세스는 분석기(JVM)를 만들지 않은 상태에서 fork하고, 각 워커가 자신의 분석기를 만든다.
+    여러 파일에 같은 풀을 사용하면 워커별 LRU 캐시가 파일 간에 유지된다.
+    """
+    if num_workers is None or num_workers <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=num_workers, mp_context=multiprocessing.get_context("fork"))
+
+
+def remove_repetition_batch(texts, executor=None, chunksize=256):
+    """텍스트 목록에 remove_repetition을 적용한다 (중복 텍스트는 한 번만 처리, executor가 있으면 병렬)."""
+    unique_texts = list(dict.fromkeys(texts))
+    if executor is None:
+        results = [remove_repetition(text) for text in tqdm(unique_texts, desc="반복 제거")]
+    else:
+        results = list(tqdm(executor.map(remove_repetition, unique_texts, chunksize=chunksize),
+                            total=len(unique_texts), desc="반복 제거"))
+    mapping = dict(zip(unique_texts, results))
+    return [mapping[text] for text in texts]
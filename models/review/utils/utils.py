@@ -11,6 +11,9 @@ import pandas as pd
 import json
 import requests
 import time
+import hashlib
+from functools import lru_cache
+import joblib
 import umap
 import hdbscan
 import matplotlib
@@ -18,9 +21,12 @@ matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 from sklearn.cluster import AgglomerativeClustering
 from sklearn.manifold import TSNE
+from sklearn.decomposition import PCA
+from sklearn.random_projection import GaussianRandomProjection
 from sklearn.metrics import silhouette_score, davies_bouldin_score
 from sentence_transformers import SentenceTransformer
 from dotenv import load_dotenv
+from utils.embedding_store import get_embedding_store
 
 def load_data(file_path):
     df = pd.read_csv(file_path)
@@ -35,56 +41,175 @@ def load_and_preprocess_reviews(file_path):
     review_df = df[~df["review-ID"].astype(str).str.endswith("-0")]
     return meta_df, review_df
 
+def _parse_triplet_list(raw_value, review_id="N/A"):
+    """
+    expand_inference_data용 단일 값 파서.
+    문자열이면 json.loads(), 리스트면 그대로 사용하며, 리스트가 아니면 None 반환.
+    """
+    if isinstance(raw_value, str):
+        try:
+            parsed = json.loads(raw_value)
+        except json.JSONDecodeError:
+            print(f"JSON 파싱 에러, review-ID: {review_id}")
+            return None
+    elif isinstance(raw_value, list):
+        parsed = raw_value
+    else:
+        # 그 외 타입인 경우 무시
+        return None
+    return parsed if isinstance(parsed, list) else None
+
 def expand_inference_data(df, json_column="unsloth_deepseek_32b"):
-    expanded = []
-    for idx, row in df.iterrows():
-        raw_value = row[json_column]
-
-        # 만약 raw_value가 문자열이면 json.loads()를 사용, 이미 리스트면 그대로 사용
-        if isinstance(raw_value, str):
-            try:
-                parsed = json.loads(raw_value)
-            except json.JSONDecodeError:
-                print(f"JSON 파싱 에러, review-ID: {row.get('review-ID', 'N/A')}")
-                continue
-        elif isinstance(raw_value, list):
-            parsed = raw_value
-        else:
-            # 그 외 타입인 경우 무시
-            continue
-
-        if isinstance(parsed, list):
-            for item in parsed:
-                new_row = row.copy()
-                new_row["aspect"] = item.get("속성", None)
-                new_row["opinion"] = item.get("평가", None)
-                new_row["sentiment"] = item.get("감정", None)
-                expanded.append(new_row)
-    expanded_df = pd.DataFrame(expanded)
-    expanded_df.reset_index(drop=True, inplace=True)
+    """
+    ASTE 결과(JSON 리스트) 칼럼을 triplet 단위 행으로 펼친다.
+    행 단위 row.copy() 대신 칼럼 단위로 처리한다:
+      1. JSON 칼럼 일괄 파싱
+      2. triplet 개수만큼 원본 행 위치를 반복(explode)
+      3. 속성/평가/감정을 aspect/opinion/sentiment 칼럼으로 정규화
+    출력은 기존 행 단위 구현과 동일하다 (원본 칼럼 + aspect, opinion, sentiment, 이후 ffill).
+    """
+    review_ids = df["review-ID"] if "review-ID" in df.columns else pd.Series("N/A", index=df.index)
+    parsed = [_parse_triplet_list(raw_value, review_id)
+              for raw_value, review_id in zip(df[json_column].tolist(), review_ids.tolist())]
+
+    lengths = np.fromiter((len(items) if items is not None else 0 for items in parsed),
+                          dtype=np.int64, count=len(parsed))
+    positions = np.repeat(np.arange(len(parsed)), lengths)
+    triplets = [item for items in parsed if items for item in items]
+
+    expanded_df = df.iloc[positions].reset_index(drop=True)
+    expanded_df["aspect"] = [item.get("속성", None) for item in triplets]
+    expanded_df["opinion"] = [item.get("평가", None) for item in triplets]
+    expanded_df["sentiment"] = [item.get("감정", None) for item in triplets]
+    if expanded_df.empty:
+        # 기존 구현과 동일하게 triplet이 하나도 없으면 빈 DataFrame 반환
+        return pd.DataFrame()
+    expanded_df = expanded_df.infer_objects()
     expanded_df.ffill(inplace=True)
     return expanded_df
 
-def sentenceBERT_embeddings(embedding_path, df, column="processed", model_name="dragonkue/BGE-m3-ko"):
+@lru_cache(maxsize=2)
+def get_sentence_model(model_name="dragonkue/BGE-m3-ko"):
+    """프로세스 전역 SentenceTransformer (모델명별 1회만 로드)"""
+    print(f"문장 임베딩 모델 로드: {model_name}")
+    return SentenceTransformer(model_name)
+
+def encode_texts(texts, model_name="dragonkue/BGE-m3-ko", batch_size=64, normalize_embeddings=False):
+    """
+    텍스트 리스트를 길이 순으로 정렬해 batch_size 단위로 인코딩하고, 입력 순서의 (N, dim) float32 행렬을 반환한다.
+    길이가 비슷한 텍스트끼리 배치되어 패딩 낭비가 줄어든다.
+    """
+    texts = [str(text) for text in texts]
+    model = get_sentence_model(model_name)
+    if not texts:
+        return np.zeros((0, model.get_sentence_embedding_dimension()), dtype=np.float32)
+    order = np.argsort([-len(text) for text in texts], kind="stable")
+    sorted_embeddings = model.encode([texts[idx] for idx in order], batch_size=batch_size,
+                                     show_progress_bar=False, convert_to_numpy=True,
+                                     normalize_embeddings=normalize_embeddings)
+    embeddings = np.empty_like(sorted_embeddings, dtype=np.float32)
+    embeddings[order] = sorted_embeddings
+    return embeddings
+
+def _texts_fingerprint(texts, model_name):
+    """모델명과 텍스트 목록(순서 포함)의 sha256 (임베딩 파일 재사용 여부 판단용)"""
+    digest = hashlib.sha256(model_name.encode("utf-8"))
+    for text in texts:
+        encoded = str(text).encode("utf-8")
+        digest.update(len(encoded).to_bytes(8, "little"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+def sentenceBERT_embeddings(embedding_path, df, column="processed", model_name="dragonkue/BGE-m3-ko", batch_size=64):
+    """
+    df[column] 텍스트의 임베딩 행렬을 반환하고 embedding_path(.npy)에 저장한다.
+    embedding_path와 함께 저장한 해시 파일(.sha256)이 현재 텍스트 목록/모델과 같으면 인코딩 없이 기존 파일을 재사용한다.
+    새로 만들 때도 임베딩 저장소(utils/embedding_store.py)에 없는 고유 텍스트만 인코딩한다.
+    """
+    texts = df[column].astype(str).tolist()
+    fingerprint = _texts_fingerprint(texts, model_name)
+    hash_path = f"{embedding_path}.sha256"
+    if os.path.exists(embedding_path) and os.path.exists(hash_path):
+        with open(hash_path, "r", encoding="utf-8") as f:
+            saved_fingerprint = f.read().strip()
+        if saved_fingerprint == fingerprint:
+            emb_matrix = np.load(embedding_path)
+            print(f"\n입력 텍스트가 같아 기존 임베딩 파일을 재사용합니다: {embedding_path}")
+            print(f"임베딩 Shape:{emb_matrix.shape}\n")
+            return emb_matrix
 
     print("\n임베딩 파일을 새로 생성합니다...\n")
-    model = SentenceTransformer(model_name)
-    embeddings = df[column].apply(lambda txt: model.encode(txt, show_progress_bar=False)).tolist()
-    emb_matrix = np.array(embeddings)
+    start_time = time.time()
+    store = get_embedding_store(model_name)
+    emb_matrix = store.get_or_encode(
+        texts, encode_fn=lambda new_texts: encode_texts(new_texts, model_name=model_name, batch_size=batch_size)
+    )
+    elapsed = time.time() - start_time
+    store.report()
+    print(f"인코딩 {len(texts)}건 / {elapsed:.2f}초 ({len(texts) / elapsed if elapsed > 0 else 0.0:.1f}건/s, "
+          f"batch_size={batch_size})")
     np.save(embedding_path, emb_matrix)
+    with open(hash_path, "w", encoding="utf-8") as f:
+        f.write(fingerprint)
     print(f"\n임베딩 파일 저장 완료: {embedding_path}\n")
 
     print(f"임베딩 Shape:{emb_matrix.shape}\n")
     return emb_matrix
 
-def umap_reduce_embeddings(embedding_matrix, n_components=256, random_state=42):
-    num_samples, _ = embedding_matrix.shape
+REDUCTION_METHODS = ("umap", "pca", "random_projection")
+
+def _make_reducer(method, n_components, random_state):
+    if method == "umap":
+        return umap.UMAP(n_components=n_components, random_state=random_state)
+    if method == "pca":
+        return PCA(n_components=n_components, random_state=random_state)
+    if method == "random_projection":
+        return GaussianRandomProjection(n_components=n_components, random_state=random_state)
+    raise ValueError(f"지원하지 않는 차원 축소 방식: {method} (가능: {REDUCTION_METHODS})")
+
+def _array_fingerprint(array):
+    array = np.ascontiguousarray(array)
+    digest = hashlib.sha256(str((array.shape, array.dtype.str)).encode("utf-8"))
+    digest.update(array.data)
+    return digest.hexdigest()
+
+def reduce_embeddings(embedding_matrix, method="umap", n_components=256, random_state=42, reducer_path=None,
+                      reuse_reducer=True):
+    """
+    method(umap / pca / random_projection)로 임베딩 차원을 축소한다.
+    reducer_path가 주어지면 학습한 reducer를 저장하고, 다음 실행에서는 다시 학습하지 않고 재사용한다.
+      - 학습 때와 같은 입력이면 저장된 축소 결과를 그대로 반환 (UMAP도 동일 결과)
+      - 새 입력이면 저장된 reducer로 transform
+    pca / random_projection은 선형 변환이라 UMAP보다 훨씬 빠르다.
+    """
+    num_samples, input_dim = embedding_matrix.shape
     if n_components >= num_samples:
-        print("UMAP 적용 불가: n_components가 데이터 수보다 큽니다. 원본 반환.")
+        print("차원 축소 적용 불가: n_components가 데이터 수보다 큽니다. 원본 반환.")
         return embedding_matrix
-    reducer = umap.UMAP(n_components=n_components, random_state=random_state)
+    start_time = time.time()
+    fingerprint = _array_fingerprint(embedding_matrix)
+
+    if reuse_reducer and reducer_path and os.path.exists(reducer_path):
+        saved = joblib.load(reducer_path)
+        if (saved["method"], saved["n_components"], saved["input_dim"]) == (method, n_components, input_dim):
+            if saved["fit_fingerprint"] == fingerprint:
+                reduced = saved["fit_output"]
+                print(f"저장된 {method} 축소 결과 재사용: {reducer_path}")
+            else:
+                reduced = saved["reducer"].transform(embedding_matrix)
+                print(f"저장된 {method} reducer로 transform: {reducer_path}")
+            print(f"차원 축소 완료: {embedding_matrix.shape} -> {reduced.shape} ({time.time() - start_time:.2f}초)")
+            return reduced
+        print(f"저장된 reducer 설정이 달라 다시 학습합니다: {reducer_path}")
+
+    reducer = _make_reducer(method, n_components, random_state)
     reduced = reducer.fit_transform(embedding_matrix)
-    print(f"차원 축소 완료: {embedding_matrix.shape} -> {reduced.shape}")
+    if reducer_path:
+        os.makedirs(os.path.dirname(os.path.abspath(reducer_path)), exist_ok=True)
+        joblib.dump({"method": method, "n_components": n_components, "input_dim": input_dim,
+                     "fit_fingerprint": fingerprint, "fit_output": reduced, "reducer": reducer}, reducer_path)
+        print(f"{method} reducer 저장: {reducer_path}")
+    print(f"차원 축소 완료 ({method}): {embedding_matrix.shape} -> {reduced.shape} ({time.time() - start_time:.2f}초)")
     return reduced
 
 def agglomerative_clustering(emb, distance_threshold=22.0, linkage="ward"):
@@ -96,28 +221,111 @@ def agglomerative_clustering(emb, distance_threshold=22.0, linkage="ward"):
     print(f"Agglomerative Clustering 완료: 클러스터 수 {np.unique(labels).shape[0]}")
     return labels
 
+PROJECTION_METHODS = ("tsne", "pca", "umap")
+
+def stratified_sample_indices(cluster_labels, max_samples, random_state=42):
+    """
+    클러스터 크기에 비례하여 최대 max_samples개 인덱스를 뽑는다 (각 클러스터 최소 1개, 정렬된 인덱스).
+    max_samples가 None이거나 데이터 수 이하면 전체 인덱스를 반환한다.
+    """
+    cluster_labels = np.asarray(cluster_labels)
+    num_samples = len(cluster_labels)
+    if max_samples is None or num_samples <= max_samples:
+        return np.arange(num_samples)
+    rng = np.random.default_rng(random_state)
+    labels, inverse, counts = np.unique(cluster_labels, return_inverse=True, return_counts=True)
+    quota = np.maximum(1, np.floor(counts * max_samples / num_samples)).astype(np.int64)
+    order = np.argsort(inverse, kind="stable")
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    picked = [rng.choice(order[offsets[i]:offsets[i + 1]], size=min(quota[i], counts[i]), replace=False)
+              for i in range(len(labels))]
+    return np.sort(np.concatenate(picked))
+
+def project_2d(emb, method="tsne", cache_dir=None, random_state=42, perplexity=30, learning_rate=200):
+    """
+    시각화용 2차원 투영 (tsne / pca / umap).
+    cache_dir가 주어지면 (임베딩 해시, 방식, 파라미터)별로 결과를 .npy로 저장하여 재사용한다.
+    """
+    if method not in PROJECTION_METHODS:
+        raise ValueError(f"지원하지 않는 2차원 투영 방식: {method} (가능: {PROJECTION_METHODS})")
+    params = {"method": method, "random_state": random_state}
+    if method == "tsne":
+        params.update(perplexity=perplexity, learning_rate=learning_rate)
+    cache_path = None
+    if cache_dir:
+        key = hashlib.sha256((_array_fingerprint(emb) + json.dumps(params, sort_keys=True)).encode("utf-8")).hexdigest()
+        cache_path = os.path.join(cache_dir, "projection_cache", f"{method}_{key[:16]}.npy")
+        if os.path.exists(cache_path):
+            print(f"저장된 2차원 투영 재사용: {cache_path}")
+            return np.load(cache_path)
+
+    start_time = time.time()
+    if method == "tsne":
+        projector = TSNE(n_components=2, perplexity=min(perplexity, len(emb) - 1), learning_rate=learning_rate,
+                         random_state=random_state)
+    elif method == "pca":
+        projector = PCA(n_components=2, random_state=random_state)
+    else:
+        projector = umap.UMAP(n_components=2, random_state=random_state)
+    emb_2d = projector.fit_transform(emb)
+    print(f"2차원 투영 완료 ({method}): {len(emb)}건, {time.time() - start_time:.2f}초")
+    if cache_path:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        np.save(cache_path, emb_2d)
+    return emb_2d
+
 def visualize_clustering(emb, cluster_labels, config, category):
-    tsne = TSNE(n_components=2, perplexity=30, learning_rate=200, random_state=42)
-    emb_2d = tsne.fit_transform(emb)
+    """
+    클러스터 라벨 기준 층화 샘플(visualization.max_plot_samples)을 2차원으로 투영하여 그림으로 저장한다.
+    투영 방식은 config의 visualization.projection (tsne / pca / umap)
+    """
+    vis_config = config.get("visualization", {})
+    cluster_labels = np.asarray(cluster_labels)
+    idx = stratified_sample_indices(cluster_labels, vis_config.get("max_plot_samples"))
+    emb_2d = project_2d(emb[idx], method=vis_config.get("projection", "tsne"), cache_dir=config["paths"]["embedding_dir"],
+                        perplexity=vis_config.get("perplexity", 30))
     plt.figure(figsize=(8, 6))
-    sc = plt.scatter(emb_2d[:,0], emb_2d[:,1], c=cluster_labels, cmap="tab10", alpha=0.6)
+    sc = plt.scatter(emb_2d[:,0], emb_2d[:,1], c=cluster_labels[idx], cmap="tab10", alpha=0.6)
     plt.colorbar(sc, label="클러스터 번호")
     plt.title("Agglomerative Clustering Algorithm Visualization")
     plt.xlabel("Component 1")
     plt.ylabel("Component 2")
     # plt.show()
     plt.savefig(os.path.join(config["paths"]["embedding_dir"], f"{category}_cluster_result.png"))  # 결과를 파일로 저장
+    plt.close()
 
 
 def evaluate_clustering(emb, cluster_labels, config, category):
+    """
+    실루엣 점수(O(n²))는 클러스터 층화 샘플(visualization.max_metric_samples)로, DBI는 전체 데이터로 계산한다.
+    같은 (임베딩, 라벨, 샘플 수)에 대한 결과가 저장되어 있으면 다시 계산하지 않는다.
+    """
+    cluster_labels = np.asarray(cluster_labels)
     if len(set(cluster_labels)) > 1:
-        silhouette = silhouette_score(emb, cluster_labels)
+        max_samples = config.get("visualization", {}).get("max_metric_samples", 10000)
+        input_hash = hashlib.sha256((_array_fingerprint(emb) + _array_fingerprint(cluster_labels)
+                                     + str(max_samples)).encode("utf-8")).hexdigest()
+        json_path = os.path.join(config["paths"]["embedding_dir"], f"{category}_clustering_evaluation.json")
+        if os.path.exists(json_path):
+            with open(json_path, "r") as f:
+                cached = json.load(f)
+            if cached.get("input_hash") == input_hash:
+                print(f"저장된 평가 결과 재사용: 실루엣 점수: {cached['Silhouette']:.4f}, Davies-Bouldin Index: {cached['DBI']:.4f}")
+                return cached
+
+        idx = stratified_sample_indices(cluster_labels, max_samples)
+        # 샘플이 클러스터마다 1개뿐이면 실루엣 정의가 불가하므로 전체 데이터 사용
+        if len(idx) > len(set(cluster_labels)):
+            silhouette = silhouette_score(emb[idx], cluster_labels[idx])
+        else:
+            idx = np.arange(len(cluster_labels))
+            silhouette = silhouette_score(emb, cluster_labels)
         dbi = davies_bouldin_score(emb, cluster_labels)
-        print(f"실루엣 점수: {silhouette:.4f}, Davies-Bouldin Index: {dbi:.4f}")
+        print(f"실루엣 점수: {silhouette:.4f} ({len(idx)}건 샘플), Davies-Bouldin Index: {dbi:.4f}")
         
-        results = {"category": category, "Silhouette": float(silhouette), "DBI": float(dbi)}
+        results = {"category": category, "Silhouette": float(silhouette), "DBI": float(dbi),
+                   "silhouette_samples": int(len(idx)), "input_hash": input_hash}
 
-        json_path = os.path.join(config["paths"]["embedding_dir"], f"{category}_clustering_evaluation.json")
         with open(json_path, "w") as f:
             json.dump(results, f, indent=4)
         
@@ -125,3 +333,23 @@ def evaluate_clustering(emb, cluster_labels, config, category):
     else:
         print("단일 클러스터로 평가 불가")
         return {"Silhouette": None, "DBI": None}
+
+@lru_cache(maxsize=1)
+def _load_hcx_credentials():
+    # ~/.env는 프로세스당 한 번만 읽는다
+    load_dotenv(os.path.expanduser("~/.env"))
+    return os.getenv("AUTHORIZATION"), os.getenv("X_NCP_CLOVASTUDIO_REQUEST_ID")
+
+def get_hcx_headers():
+    """
+    HCX(CLOVA Studio) API 요청 헤더를 반환한다.
+    인증 정보가 없으면 ValueError를 발생시킨다.
+    """
+    AUTHORIZATION, X_NCP_CLOVASTUDIO_REQUEST_ID = _load_hcx_credentials()
+    if not AUTHORIZATION or not X_NCP_CLOVASTUDIO_REQUEST_ID:
+        raise ValueError("필수 API 인증 정보가 .env에 설정되어 있지 않습니다.")
+    return {
+        'Authorization': AUTHORIZATION,
+        'X-NCP-CLOVASTUDIO-REQUEST-ID': X_NCP_CLOVASTUDIO_REQUEST_ID,
+        'Content-Type': 'application/json; charset=utf-8',
+    }
@@ -1,6 +1,7 @@
 from utils.common_utils import (
     set_seed, requests, pd, time
 )
+from utils.llm_cache import get_llm_cache
 import yaml
 
 class CompletionExecutor:
@@ -10,6 +11,15 @@ class CompletionExecutor:
         self._request_id = request_id
 
     def execute(self, completion_request, max_retries=5, retry_delay=20):
+        # 동일 요청은 LLM 캐시에서 재사용 (재시도 초과(None)나 빈 응답은 캐시하지 않음)
+        return get_llm_cache().get_or_call(
+            stage="janus_pro_pp_hcx", endpoint=self._host + '/testapp/v1/chat-completions/HCX-003', model="HCX-003",
+            payload=completion_request,
+            call_fn=lambda: self._execute(completion_request, max_retries, retry_delay),
+            is_valid=lambda result: isinstance(result, str) and bool(result.strip())
+        )
+
+    def _execute(self, completion_request, max_retries=5, retry_delay=20):
         headers = {
             'Authorization': self._api_key,
             'X-NCP-CLOVASTUDIO-REQUEST-ID': self._request_id,
@@ -98,6 +108,8 @@ def main():
 
         print(idx, result_ko)
 
+    get_llm_cache().report("janus_pro_pp_hcx")
+
     # 4) 결과 CSV 저장 (같은 파일에 덮어쓰기)
     df.to_csv(csv_path, index=False, encoding="utf-8-sig")
     print(f"[fewshot_janus_pro_hcx] 파일 저장 완료 => {csv_path}")
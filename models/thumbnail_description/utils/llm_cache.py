@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+[LLM 응답 캐시 모듈]
+- 구현은 모든 모델 프로젝트가 공유하는 models/common/llm_cache.py에 있으며, 이 파일은 프로젝트 안에서
+  기존과 같이 `from utils.llm_cache import get_llm_cache`로 사용할 수 있도록 불러오기만 한다.
+"""
+
+import os
+import sys
+
+common_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "common"))
+if common_dir not in sys.path:
+    sys.path.insert(0, common_dir)
+
+from llm_cache import LLMCache, get_llm_cache, DEFAULT_CACHE_PATH, DEFAULT_MAX_SIZE_MB